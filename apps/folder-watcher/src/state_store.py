@@ -0,0 +1,164 @@
+import os
+import json
+import sqlite3
+from collections import namedtuple
+
+# ファイルごとの記録。size / inode が None のものは旧形式（mtime のみ）の state から読み込んだもの
+# digest は内容ハッシュモード（content_hash）でのみ記録する
+# pruned はフォルダの記録で、一覧の読み込みを続けて省略した回数（prune_unchanged_dirs でのみ記録する）
+FileStat = namedtuple('FileStat', ['size', 'mtime_ns', 'inode', 'digest', 'pruned'], defaults=(None, None))
+
+# 旧形式の mtime（秒の float）を ns に戻すときの丸め誤差の許容範囲
+LEGACY_MTIME_TOLERANCE_NS = 1000
+
+
+def stat_entry(st):
+    return FileStat(st.st_size, st.st_mtime_ns, st.st_ino)
+
+
+def is_modified(old, new):
+    if old.size is None:
+        return abs(old.mtime_ns - new.mtime_ns) > LEGACY_MTIME_TOLERANCE_NS
+    return old.size != new.size or old.mtime_ns != new.mtime_ns
+
+
+def content_changed(old, new):
+    """サイズ・更新時刻が変わっていて、内容ハッシュも変わっている（またはハッシュがない）"""
+    if not is_modified(old, new):
+        return False
+    if old.digest is None or new.digest is None:
+        return True
+    return old.digest != new.digest
+
+
+class JsonStateStore:
+    """前回走査結果を JSON ファイルにまとめて保存する（従来形式）"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, 'r', encoding='utf-8') as f:
+            raw = json.load(f)
+
+        state = {}
+        for rel_path, value in raw.items():
+            if isinstance(value, dict):
+                state[rel_path] = FileStat(
+                    value.get('size'), value['mtime_ns'], value.get('inode'), value.get('digest'), value.get('pruned')
+                )
+            else:
+                # 旧形式: {rel_path: mtime}
+                state[rel_path] = FileStat(None, round(value * 1e9), None)
+        return state
+
+    def save(self, state, changed, deleted):
+        # JSON は差分だけを書けないため、毎回全体を書き直す
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({k: v._asdict() for k, v in state.items()}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def load_retry(self):
+        path = self.path + '.retry.json'
+        if not os.path.exists(path):
+            return []
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save_retry(self, paths):
+        """通知が完了していないパスを保存する（次回の走査時に再通知する）"""
+        path = self.path + '.retry.json'
+        if not paths:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        # 書き込み途中で落ちても前回の内容が残るよう、save と同じく一時ファイルから置き換える
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(sorted(paths), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+    def close(self):
+        pass
+
+
+class SqliteStateStore:
+    """前回走査結果を SQLite に保存し、変更のあった行だけを書き込む"""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        # 走査スレッドから使うが、同時に使うのは常に1スレッドだけ
+        self.con = sqlite3.connect(path, check_same_thread=False)
+        self.con.execute('PRAGMA journal_mode = WAL;')
+        self.con.execute('PRAGMA synchronous = NORMAL;')
+        self.con.execute(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+              path TEXT PRIMARY KEY,
+              size INTEGER,
+              mtime_ns INTEGER NOT NULL,
+              inode INTEGER,
+              digest TEXT,
+              pruned INTEGER
+            ) WITHOUT ROWID;
+            """
+        )
+        columns = [row[1] for row in self.con.execute('PRAGMA table_info(files)')]
+        if 'digest' not in columns:
+            self.con.execute('ALTER TABLE files ADD COLUMN digest TEXT')
+        if 'pruned' not in columns:
+            self.con.execute('ALTER TABLE files ADD COLUMN pruned INTEGER')
+        self.con.execute('CREATE TABLE IF NOT EXISTS retry (path TEXT PRIMARY KEY) WITHOUT ROWID;')
+        self.con.commit()
+
+    def load(self):
+        rows = self.con.execute('SELECT path, size, mtime_ns, inode, digest, pruned FROM files')
+        return {row[0]: FileStat(*row[1:]) for row in rows}
+
+    def save(self, state, changed, deleted):
+        with self.con:
+            self.con.executemany(
+                """
+                INSERT INTO files (path, size, mtime_ns, inode, digest, pruned)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(path) DO UPDATE SET
+                  size=excluded.size,
+                  mtime_ns=excluded.mtime_ns,
+                  inode=excluded.inode,
+                  digest=excluded.digest,
+                  pruned=excluded.pruned
+                """,
+                [(rel_path, *state[rel_path]) for rel_path in changed],
+            )
+            self.con.executemany('DELETE FROM files WHERE path = ?', [(rel_path,) for rel_path in deleted])
+
+    def load_retry(self):
+        return [path for (path,) in self.con.execute('SELECT path FROM retry')]
+
+    def save_retry(self, paths):
+        """通知が完了していないパスを保存する（次回の走査時に再通知する）"""
+        with self.con:
+            self.con.execute('DELETE FROM retry')
+            self.con.executemany('INSERT INTO retry (path) VALUES (?)', [(p,) for p in sorted(paths)])
+
+    def close(self):
+        self.con.close()
+
+
+STATE_BACKENDS = {
+    'json': JsonStateStore,
+    'sqlite': SqliteStateStore,
+}
+
+
+def open_state_store(w):
+    backend = w.get('state_backend', 'json')
+    if backend not in STATE_BACKENDS:
+        raise ValueError(f"Unknown state_backend: {backend!r}")
+    return STATE_BACKENDS[backend](w['state_file'])
@@ -1,67 +1,515 @@
 #!/usr/bin/env python3
 import os
 import json
+import time
+import argparse
+import hashlib
+import tempfile
+import threading
 import subprocess
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
 
+from state_store import FileStat, content_changed, is_modified, open_state_store, stat_entry
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # watchdog は常駐モードでのみ必要
+    FileSystemEventHandler = object
+    Observer = None
+
 # 設定ファイルやスクリプトのパスを動的に取得
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 CONFIG_FILE = os.path.join(BASE_DIR, 'config', 'watchers.json')
 
+# 常駐モードの既定値（秒）
+DEFAULT_DEBOUNCE = 5
+DEFAULT_RECONCILE_INTERVAL = 3600
+
+# 監視フォルダを並列に走査する既定の数
+DEFAULT_SCAN_WORKERS = 4
+
+# prune_unchanged_dirs で、更新時刻が変わっていないフォルダも一覧を読み直す間隔（走査の回数）
+DEFAULT_FULL_SCAN_EVERY = 10
+
+# 通知コマンドの既定値。引数の合計長は cmd.exe の上限（8191 文字）に収まるようにする
+DEFAULT_MAX_ARG_BYTES = 8000
+DEFAULT_NOTIFY_CONCURRENCY = 1
+DEFAULT_NOTIFY_RETRIES = 2
+NOTIFY_RETRY_WAIT = 5
+
+# 内容ハッシュモードの既定値
+DEFAULT_HASH_WORKERS = 4
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# state にはフォルダも末尾に区切り文字を付けたキーで記録する（監視フォルダ自身は "./"）
+ROOT_KEY = os.curdir + os.sep
+
 # ----------------------------------
 # ヘルパー関数
 # ----------------------------------
 
-def load_state(path):
-    if os.path.exists(path):
-        with open(path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {}
+def is_dir_key(key):
+    return key.endswith(os.sep)
 
 
-def save_state(path, state):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, 'w', encoding='utf-8') as f:
-        json.dump(state, f, ensure_ascii=False, indent=2)
+def _children_index(old):
+    """前回の state をフォルダごとの直下の記録に振り分ける"""
+    children = {}
+    for key in old:
+        if key == ROOT_KEY:
+            continue
+        parent = os.path.dirname(key.rstrip(os.sep))
+        children.setdefault(parent, []).append(key)
+    return children
 
 
-def scan_folder(folder):
-    """フォルダ内の相対パスと最終更新時刻を取得"""
+def scan_folder(folder, old=None, full_scan_every=DEFAULT_FULL_SCAN_EVERY):
+    """フォルダ内の相対パスとサイズ・最終更新時刻・inode を取得
+
+    old を渡すと、更新時刻が前回と同じフォルダ（ファイルの追加・削除・名前変更がない）は
+    一覧の読み込みとファイルの stat を省略して前回の記録を引き継ぐ。
+    既存ファイルの上書きではフォルダの更新時刻が変わらないため、省略が full_scan_every - 1 回
+    続いたフォルダは次の走査で一覧を読み直す（上書きは最大 full_scan_every 回後の走査で検知される）。
+    """
     state = {}
-    for root, _, files in os.walk(folder):
-        for fn in files:
-            full_path = os.path.join(root, fn)
-            rel_path = os.path.relpath(full_path, folder)
-            mtime = os.path.getmtime(full_path)
-            state[rel_path] = mtime
+    children = _children_index(old) if old else {}
+    stack = ['']
+    while stack:
+        rel_dir = stack.pop()
+        full_dir = os.path.join(folder, rel_dir)
+        st = os.stat(full_dir)
+        dir_key = rel_dir + os.sep if rel_dir else ROOT_KEY
+        state[dir_key] = FileStat(None, st.st_mtime_ns, st.st_ino)
+
+        prev = old.get(dir_key) if old else None
+        pruned = (prev.pruned or 0) + 1 if prev is not None and prev.mtime_ns == st.st_mtime_ns else 0
+        if 0 < pruned < full_scan_every:
+            state[dir_key] = state[dir_key]._replace(pruned=pruned)
+            for key in children.get(rel_dir, ()):
+                if is_dir_key(key):
+                    stack.append(key[:-1])
+                else:
+                    state[key] = old[key]
+            continue
+
+        with os.scandir(full_dir) as it:
+            for entry in it:
+                rel_path = os.path.join(rel_dir, entry.name)
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(rel_path)
+                elif entry.is_file():
+                    state[rel_path] = stat_entry(entry.stat())
     return state
 
 
+def hash_file(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def fill_digests(folder, old, entries, workers=DEFAULT_HASH_WORKERS):
+    """entries に内容ハッシュを付ける。サイズ・更新時刻が前回と同じファイルは前回のハッシュを使う"""
+    to_hash = []
+    for rel_path, entry in entries.items():
+        if is_dir_key(rel_path):
+            continue
+        prev = old.get(rel_path)
+        if prev is not None and not is_modified(prev, entry):
+            entries[rel_path] = entry._replace(digest=prev.digest)
+        else:
+            to_hash.append(rel_path)
+
+    def digest(rel_path):
+        try:
+            return hash_file(os.path.join(folder, rel_path))
+        except OSError:
+            # ハッシュ計算中に削除・ロックされた場合は次回に回す
+            return None
+
+    # hashlib は大きなデータの計算中に GIL を解放するので、スレッドで並列に計算できる
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for rel_path, value in zip(to_hash, executor.map(digest, to_hash)):
+            entries[rel_path] = entries[rel_path]._replace(digest=value)
+
+
 def detect_changes(old, new):
-    added   = [f for f in new if f not in old]
-    updated = [f for f in new if f in old and new[f] != old[f]]
-    return added, updated
+    added   = [f for f in new if f not in old and not is_dir_key(f)]
+    updated = [f for f in new if f in old and not is_dir_key(f) and content_changed(old[f], new[f])]
+    deleted = [f for f in old if f not in new and not is_dir_key(f)]
+    return added, updated, deleted
+
+
+def make_batches(command, paths, max_arg_bytes=DEFAULT_MAX_ARG_BYTES, max_files=None):
+    """コマンドライン長（と件数）の上限に収まるようにパスを分割する"""
+    base = sum(len(arg.encode('utf-8')) + 1 for arg in command)
+    batch, size = [], base
+    for path in paths:
+        # 空白を含むパスの引用符の分も見込んでおく
+        n = len(path.encode('utf-8')) + 3
+        if batch and (size + n > max_arg_bytes or (max_files and len(batch) >= max_files)):
+            yield batch
+            batch, size = [], base
+        batch.append(path)
+        size += n
+    if batch:
+        yield batch
+
+
+def run_notification(notification, batch):
+    """1バッチ分の通知コマンドを実行して終了コードを返す（起動できなかった場合は None）"""
+    cmd = list(notification['command'])
+    pass_by = notification.get('pass_by', 'args')
+    try:
+        if pass_by == 'stdin':
+            # 1行に1パスで標準入力に渡す
+            return subprocess.run(cmd, input=''.join(p + '\n' for p in batch), text=True, encoding='utf-8').returncode
+        if pass_by == 'file':
+            # 1行に1パスのリストファイルを作り、そのパスを引数で渡す
+            with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False, encoding='utf-8') as f:
+                f.writelines(p + '\n' for p in batch)
+            try:
+                return subprocess.run(cmd + [f.name]).returncode
+            finally:
+                os.remove(f.name)
+        # 実行スクリプト＋変更リストを引数で渡す
+        return subprocess.run(cmd + batch).returncode
+    except OSError as e:
+        log(f"failed to run {cmd}: {e}")
+        return None
+
+
+class NotificationDispatcher:
+    """通知コマンドをバッチに分け、並列数を制限してバックグラウンドで実行する
+
+    失敗したバッチは retries 回まで再実行し、それでも失敗したパスは pending() に残す。
+    """
+
+    def __init__(self, w):
+        self.name = w['name']
+        self.notification = w['notification']
+        self.retries = self.notification.get('retries', DEFAULT_NOTIFY_RETRIES)
+        self.executor = ThreadPoolExecutor(
+            max_workers=max(1, self.notification.get('concurrency', DEFAULT_NOTIFY_CONCURRENCY))
+        )
+        self.lock = threading.Lock()
+        self.in_flight = Counter()
+        self.failed = set()
+        self.futures = set()
+
+    def submit(self, paths):
+        if self.notification.get('pass_by', 'args') == 'args':
+            batches = make_batches(
+                self.notification['command'],
+                paths,
+                self.notification.get('max_arg_bytes', DEFAULT_MAX_ARG_BYTES),
+                self.notification.get('max_files'),
+            )
+        else:
+            batches = make_batches([], paths, float('inf'), self.notification.get('max_files'))
+
+        for batch in batches:
+            with self.lock:
+                self.in_flight.update(batch)
+            self.futures.add(self.executor.submit(self._run, batch))
+        self.futures = {f for f in self.futures if not f.done()}
+
+    def _run(self, batch):
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(NOTIFY_RETRY_WAIT)
+            returncode = run_notification(self.notification, batch)
+            if returncode == 0:
+                break
+            log(f"{self.name}: notification failed (exit={returncode}, files={len(batch)}, attempt={attempt + 1})")
+
+        with self.lock:
+            self.in_flight.subtract(batch)
+            self.in_flight += Counter()  # 0 以下になったものを取り除く
+            if returncode == 0:
+                self.failed.difference_update(batch)
+            else:
+                self.failed.update(batch)
+
+    def busy(self):
+        """通知中のパス"""
+        with self.lock:
+            return set(self.in_flight)
+
+    def pending(self):
+        """通知が完了していない（通知中・失敗した）パス"""
+        with self.lock:
+            return self.failed | set(self.in_flight)
+
+    def wait(self):
+        wait(self.futures)
+        self.futures.clear()
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+def notify(w, store, dispatcher, paths, state):
+    """前回通知できなかったパスと合わせて通知を依頼する"""
+    busy = dispatcher.busy()
+    # 通知中のものと、その後削除されたものは再通知しない
+    retry = [f for f in store.load_retry() if f in state and f not in busy]
+    paths = list(dict.fromkeys(retry + paths))
+    if not paths:
+        return
+    # 通知が終わる前に止まっても次回に再通知できるよう、先に記録しておく
+    store.save_retry(dispatcher.pending() | set(paths))
+    dispatcher.submit(paths)
+
+
+def log(message):
+    print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] {message}", flush=True)
+
+
+def reconcile(w, store, old, dispatcher):
+    """全走査して前回状態との差分を通知し、新しい状態を返す"""
+    started = time.perf_counter()
+    new = scan_folder(
+        w['watch_dir'],
+        old if w.get('prune_unchanged_dirs') else None,
+        w.get('full_scan_every', DEFAULT_FULL_SCAN_EVERY),
+    )
+    if w.get('content_hash'):
+        fill_digests(w['watch_dir'], old, new, w.get('hash_workers', DEFAULT_HASH_WORKERS))
+    added, updated, deleted = detect_changes(old, new)
+    files = sum(1 for f in new if not is_dir_key(f))
+    log(f"{w['name']}: scanned {files} files in {time.perf_counter() - started:.2f}s")
+
+    notify(w, store, dispatcher, added + updated, new)
+    if deleted:
+        log(f"{w['name']}: deleted={len(deleted)}")
+
+    # 変更のあった記録だけを保存する（JSON は全体を書き直す）
+    changed = [f for f in new if old.get(f) != new[f]]
+    removed = [f for f in old if f not in new]
+    if changed or removed:
+        store.save(new, changed, removed)
+    return new
+
+
+def apply_changes(folder, state, changed, deleted, content_hash=False, hash_workers=DEFAULT_HASH_WORKERS):
+    """イベントのあったパスだけを調べて state を更新し、(added, updated, 記録を変えたパス, 削除したパス) を返す"""
+    removed = []
+    for rel_path in deleted:
+        if state.pop(rel_path, None) is not None:
+            removed.append(rel_path)
+        # フォルダごと削除・移動された場合は配下の記録も消す
+        prefix = rel_path + os.sep
+        for key in [k for k in state if k.startswith(prefix)]:
+            del state[key]
+            removed.append(key)
+
+    added, updated, touched = [], [], []
+    for rel_path in changed:
+        full_path = os.path.join(folder, rel_path)
+        if os.path.isdir(full_path):
+            # フォルダが移動されてきた場合は配下だけを走査する
+            entries = {
+                (rel_path + os.sep if k == ROOT_KEY else os.path.join(rel_path, k)): v
+                for k, v in scan_folder(full_path).items()
+            }
+        elif os.path.isfile(full_path):
+            entries = {rel_path: stat_entry(os.stat(full_path))}
+        else:
+            # イベント後に削除済み
+            continue
+
+        if content_hash:
+            fill_digests(folder, state, entries, hash_workers)
+        for rel, entry in entries.items():
+            old = state.get(rel)
+            if not is_dir_key(rel):
+                if old is None:
+                    added.append(rel)
+                elif content_changed(old, entry):
+                    updated.append(rel)
+            if old != entry:
+                touched.append(rel)
+            state[rel] = entry
+
+    # 削除後に同じパスで作り直されたものは削除扱いにしない
+    removed = [f for f in removed if f not in state]
+    return added, updated, touched, removed
+
+
+def reconcile_all(watchers, stores, states, dispatchers, workers):
+    """監視フォルダごとの全走査を並列に行う"""
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        return list(executor.map(reconcile, watchers, stores, states, dispatchers))
+
+
+class ChangeCollector(FileSystemEventHandler):
+    """watchdog のイベントから変更・削除された相対パスを集める"""
+
+    def __init__(self, folder):
+        self.folder = os.path.abspath(folder)
+        self.lock = threading.Lock()
+        self.changed = set()
+        self.deleted = set()
+
+    def _rel(self, path):
+        return os.path.relpath(path, self.folder)
+
+    def _mark_changed(self, path):
+        with self.lock:
+            self.changed.add(self._rel(path))
+
+    def _mark_deleted(self, path):
+        with self.lock:
+            self.deleted.add(self._rel(path))
+
+    def on_created(self, event):
+        self._mark_changed(event.src_path)
+
+    def on_modified(self, event):
+        # フォルダの更新イベントは配下ファイルのイベントで拾えるので無視する
+        if not event.is_directory:
+            self._mark_changed(event.src_path)
+
+    def on_moved(self, event):
+        self._mark_deleted(event.src_path)
+        self._mark_changed(event.dest_path)
+
+    def on_deleted(self, event):
+        self._mark_deleted(event.src_path)
+
+    def drain(self):
+        with self.lock:
+            changed, deleted = self.changed, self.deleted
+            self.changed, self.deleted = set(), set()
+        return sorted(changed), sorted(deleted)
+
+
+def load_watchers():
+    with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
 
 # ----------------------------------
 # メイン処理
 # ----------------------------------
-def main():
-    # 設定ファイル読み込み
-    with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-        watchers = json.load(f)
+def run_once(watchers, workers):
+    stores = [open_state_store(w) for w in watchers]
+    dispatchers = [NotificationDispatcher(w) for w in watchers]
+    try:
+        reconcile_all(watchers, stores, [store.load() for store in stores], dispatchers, workers)
+    finally:
+        for store, dispatcher in zip(stores, dispatchers):
+            dispatcher.wait()
+            dispatcher.close()
+            store.save_retry(dispatcher.pending())
+            store.close()
+
 
+def run_daemon(watchers, workers, debounce=DEFAULT_DEBOUNCE, reconcile_interval=DEFAULT_RECONCILE_INTERVAL):
+    """ファイル変更イベントで差分だけを処理し、定期的に全走査で取りこぼしを補う"""
+    if Observer is None:
+        raise SystemExit("常駐モードには watchdog が必要です: pip install watchdog")
+
+    observer = Observer()
+    collectors = []
+    stores = [open_state_store(w) for w in watchers]
+    dispatchers = [NotificationDispatcher(w) for w in watchers]
     for w in watchers:
-        old = load_state(w['state_file'])
-        new = scan_folder(w['watch_dir'])
-        added, updated = detect_changes(old, new)
+        collector = ChangeCollector(w['watch_dir'])
+        observer.schedule(collector, w['watch_dir'], recursive=True)
+        collectors.append(collector)
+    observer.start()
+    log(f"watching {len(watchers)} folder(s)")
+
+    # 停止中の変更を拾うため、監視開始後に一度だけ全走査する
+    states = reconcile_all(watchers, stores, [store.load() for store in stores], dispatchers, workers)
+    saved_pending = [set(store.load_retry()) for store in stores]
+    next_reconcile = time.monotonic() + reconcile_interval
 
-        if added or updated:
-            # 実行スクリプト＋変更リストを引数で渡す
-            cmd = w['notification']['command'] + added + updated
-            subprocess.run(cmd)
+    try:
+        while True:
+            time.sleep(debounce)
+
+            for i, (w, collector, store, dispatcher, state) in enumerate(zip(watchers, collectors, stores, dispatchers, states)):
+                changed, deleted = collector.drain()
+                if changed or deleted:
+                    added, updated, touched, removed = apply_changes(
+                        w['watch_dir'],
+                        state,
+                        changed,
+                        deleted,
+                        w.get('content_hash', False),
+                        w.get('hash_workers', DEFAULT_HASH_WORKERS),
+                    )
+                    if added or updated:
+                        log(f"{w['name']}: added={len(added)} updated={len(updated)}")
+                        dispatcher.submit(added + updated)
+                    if removed:
+                        log(f"{w['name']}: deleted={len(removed)}")
+                    if touched or removed:
+                        store.save(state, touched, removed)
+
+                # 通知の完了・失敗を記録する（失敗分は次の全走査で再通知する）
+                pending = dispatcher.pending()
+                if pending != saved_pending[i]:
+                    store.save_retry(pending)
+                    saved_pending[i] = pending
+
+            if time.monotonic() >= next_reconcile:
+                log("reconcile scan")
+                states = reconcile_all(watchers, stores, states, dispatchers, workers)
+                saved_pending = [set(store.load_retry()) for store in stores]
+                next_reconcile = time.monotonic() + reconcile_interval
+    except KeyboardInterrupt:
+        log("stopping...")
+    finally:
+        observer.stop()
+        observer.join()
+        for store, dispatcher in zip(stores, dispatchers):
+            # 通知中のものは retry に残っているので待たずに終了する
+            dispatcher.executor.shutdown(wait=False, cancel_futures=True)
+            store.close()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="フォルダ監視ツール")
+    parser.add_argument("--daemon", action="store_true", help="常駐してファイル変更イベントを監視する")
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=DEFAULT_DEBOUNCE,
+        help=f"常駐モードでイベントをまとめて処理する間隔（秒、既定: {DEFAULT_DEBOUNCE}）",
+    )
+    parser.add_argument(
+        "--reconcile-interval",
+        type=float,
+        default=DEFAULT_RECONCILE_INTERVAL,
+        help=f"常駐モードで全走査を行う間隔（秒、既定: {DEFAULT_RECONCILE_INTERVAL}）",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_SCAN_WORKERS,
+        help=f"監視フォルダを並列に走査する数（既定: {DEFAULT_SCAN_WORKERS}）",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    # 設定ファイル読み込み
+    watchers = load_watchers()
 
-        # 新しい状態を保存
-        save_state(w['state_file'], new)
+    if args.daemon:
+        run_daemon(watchers, args.workers, debounce=args.debounce, reconcile_interval=args.reconcile_interval)
+    else:
+        run_once(watchers, args.workers)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# watch_folder.py は src で実行する前提で state_store を import しているため、src を import パスに加える
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
@@ -0,0 +1,86 @@
+import os
+
+from watch_folder import ROOT_KEY, detect_changes, scan_folder
+
+FULL_SCAN_EVERY = 3
+OLD_MTIME_NS = 1_000_000_000 * 1_600_000_000
+
+
+def _write(path, text):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def _age_dirs(folder):
+    """フォルダの更新時刻を過去に戻し、以降の追加・削除で必ず変わるようにする"""
+    for dirpath, _, _ in os.walk(folder):
+        os.utime(dirpath, ns=(OLD_MTIME_NS, OLD_MTIME_NS))
+
+
+def _scan(folder, old):
+    """prune_unchanged_dirs を有効にした走査で、(new, added, updated, deleted) を返す"""
+    new = scan_folder(folder, old, FULL_SCAN_EVERY)
+    return (new, *detect_changes(old, new))
+
+
+def test_added_and_deleted_files_are_detected_at_once(tmp_path):
+    folder = str(tmp_path)
+    os.mkdir(tmp_path / 'sub')
+    _write(tmp_path / 'sub' / 'a.log', 'a')
+    _age_dirs(folder)
+    state = scan_folder(folder, {}, FULL_SCAN_EVERY)
+
+    # 追加・削除・名前変更はフォルダの更新時刻を変えるので、次の走査で検知される
+    _write(tmp_path / 'sub' / 'b.log', 'b')
+    state, added, updated, deleted = _scan(folder, state)
+    assert (added, updated, deleted) == ([os.path.join('sub', 'b.log')], [], [])
+
+    _age_dirs(folder)
+    state = scan_folder(folder, state, FULL_SCAN_EVERY)
+    os.rename(tmp_path / 'sub' / 'a.log', tmp_path / 'sub' / 'c.log')
+    state, added, updated, deleted = _scan(folder, state)
+    assert (added, updated, deleted) == ([os.path.join('sub', 'c.log')], [], [os.path.join('sub', 'a.log')])
+
+
+def test_in_place_rewrite_is_detected_by_the_periodic_full_scan(tmp_path):
+    folder = str(tmp_path)
+    os.mkdir(tmp_path / 'sub')
+    target = tmp_path / 'sub' / 'a.log'
+    _write(target, 'a')
+    _age_dirs(folder)
+    state = scan_folder(folder, {}, FULL_SCAN_EVERY)
+    key = os.path.join('sub', 'a.log')
+
+    # 上書きではフォルダの更新時刻が変わらないため、一覧の読み込みを省略した走査では見逃す
+    _write(target, 'rewritten')
+    assert os.stat(tmp_path / 'sub').st_mtime_ns == OLD_MTIME_NS
+    for pruned in range(1, FULL_SCAN_EVERY):
+        state, added, updated, deleted = _scan(folder, state)
+        assert (added, updated, deleted) == ([], [], [])
+        assert state[key].size == 1
+        assert state['sub' + os.sep].pruned == pruned
+        assert state[ROOT_KEY].pruned == pruned
+
+    # 省略が FULL_SCAN_EVERY - 1 回続いたフォルダは一覧を読み直し、上書きを検知する
+    state, added, updated, deleted = _scan(folder, state)
+    assert (added, updated, deleted) == ([], [key], [])
+    assert state[key].size == len('rewritten')
+    assert state['sub' + os.sep].pruned is None
+
+    # 読み直した後は再び省略する
+    state, added, updated, deleted = _scan(folder, state)
+    assert state['sub' + os.sep].pruned == 1
+
+
+def test_without_old_state_every_directory_is_listed(tmp_path):
+    folder = str(tmp_path)
+    os.mkdir(tmp_path / 'sub')
+    _write(tmp_path / 'sub' / 'a.log', 'a')
+    _age_dirs(folder)
+    state = scan_folder(folder)
+
+    # prune_unchanged_dirs が無効（old を渡さない）なら上書きもすぐに検知する
+    _write(tmp_path / 'sub' / 'a.log', 'rewritten')
+    new = scan_folder(folder)
+    assert detect_changes(state, new) == ([], [os.path.join('sub', 'a.log')], [])
+    assert all(v.pruned is None for v in new.values())
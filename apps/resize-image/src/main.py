@@ -1,16 +1,639 @@
 import os
+import json
+import math
+import struct
+import threading
+import time
+import warnings
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import dataclass
 from PIL import Image
 import flet as ft
 
-def resize_image(img_path, output_path, resize_mode, percent=None, width=None, height=None):
-    img = Image.open(img_path)
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".gif", ".tif", ".tiff")
+
+# 出力フォルダに置く処理済み画像の記録（差分リサイズ用）
+MANIFEST_NAME = ".resize_manifest.json"
+
+QUALITY_MODES = {
+    "高画質": "quality",
+    "高速": "fast",
+}
+
+OUTPUT_FORMATS = {
+    "元の形式": None,
+    "JPEG": "JPEG",
+    "PNG": "PNG",
+    "WebP": "WEBP",
+}
+
+FORMAT_EXTENSIONS = {"JPEG": ".jpg", "PNG": ".png", "WEBP": ".webp"}
+
+DEFAULT_ENCODE_OPTIONS = {
+    "format": None,
+    "quality": 85,
+    "progressive": False,
+    "optimize": False,
+    "compress_level": 6,
+}
+
+# fast モードで LANCZOS 前に整数倍縮小 (reduce) を挟む目安
+REDUCING_GAP = 3.0
+
+# LANCZOS フィルタの参照範囲（縮小倍率 1 あたりの行数）
+LANCZOS_SUPPORT = 3
+
+# JPEG の縮小デコード（DCT スケーリング）で選べる最大の縮小率
+MAX_DRAFT_SCALE = 8
+
+# 帯ごとに書き出す PNG のカラータイプ
+PNG_COLOR_TYPES = {"L": 0, "RGB": 2, "RGBA": 6}
+
+_open_lock = threading.Lock()
+
+
+@contextmanager
+def _timed(timings, stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - start
+
+
+def target_size(img_size, resize_mode, percent=None, width=None, height=None):
     if resize_mode == "percent":
-        w, h = img.size
-        new_size = (int(w * percent / 100), int(h * percent / 100))
+        w, h = img_size
+        return (int(w * percent / 100), int(h * percent / 100))
+    return (width, height)
+
+
+def resize_loaded(img, new_size, quality_mode="quality"):
+    if quality_mode == "fast":
+        # reduce で粗く縮小してから LANCZOS で正確なサイズに仕上げる
+        return img.resize(new_size, Image.LANCZOS, reducing_gap=REDUCING_GAP)
+    return img.resize(new_size, Image.LANCZOS)
+
+
+def open_image(img_path, memory_limit_mb=None):
+    if memory_limit_mb is None:
+        return Image.open(img_path)
+    # 分割処理ではメモリ上限で制御するため、巨大画像の安全チェックを外して開く
+    with _open_lock:
+        max_pixels = Image.MAX_IMAGE_PIXELS
+        Image.MAX_IMAGE_PIXELS = None
+        try:
+            return Image.open(img_path)
+        finally:
+            Image.MAX_IMAGE_PIXELS = max_pixels
+
+
+def _bytes_per_pixel(mode):
+    # Pillow は 3バンド画像も 1画素 4バイトで保持する
+    return 1 if mode in ("1", "L", "P") else 4
+
+
+def _image_bytes(size, mode):
+    return size[0] * size[1] * _bytes_per_pixel(mode)
+
+
+@dataclass(frozen=True)
+class RawLayout:
+    """帯読み込みできる非圧縮画像の画素の配置"""
+
+    mode: str  # 読み込んだ帯の画像モード
+    rawmode: str  # ファイル内の画素の並び
+    size: tuple
+    stride: int  # ファイル内の 1 行のバイト数（パディング込み）
+    strip_offsets: tuple  # ストリップごとの先頭オフセット（ファイル上の行順）
+    rows_per_strip: int
+    bottom_up: bool = False
+
+
+def _bmp_layout(img_path):
+    # 24 / 32bit の非圧縮 (BI_RGB) BMP のみ
+    with open(img_path, "rb") as f:
+        head = f.read(34)
+    if len(head) < 34 or head[:2] != b"BM":
+        return None
+    data_offset, header_size = struct.unpack_from("<II", head, 10)
+    if header_size < 40:
+        return None
+    w, h, _, bits, compression = struct.unpack_from("<iiHHI", head, 18)
+    if compression != 0 or bits not in (24, 32):
+        return None
+    stride = (w * bits + 31) // 32 * 4
+    rawmode = "BGR" if bits == 24 else "BGRX"
+    # 高さが正なら下の行から格納されている
+    return RawLayout("RGB", rawmode, (w, abs(h)), stride, (data_offset,), abs(h), bottom_up=h > 0)
+
+
+def _tiff_layout(img):
+    # 非圧縮・ストリップ形式・8bit のグレー / RGB / RGBA のみ
+    tags = img.tag_v2
+    if tags.get(259, 1) != 1 or tags.get(284, 1) != 1 or 322 in tags:
+        return None
+    if img.mode not in ("L", "RGB", "RGBA") or tags.get(262) not in (1, 2):
+        return None
+    bits = tags.get(258, 1)
+    if any(b != 8 for b in (bits if isinstance(bits, tuple) else (bits,))):
+        return None
+    if img.mode == "RGBA" and tags.get(338) not in (2, (2,)):
+        return None
+    offsets = tags.get(273)
+    if offsets is None:
+        return None
+    w, h = img.size
+    offsets = offsets if isinstance(offsets, tuple) else (offsets,)
+    return RawLayout(img.mode, img.mode, (w, h), w * len(img.mode), offsets, min(tags.get(278, h), h))
+
+
+def raw_layout(img, img_path):
+    """帯読み込みできる形式なら RawLayout を返す。未対応の形式は None"""
+    if img.format == "BMP":
+        layout = _bmp_layout(img_path)
+    elif img.format == "TIFF":
+        layout = _tiff_layout(img)
+    else:
+        return None
+    return layout if layout is not None and layout.size == img.size else None
+
+
+def read_rows(f, layout, y0, y1):
+    """y0〜y1 行（上から数えた行番号）だけをファイルから読み込んで画像にする"""
+    w, h = layout.size
+    fy0, fy1 = (h - y1, h - y0) if layout.bottom_up else (y0, y1)
+    rows = layout.rows_per_strip
+    chunks = []
+    for strip in range(fy0 // rows, (fy1 - 1) // rows + 1):
+        first = strip * rows
+        a, b = max(fy0, first), min(fy1, first + rows)
+        f.seek(layout.strip_offsets[strip] + (a - first) * layout.stride)
+        chunks.append(f.read((b - a) * layout.stride))
+    data = b"".join(chunks)
+    if len(data) < (fy1 - fy0) * layout.stride:
+        raise ValueError(f"{os.path.basename(f.name)}: 画像データが途中で切れています")
+    orientation = -1 if layout.bottom_up else 1
+    return Image.frombytes(layout.mode, (w, y1 - y0), data, "raw", layout.rawmode, layout.stride, orientation)
+
+
+def _draft_scale(size, new_size, mode, limit):
+    """JPEG を何分の 1 で縮小デコードするか。出力サイズを下回らない範囲で最大にし、
+    それでも limit を超える場合は出力サイズより小さくなっても上限に収まるまで縮小する"""
+    w, h = size
+    ratio = min(w // max(new_size[0], 1), h // max(new_size[1], 1))
+    scale = 1
+    while scale < MAX_DRAFT_SCALE and (scale * 2 <= ratio or _image_bytes((-(-w // scale), -(-h // scale)), mode) > limit):
+        scale *= 2
+    return scale
+
+
+def limit_decode(img, img_path, new_size, memory_limit_mb, timings=None):
+    """memory_limit_mb に収まるようデコード方法を決め、(画像, RawLayout または None) を返す
+
+    全体を読み込める場合は RawLayout が None（JPEG は必要なら縮小デコードを設定する）。
+    全体を読み込めない場合は帯読み込み用の RawLayout を返す。帯読み込みに未対応の形式
+    （PNG・GIF など）は警告を出して全体を読み込み、整数倍縮小（reduce）した画像を返す。
+    """
+    limit = memory_limit_mb * 1024 * 1024
+    if _image_bytes(img.size, img.mode) <= limit:
+        return img, None
+    if img.format == "JPEG":
+        scale = _draft_scale(img.size, new_size, img.mode, limit)
+        img.draft(img.mode, (img.size[0] // scale, img.size[1] // scale))
+        if _image_bytes(img.size, img.mode) <= limit:
+            return img, None
+
+    layout = raw_layout(img, img_path)
+    if layout is not None:
+        return img, layout
+
+    # 読み込み中は上限を超えるが、すぐに出力サイズ付近まで縮小して元の画素を手放す
+    factor = max(1, min(img.size[0] // max(new_size[0], 1), img.size[1] // max(new_size[1], 1)))
+    warnings.warn(
+        f"{os.path.basename(img_path)}: メモリ上限 {memory_limit_mb}MB を超えていますが、"
+        f"{img.format} は分割処理に未対応のため全体を読み込んで縮小します",
+        stacklevel=2,
+    )
+    with _timed(timings, "decode"):
+        img.load()
+    # パレット・2値・16bit の画像は reduce できない（resize も NEAREST になるため中間画像は小さい）
+    if factor > 1 and img.mode not in ("1", "P", "I;16"):
+        with _timed(timings, "resize"):
+            img = img.reduce(factor)
+    return img, None
+
+
+def iter_resized_strips(img_path, layout, new_size, memory_limit_mb, reserved=0):
+    """元画像を帯ごとに読み込んでリサイズし、(出力の帯, 出力上の先頭行) を上から順に返す
+
+    読み込んだ帯とリサイズ途中の画像の合計が memory_limit_mb から reserved バイトを
+    除いた量に収まるよう、1回に処理する行数を決める。
+    """
+    w, h = layout.size
+    out_w, out_h = new_size
+    bpp = _bytes_per_pixel(layout.mode)
+    scale_y = h / out_h
+    margin = math.ceil(LANCZOS_SUPPORT * max(scale_y, 1)) + 1
+
+    # 元画像 1 行あたり: ファイルから読んだバイト列 + 帯の画像 + 横方向に縮小した途中の画像
+    per_row = layout.stride + (w + out_w) * bpp
+    band_rows = (memory_limit_mb * 1024 * 1024 - reserved) // per_row - 2 * margin
+    out_rows = int(band_rows / scale_y)
+    if out_rows < 1:
+        raise ValueError(f"{os.path.basename(img_path)}: メモリ上限 {memory_limit_mb}MB が小さすぎて分割処理できません")
+
+    with open(img_path, "rb") as f:
+        for oy0 in range(0, out_h, out_rows):
+            oy1 = min(out_h, oy0 + out_rows)
+            sy0 = oy0 * scale_y
+            sy1 = oy1 * scale_y
+            top = max(0, math.floor(sy0) - margin)
+            band = read_rows(f, layout, top, min(h, math.ceil(sy1) + margin))
+            part = band.resize((out_w, oy1 - oy0), Image.LANCZOS, box=(0, sy0 - top, w, sy1 - top))
+            band.close()
+            yield part, oy0
+
+
+def resize_strips(img_path, layout, new_size, memory_limit_mb, timings=None):
+    """帯読み込みでリサイズした画像を返す。出力画像の分もメモリ上限に含める"""
+    out = None
+    with _timed(timings, "resize"):
+        reserved = _image_bytes(new_size, layout.mode)
+        for part, y in iter_resized_strips(img_path, layout, new_size, memory_limit_mb, reserved):
+            if out is None:
+                out = Image.new(layout.mode, new_size)
+            out.paste(part, (0, y))
+    return out
+
+
+class _StripWriter:
+    """出力画像を帯ごとにファイルへ書き出す（失敗時は書きかけのファイルを消す）"""
+
+    def __init__(self, path):
+        self.path = path
+        self._f = open(path, "wb")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.finish()
+        finally:
+            self._f.close()
+            if exc_type is not None:
+                os.remove(self.path)
+
+    def finish(self):
+        pass
+
+
+class PngStripWriter(_StripWriter):
+    """PNG を帯ごとに圧縮して書き出す。行フィルタは使わない（各行 None フィルタ）"""
+
+    def __init__(self, path, size, mode, compress_level=6):
+        super().__init__(path)
+        self._row_bytes = size[0] * len(mode)
+        self._z = zlib.compressobj(compress_level)
+        self._f.write(b"\x89PNG\r\n\x1a\n")
+        self._chunk(b"IHDR", struct.pack(">IIBBBBB", size[0], size[1], 8, PNG_COLOR_TYPES[mode], 0, 0, 0))
+
+    def _chunk(self, kind, data):
+        if kind == b"IDAT" and not data:
+            return
+        self._f.write(struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data)))
+
+    def write(self, part, y):
+        raw = part.tobytes()
+        n = self._row_bytes
+        self._chunk(b"IDAT", self._z.compress(b"".join(b"\x00" + raw[i : i + n] for i in range(0, len(raw), n))))
+
+    def finish(self):
+        self._chunk(b"IDAT", self._z.flush())
+        self._chunk(b"IEND", b"")
+
+
+class BmpStripWriter(_StripWriter):
+    """24bit BMP を帯ごとに書き出す（下の行から格納するため書き込み位置を計算する）"""
+
+    def __init__(self, path, size):
+        super().__init__(path)
+        w, h = size
+        self._height = h
+        self._stride = (w * 3 + 3) // 4 * 4
+        self._f.write(b"BM" + struct.pack("<IHHI", 54 + self._stride * h, 0, 0, 54))
+        self._f.write(struct.pack("<IiiHHIIiiII", 40, w, h, 1, 24, 0, self._stride * h, 0, 0, 0, 0))
+
+    def write(self, part, y):
+        self._f.seek(54 + (self._height - y - part.size[1]) * self._stride)
+        self._f.write(part.tobytes("raw", "BGR", self._stride, -1))
+
+
+def open_strip_writer(output_path, size, mode, encode_options=None):
+    """帯ごとに書き出せる出力形式ならライターを返す。未対応なら None（出力画像全体をメモリ上で組み立てる）"""
+    options = {**DEFAULT_ENCODE_OPTIONS, **(encode_options or {})}
+    fmt = output_format(output_path, options)
+    if fmt == "PNG" and mode in PNG_COLOR_TYPES:
+        return PngStripWriter(output_path, size, mode, options["compress_level"])
+    if fmt == "BMP" and mode == "RGB":
+        return BmpStripWriter(output_path, size)
+    return None
+
+
+def save_strips(img_path, layout, new_size, output_path, memory_limit_mb, encode_options=None, timings=None):
+    """帯読み込みでリサイズして保存する。PNG / BMP は帯ごとに書き出し、それ以外は出力画像をメモリ上で組み立てる"""
+    writer = open_strip_writer(output_path, new_size, layout.mode, encode_options)
+    if writer is None:
+        resized_img = resize_strips(img_path, layout, new_size, memory_limit_mb, timings)
+        with _timed(timings, "encode"):
+            save_image(resized_img, output_path, encode_options)
+        return
+    # デコード・リサイズ・エンコードが帯ごとに交互に行われるため、まとめて resize として計測する
+    with _timed(timings, "resize"), writer:
+        for part, y in iter_resized_strips(img_path, layout, new_size, memory_limit_mb):
+            writer.write(part, y)
+
+
+def decode_resized(img, new_size, quality_mode="quality", timings=None):
+    with _timed(timings, "decode"):
+        if quality_mode == "fast":
+            # JPEG は DCT スケーリングで縮小デコードする（JPEG 以外は何もしない）
+            img.draft(img.mode, new_size)
+        img.load()
+    with _timed(timings, "resize"):
+        return resize_loaded(img, new_size, quality_mode)
+
+
+def output_path_for(output_path, encode_options=None):
+    """出力形式を変換する場合は拡張子を差し替える"""
+    fmt = (encode_options or {}).get("format")
+    if fmt is None:
+        return output_path
+    return os.path.splitext(output_path)[0] + FORMAT_EXTENSIONS[fmt]
+
+
+def output_format(output_path, options):
+    return options["format"] or Image.registered_extensions().get(os.path.splitext(output_path)[1].lower())
+
+
+def save_image(img, output_path, encode_options=None):
+    options = {**DEFAULT_ENCODE_OPTIONS, **(encode_options or {})}
+    fmt = output_format(output_path, options)
+
+    if fmt == "JPEG":
+        if img.mode not in ("RGB", "L", "CMYK"):
+            img = img.convert("RGB")
+        params = {"quality": options["quality"], "progressive": options["progressive"], "optimize": options["optimize"]}
+    elif fmt == "WEBP":
+        params = {"quality": options["quality"]}
+    elif fmt == "PNG":
+        params = {"compress_level": options["compress_level"], "optimize": options["optimize"]}
     else:
-        new_size = (width, height)
-    resized_img = img.resize(new_size, Image.LANCZOS)
-    resized_img.save(output_path)
+        params = {}
+    img.save(output_path, format=fmt, **params)
+
+
+def resize_image(img_path, output_path, resize_mode, percent=None, width=None, height=None, quality_mode="quality", memory_limit_mb=None, encode_options=None, timings=None):
+    img = open_image(img_path, memory_limit_mb)
+    new_size = target_size(img.size, resize_mode, percent=percent, width=width, height=height)
+    layout = None
+    if memory_limit_mb is not None:
+        img, layout = limit_decode(img, img_path, new_size, memory_limit_mb, timings)
+    if layout is not None:
+        save_strips(img_path, layout, new_size, output_path, memory_limit_mb, encode_options, timings)
+        return
+    resized_img = decode_resized(img, new_size, quality_mode, timings)
+    with _timed(timings, "encode"):
+        save_image(resized_img, output_path, encode_options)
+
+
+def resize_image_multi(img_path, outputs, quality_mode="quality", memory_limit_mb=None, encode_options=None, timings=None):
+    """1回のデコードで複数サイズを出力する。outputs は (spec, output_path) のリスト"""
+    img = open_image(img_path, memory_limit_mb)
+    sized = [(target_size(img.size, **spec), output_path) for spec, output_path in outputs]
+    # 大きいサイズから順に、直前の縮小結果をさらに縮小していく
+    sized.sort(key=lambda item: item[0][0] * item[0][1], reverse=True)
+
+    layout = None
+    if memory_limit_mb is not None:
+        img, layout = limit_decode(img, img_path, sized[0][0], memory_limit_mb, timings)
+    if layout is None:
+        current = decode_resized(img, sized[0][0], quality_mode, timings)
+    elif _image_bytes(sized[0][0], layout.mode) * 2 <= memory_limit_mb * 1024 * 1024:
+        current = resize_strips(img_path, layout, sized[0][0], memory_limit_mb, timings)
+    else:
+        # 最大サイズの出力を保持すると上限を圧迫するため、サイズごとに元画像を読み直して書き出す
+        for new_size, output_path in sized:
+            save_strips(img_path, layout, new_size, output_path, memory_limit_mb, encode_options, timings)
+        return
+    for new_size, output_path in sized:
+        if current.size != new_size:
+            with _timed(timings, "resize"):
+                current = resize_loaded(current, new_size, quality_mode)
+        with _timed(timings, "encode"):
+            save_image(current, output_path, encode_options)
+
+
+def parse_size_specs(text):
+    """'1600x1200, 800x600, 25%' のような指定をリサイズ設定のリストに変換する"""
+    specs = []
+    for token in text.replace("、", ",").split(","):
+        token = token.strip().lower()
+        if not token:
+            continue
+        if token.endswith("%"):
+            specs.append({"resize_mode": "percent", "percent": int(token[:-1])})
+        else:
+            w, h = token.replace("×", "x").split("x")
+            specs.append({"resize_mode": "size", "width": int(w), "height": int(h)})
+    if not specs:
+        raise ValueError("サイズ一覧が空です")
+    return specs
+
+
+def spec_label(spec):
+    if spec["resize_mode"] == "percent":
+        return f"{spec['percent']}pct"
+    return f"{spec['width']}x{spec['height']}"
+
+
+def iter_images(input_folder, recursive=True, exclude=None):
+    """画像ファイルの (絶対パス, 入力フォルダからの相対パス) を順次返す"""
+    exclude = os.path.abspath(exclude) if exclude else None
+    stack = [os.path.abspath(input_folder)]
+    root = stack[0]
+    while stack:
+        folder = stack.pop()
+        with os.scandir(folder) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive and entry.path != exclude:
+                        stack.append(entry.path)
+                elif entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                    yield entry.path, os.path.relpath(entry.path, root)
+
+
+def load_manifest(output_folder):
+    path = os.path.join(output_folder, MANIFEST_NAME)
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            # 壊れている場合は全件処理し直す
+            return {}
+    return {}
+
+
+def save_manifest(output_folder, manifest):
+    path = os.path.join(output_folder, MANIFEST_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def source_signature(img_path):
+    st = os.stat(img_path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def is_up_to_date(entry, output_paths, signature, params):
+    """前回と同じ元画像・同じ設定で出力済みなら True"""
+    if entry is None or not all(os.path.exists(p) for p in output_paths):
+        return False
+    return (
+        entry.get("size") == signature["size"]
+        and entry.get("mtime_ns") == signature["mtime_ns"]
+        and entry.get("params") == params
+        and entry.get("outputs") == output_paths
+    )
+
+
+def _process_image(input_path, output_paths, specs, multi_size, quality_mode, memory_limit_mb, encode_options):
+    timings = {}
+    for output_path in output_paths:
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    if multi_size:
+        resize_image_multi(
+            input_path,
+            list(zip(specs, output_paths)),
+            quality_mode=quality_mode,
+            memory_limit_mb=memory_limit_mb,
+            encode_options=encode_options,
+            timings=timings,
+        )
+    else:
+        resize_image(
+            input_path,
+            output_paths[0],
+            quality_mode=quality_mode,
+            memory_limit_mb=memory_limit_mb,
+            encode_options=encode_options,
+            timings=timings,
+            **specs[0],
+        )
+    return timings
+
+
+def iter_resize_folder(
+    input_folder,
+    output_folder,
+    specs,
+    quality_mode="quality",
+    recursive=True,
+    multi_size=False,
+    memory_limit_mb=None,
+    encode_options=None,
+    workers=1,
+    stats=None,
+):
+    """フォルダ内の画像を順次リサイズし、画像ごとに (入力パス, スキップしたか) を返すジェネレータ
+
+    multi_size=True の場合は出力フォルダ直下にサイズごとのサブフォルダを作成する。
+    memory_limit_mb を指定すると大きな画像を帯ごとに分割して処理する。
+    workers が 2 以上の場合は複数画像のデコード・リサイズ・エンコードを並列に行い、
+    完了した順に結果を返す。stats を渡すと工程ごとの処理時間（秒）を加算する。
+    """
+    encode_options = {**DEFAULT_ENCODE_OPTIONS, **(encode_options or {})}
+    params = {
+        "specs": specs,
+        "quality_mode": quality_mode,
+        "resample": "LANCZOS",
+        "memory_limit_mb": memory_limit_mb,
+        "encode": encode_options,
+    }
+    manifest = load_manifest(output_folder)
+    pending = {}
+
+    def collect(futures):
+        for future in futures:
+            input_path, signature, output_paths = pending.pop(future)
+            timings = future.result()
+            if stats is not None:
+                for stage, seconds in timings.items():
+                    stats[stage] = stats.get(stage, 0.0) + seconds
+            manifest[input_path] = {**signature, "params": params, "outputs": output_paths}
+            yield input_path, False
+
+    started = time.perf_counter()
+    executor = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        for input_path, rel_path in iter_images(input_folder, recursive=recursive, exclude=output_folder):
+            if multi_size:
+                output_paths = [os.path.join(output_folder, spec_label(spec), rel_path) for spec in specs]
+            else:
+                output_paths = [os.path.join(output_folder, rel_path)]
+            output_paths = [output_path_for(p, encode_options) for p in output_paths]
+
+            signature = source_signature(input_path)
+            if is_up_to_date(manifest.get(input_path), output_paths, signature, params):
+                yield input_path, True
+                continue
+
+            future = executor.submit(
+                _process_image, input_path, output_paths, specs, multi_size, quality_mode, memory_limit_mb, encode_options
+            )
+            pending[future] = (input_path, signature, output_paths)
+
+            # 走査を先行させすぎないよう、処理中の画像数を workers の 2 倍までに抑える
+            if len(pending) >= max(1, workers) * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                yield from collect(done)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            yield from collect(done)
+    finally:
+        # 失敗・中断時は未着手の画像を取り消す
+        executor.shutdown(wait=True, cancel_futures=True)
+        if stats is not None:
+            stats["wall"] = stats.get("wall", 0.0) + time.perf_counter() - started
+        # 途中で失敗しても処理済み分は記録しておく
+        save_manifest(output_folder, manifest)
+
+
+def resize_folder(input_folder, output_folder, specs, **kwargs):
+    """フォルダ内の画像を一括リサイズする。変更のない画像はスキップし (hits, misses) を返す"""
+    hits = misses = 0
+    for _, skipped in iter_resize_folder(input_folder, output_folder, specs, **kwargs):
+        if skipped:
+            hits += 1
+        else:
+            misses += 1
+    return hits, misses
+
+
+def format_stats(stats):
+    return (
+        f"デコード {stats.get('decode', 0.0):.1f}秒 / リサイズ {stats.get('resize', 0.0):.1f}秒 / "
+        f"エンコード {stats.get('encode', 0.0):.1f}秒（経過 {stats.get('wall', 0.0):.1f}秒）"
+    )
 
 def main(page: ft.Page):
     page.title = "画像リサイズツール"
@@ -29,27 +652,47 @@ def main(page: ft.Page):
         label="リサイズ方法",
         options=[
             ft.dropdown.Option("パーセント指定"),
-            ft.dropdown.Option("幅と高さを指定")
+            ft.dropdown.Option("幅と高さを指定"),
+            ft.dropdown.Option("複数サイズ指定")
         ],
         value="パーセント指定",
         on_change=lambda e: update_input_fields()
     )
 
+    quality_mode_dropdown = ft.Dropdown(
+        label="画質モード",
+        options=[ft.dropdown.Option(label) for label in QUALITY_MODES],
+        value="高画質",
+    )
+
+    output_format_dropdown = ft.Dropdown(
+        label="出力形式",
+        options=[ft.dropdown.Option(label) for label in OUTPUT_FORMATS],
+        value="元の形式",
+    )
+    encode_quality_field = ft.TextField(label="品質（JPEG / WebP、1〜100）", value="85", keyboard_type=ft.KeyboardType.NUMBER, text_align=ft.TextAlign.CENTER)
+    compress_level_field = ft.TextField(label="PNG 圧縮レベル（0〜9）", value="6", keyboard_type=ft.KeyboardType.NUMBER, text_align=ft.TextAlign.CENTER)
+    progressive_checkbox = ft.Checkbox(label="プログレッシブ JPEG", value=False)
+    optimize_checkbox = ft.Checkbox(label="ファイルサイズを最適化（エンコードが遅くなります）", value=False)
+    workers_field = ft.TextField(label="並列数", value=str(os.cpu_count() or 1), keyboard_type=ft.KeyboardType.NUMBER, text_align=ft.TextAlign.CENTER)
+
     percent_field = ft.TextField(label="パーセント（例：50）", keyboard_type=ft.KeyboardType.NUMBER, visible=True, text_align=ft.TextAlign.CENTER)
     width_field = ft.TextField(label="幅", keyboard_type=ft.KeyboardType.NUMBER, visible=False, text_align=ft.TextAlign.CENTER)
     height_field = ft.TextField(label="高さ", keyboard_type=ft.KeyboardType.NUMBER, visible=False, text_align=ft.TextAlign.CENTER)
+    sizes_field = ft.TextField(label="サイズ一覧（例：1600x1200, 800x600, 25%）", visible=False, text_align=ft.TextAlign.CENTER)
+    recursive_checkbox = ft.Checkbox(label="サブフォルダも処理する", value=True)
+    tiled_checkbox = ft.Checkbox(label="大きな画像を分割処理する", value=False, on_change=lambda e: update_input_fields())
+    memory_limit_field = ft.TextField(label="メモリ上限（MB）", value="256", keyboard_type=ft.KeyboardType.NUMBER, visible=False, text_align=ft.TextAlign.CENTER)
 
     result_text = ft.Text()
 
     def update_input_fields():
-        if resize_mode_dropdown.value == "パーセント指定":
-            percent_field.visible = True
-            width_field.visible = False
-            height_field.visible = False
-        else:
-            percent_field.visible = False
-            width_field.visible = True
-            height_field.visible = True
+        mode = resize_mode_dropdown.value
+        percent_field.visible = mode == "パーセント指定"
+        width_field.visible = mode == "幅と高さを指定"
+        height_field.visible = mode == "幅と高さを指定"
+        sizes_field.visible = mode == "複数サイズ指定"
+        memory_limit_field.visible = tiled_checkbox.value
         page.update()
 
     def pick_input_folder(e):
@@ -72,6 +715,7 @@ def main(page: ft.Page):
         input_folder = input_folder_field.value
         output_folder = output_folder_field.value
         mode = resize_mode_dropdown.value
+        quality_mode = QUALITY_MODES[quality_mode_dropdown.value]
 
         if not input_folder or not output_folder:
             result_text.value = "入力・出力フォルダを選択してください。"
@@ -80,20 +724,48 @@ def main(page: ft.Page):
             return
 
         try:
-            for filename in os.listdir(input_folder):
-                if filename.lower().endswith((".jpg", ".jpeg", ".png", ".bmp", ".gif")):
-                    input_path = os.path.join(input_folder, filename)
-                    output_path = os.path.join(output_folder, filename)
-
-                    if mode == "パーセント指定":
-                        percent = int(percent_field.value)
-                        resize_image(input_path, output_path, "percent", percent=percent)
-                    else:
-                        width = int(width_field.value)
-                        height = int(height_field.value)
-                        resize_image(input_path, output_path, "size", width=width, height=height)
-
-            result_text.value = "画像のリサイズが完了しました。"
+            if mode == "パーセント指定":
+                specs = [{"resize_mode": "percent", "percent": int(percent_field.value)}]
+            elif mode == "幅と高さを指定":
+                specs = [{"resize_mode": "size", "width": int(width_field.value), "height": int(height_field.value)}]
+            else:
+                specs = parse_size_specs(sizes_field.value or "")
+            memory_limit_mb = int(memory_limit_field.value) if tiled_checkbox.value else None
+            encode_options = {
+                "format": OUTPUT_FORMATS[output_format_dropdown.value],
+                "quality": int(encode_quality_field.value),
+                "progressive": progressive_checkbox.value,
+                "optimize": optimize_checkbox.value,
+                "compress_level": int(compress_level_field.value),
+            }
+            stats = {}
+
+            hits = misses = 0
+            results = iter_resize_folder(
+                input_folder,
+                output_folder,
+                specs,
+                quality_mode=quality_mode,
+                recursive=recursive_checkbox.value,
+                multi_size=mode == "複数サイズ指定",
+                memory_limit_mb=memory_limit_mb,
+                encode_options=encode_options,
+                workers=int(workers_field.value),
+                stats=stats,
+            )
+            for _, skipped in results:
+                if skipped:
+                    hits += 1
+                else:
+                    misses += 1
+                if (hits + misses) % 20 == 0:
+                    result_text.value = f"処理中... {hits + misses}件"
+                    result_text.color = None
+                    page.update()
+
+            result_text.value = (
+                f"画像のリサイズが完了しました。（処理: {misses}件 / スキップ: {hits}件）\n{format_stats(stats)}"
+            )
             result_text.color = ft.colors.GREEN
         except Exception as ex:
             result_text.value = f"エラー: {ex}"
@@ -119,6 +791,17 @@ def main(page: ft.Page):
             percent_field,
             width_field,
             height_field,
+            sizes_field,
+            quality_mode_dropdown,
+            recursive_checkbox,
+            tiled_checkbox,
+            memory_limit_field,
+            output_format_dropdown,
+            encode_quality_field,
+            compress_level_field,
+            progressive_checkbox,
+            optimize_checkbox,
+            workers_field,
 
             ft.ElevatedButton("画像をリサイズ", icon=ft.icons.IMAGE, on_click=run_resize),
             result_text
@@ -11,9 +11,49 @@ def main(argv=None) -> int:
     p.add_argument("--db", default="tdnet_xbrl.sqlite", help="SQLite DB file path")
     p.add_argument("--on-duplicate", choices=["skip", "replace"], default="skip")
 
+    p.add_argument(
+        "--commit",
+        choices=["filing", "stage"],
+        default="filing",
+        help="Commit once per filing (default) or after each stage so a failed ingest resumes where it stopped.",
+    )
+    p.add_argument("--commit-rows", type=int, help="Also commit every N facts (implies --commit stage).")
+
+    p.add_argument("--keep-raw-text", action="store_true", help="Also store each fact's original text in facts.raw_text.")
+
     p.add_argument("--stats", action="store_true", help="Show DB stats and exit (no ingestion).")
     p.add_argument("--by-filing", action="store_true", help="Show per-filing counts in --stats output.")
-    p.add_argument("--limit", type=int, default=20, help="Limit rows for --stats --by-filing (default: 20).")
+    p.add_argument("--limit", type=int, default=20, help="Limit rows for --stats --by-filing / --search (default: 20).")
+
+    p.add_argument("--search", help="Full-text search over non-numeric facts and exit.")
+    p.add_argument("--search-labels", help="Full-text search over concept labels and exit.")
+
+    p.add_argument(
+        "--rebuild-summary",
+        action="store_true",
+        help="Rebuild the primary_financials summary table from facts and exit.",
+    )
+
+    # Sharded storage: root/catalog.sqlite + root/filings_<year|month>.sqlite
+    p.add_argument("--shard-dir", help="Ingest into per-period shard DBs under this directory instead of --db.")
+    p.add_argument("--shard-by", choices=["year", "month"], default="year", help="Shard granularity (default: year).")
+    p.add_argument("--compact-shard", metavar="KEY", help="VACUUM the shard KEY (e.g. 2024) under --shard-dir, mark it read-only and exit.")
+
+    # Single-writer service: one process owns --db, others parse and send rows to it
+    p.add_argument(
+        "--serve",
+        nargs="?",
+        const=":47650",
+        metavar="HOST:PORT",
+        help="Run the writer service for --db on a loopback address (default 127.0.0.1:47650) and group-commit batches from parsers.",
+    )
+    p.add_argument(
+        "--writer",
+        nargs="?",
+        const=":47650",
+        metavar="HOST:PORT",
+        help="Send --zip / --watch ingests to a running writer service instead of writing --db directly.",
+    )
 
     # Watch folder mode
     p.add_argument("--watch", help="Watch a folder and ingest new ZIP files automatically.")
@@ -52,21 +92,127 @@ def main(argv=None) -> int:
 
         return 0
 
+    # --- search: pipeline not needed ---
+    if args.search or args.search_labels:
+        from tdnet_xbrl_ingestor.db.connect import connect
+        from tdnet_xbrl_ingestor.db.schema import ensure_schema
+        from tdnet_xbrl_ingestor.query.search import search_facts, search_labels
+
+        with connect(args.db) as con:
+            ensure_schema(con)
+            if args.search:
+                hits = search_facts(con, args.search, limit=args.limit)
+                print(f"[SEARCH] facts={len(hits)}")
+                for h in hits:
+                    period = h.instant_date or f"{h.start_date}..{h.end_date}"
+                    print(
+                        f"  filing_id={h.filing_id} zip_name={h.zip_name} name={h.name} "
+                        f"context={h.context_ref} period={period}"
+                    )
+                    print(f"    {h.snippet}")
+            if args.search_labels:
+                label_hits = search_labels(con, args.search_labels, limit=args.limit)
+                print(f"[SEARCH] labels={len(label_hits)}")
+                for l in label_hits:
+                    print(f"  {l.concept_name} lang={l.lang} label={l.label_text}")
+        return 0
+
+    # --- summary rebuild: pipeline not needed ---
+    if args.rebuild_summary:
+        from tdnet_xbrl_ingestor.db.connect import connect
+        from tdnet_xbrl_ingestor.db.schema import ensure_schema
+        from tdnet_xbrl_ingestor.db.summary import rebuild_primary_financials
+
+        with connect(args.db) as con:
+            ensure_schema(con)
+            rows = rebuild_primary_financials(con)
+        print(f"[OK] primary_financials rebuilt: rows={rows}")
+        return 0
+
+    # --- shard compaction: pipeline not needed ---
+    if args.compact_shard:
+        if not args.shard_dir:
+            p.error("--compact-shard requires --shard-dir")
+        from pathlib import Path
+
+        from tdnet_xbrl_ingestor.db.shards import ShardLayout, compact_shard
+
+        compact_shard(ShardLayout(Path(args.shard_dir), args.shard_by), args.compact_shard)
+        print(f"[OK] shard {args.compact_shard} compacted (read-only)")
+        return 0
+
+    # --- writer service: runs until interrupted ---
+    if args.serve:
+        from tdnet_xbrl_ingestor.ingest.writer import WriterService, parse_address
+
+        try:
+            address = parse_address(args.serve)
+        except ValueError as e:
+            p.error(str(e))
+        service = WriterService(args.db, address)
+        host, port = service.start()
+        print(f"[WRITER] serving {args.db} on {host}:{port}")
+        try:
+            service.serve_forever()
+        except KeyboardInterrupt:
+            print("[WRITER] stopping...")
+        return 0
+
+    writer_address = None
+    if args.writer:
+        from tdnet_xbrl_ingestor.ingest.writer import parse_address
+
+        try:
+            writer_address = parse_address(args.writer)
+        except ValueError as e:
+            p.error(str(e))
+
+    # The writer service commits per filing group; the watcher ingests with defaults
+    if (args.writer or args.watch) and (args.commit != "filing" or args.commit_rows):
+        p.error("--commit / --commit-rows are only supported for direct --zip ingests (with or without --shard-dir)")
+    if args.watch and args.keep_raw_text:
+        p.error("--keep-raw-text is not supported with --watch")
+
     # --- watch: zip not needed ---
     if args.watch:
         from tdnet_xbrl_ingestor.watch.watch_folder import watch_folder
 
-        watch_folder(args.watch, db_path=args.db, on_duplicate=args.on_duplicate)
+        watch_folder(args.watch, db_path=args.db, on_duplicate=args.on_duplicate, writer_address=writer_address)
         return 0
 
     # --- ingestion: zip required ---
     if not args.zip:
-        p.error("--zip is required unless --stats or --watch is specified")
+        p.error("--zip is required unless --stats, --search, --rebuild-summary, --compact-shard, --serve or --watch is specified")
 
     # Ingest only: import pipeline lazily
-    from tdnet_xbrl_ingestor.ingest.pipeline import run_pipeline
-
-    result = run_pipeline(zip_path=args.zip, db_path=args.db, on_duplicate=args.on_duplicate)
+    if writer_address is not None:
+        from tdnet_xbrl_ingestor.ingest.writer import WriterClient
+
+        with WriterClient(writer_address, db_path=args.db) as client:
+            result = client.ingest(args.zip, args.on_duplicate, keep_raw_text=args.keep_raw_text)
+    elif args.shard_dir:
+        from tdnet_xbrl_ingestor.ingest.sharded import run_sharded_pipeline
+
+        result = run_sharded_pipeline(
+            args.zip,
+            args.shard_dir,
+            on_duplicate=args.on_duplicate,
+            granularity=args.shard_by,
+            commit=args.commit,
+            commit_rows=args.commit_rows,
+            keep_raw_text=args.keep_raw_text,
+        )
+    else:
+        from tdnet_xbrl_ingestor.ingest.pipeline import run_pipeline
+
+        result = run_pipeline(
+            zip_path=args.zip,
+            db_path=args.db,
+            on_duplicate=args.on_duplicate,
+            commit=args.commit,
+            commit_rows=args.commit_rows,
+            keep_raw_text=args.keep_raw_text,
+        )
 
     print(
         f"[OK] filing_id={result.filing_id} facts={result.facts} contexts={result.contexts} "
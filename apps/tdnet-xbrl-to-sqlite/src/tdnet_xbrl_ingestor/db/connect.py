@@ -5,9 +5,13 @@ from contextlib import contextmanager
 from typing import Iterator
 
 
+# How long a writer waits for another process's write lock before "database is locked"
+DEFAULT_BUSY_TIMEOUT_SEC = 30.0
+
+
 @contextmanager
-def connect(db_path: str) -> Iterator[sqlite3.Connection]:
-    con = sqlite3.connect(db_path)
+def connect(db_path: str, *, busy_timeout: float = DEFAULT_BUSY_TIMEOUT_SEC) -> Iterator[sqlite3.Connection]:
+    con = sqlite3.connect(db_path, timeout=busy_timeout)
     try:
         con.row_factory = sqlite3.Row
         con.execute("PRAGMA foreign_keys = ON;")
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from typing import Iterable
+
+
+# Full-text indexes over non-numeric facts and labels.
+# The trigram tokenizer needs no word segmentation, so it works for Japanese text
+# (queries must be at least 3 characters). rowid = facts.id / labels.id.
+
+
+def ensure_fts(con: sqlite3.Connection) -> None:
+    existing = {
+        row[0]
+        for row in con.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('facts_fts', 'labels_fts')"
+        )
+    }
+
+    con.execute("CREATE VIRTUAL TABLE IF NOT EXISTS facts_fts USING fts5(value_text, tokenize='trigram');")
+    con.execute("CREATE VIRTUAL TABLE IF NOT EXISTS labels_fts USING fts5(label_text, tokenize='trigram');")
+
+    # DBs created before the indexes existed: index what is already there, once
+    if "facts_fts" not in existing:
+        _index_facts(con, None)
+    if "labels_fts" not in existing:
+        con.execute("INSERT INTO labels_fts (rowid, label_text) SELECT id, label_text FROM labels;")
+
+
+def _index_facts(con: sqlite3.Connection, filing_id: int | None) -> None:
+    sql = """
+    INSERT INTO facts_fts (rowid, value_text)
+    SELECT f.id, f.value_text
+    FROM facts f
+    WHERE f.is_numeric = 0
+      AND NOT EXISTS (SELECT 1 FROM facts_fts x WHERE x.rowid = f.id)
+    """
+    if filing_id is None:
+        con.execute(sql)
+    else:
+        con.execute(sql + " AND f.filing_id = ?", (filing_id,))
+
+
+def sync_fact_fts(con: sqlite3.Connection, filing_id: int) -> None:
+    """Index the filing's non-numeric facts that are not indexed yet.
+
+    `value_text` is part of the facts unique key, so an existing row never changes its text.
+    """
+    _index_facts(con, filing_id)
+
+
+def delete_fact_fts(con: sqlite3.Connection, filing_id: int) -> None:
+    """Call before deleting the filing's facts."""
+    con.execute("DELETE FROM facts_fts WHERE rowid IN (SELECT id FROM facts WHERE filing_id = ?);", (filing_id,))
+
+
+def sync_label_fts(con: sqlite3.Connection, concept_names: Iterable[str]) -> None:
+    con.execute(
+        """
+        INSERT INTO labels_fts (rowid, label_text)
+        SELECT l.id, l.label_text
+        FROM labels l
+        WHERE l.concept_name IN (SELECT value FROM json_each(?))
+          AND NOT EXISTS (SELECT 1 FROM labels_fts x WHERE x.rowid = l.id)
+        """,
+        (json.dumps(sorted(set(concept_names))),),
+    )
@@ -2,10 +2,19 @@ from __future__ import annotations
 
 import os
 import sqlite3
+import weakref
 from dataclasses import dataclass
-from typing import Iterable, Tuple
+from itertools import islice
+from typing import Callable, Iterable, Tuple
 
-from tdnet_xbrl_ingestor.models.entities import Fact, Label, Context, Unit
+from tdnet_xbrl_ingestor.db.fts import delete_fact_fts, sync_fact_fts, sync_label_fts
+from tdnet_xbrl_ingestor.utils.numeric import split_decimal
+from tdnet_xbrl_ingestor.models.entities import FACT_COLUMNS, Context, Fact, FactBatch, Label, Unit
+
+
+# Ingest stages in order; `filings.ingest_stage` holds the last one committed
+# (NULL: nothing yet, INGEST_STAGES[-1]: complete)
+INGEST_STAGES = ("contexts", "facts", "summary", "labels")
 
 
 def get_or_create_filing(
@@ -14,8 +23,13 @@ def get_or_create_filing(
     zip_sha256: str,
     on_duplicate: str = "skip",
 ) -> Tuple[int, bool]:
+    """Return `(filing_id, skipped)`.
+
+    With on_duplicate="skip", a filing whose ingest stopped part-way is not skipped: the
+    caller resumes it after `get_ingest_stage()`.
+    """
     row = con.execute(
-        "SELECT id FROM filings WHERE zip_sha256 = ?",
+        "SELECT id, ingest_stage FROM filings WHERE zip_sha256 = ?",
         (zip_sha256,),
     ).fetchone()
 
@@ -25,7 +39,7 @@ def get_or_create_filing(
         filing_id = int(row["id"])
 
         if on_duplicate == "skip":
-            return filing_id, True
+            return filing_id, row["ingest_stage"] == INGEST_STAGES[-1]
         if on_duplicate != "replace":
             raise ValueError(f"Unknown on_duplicate: {on_duplicate!r}")
 
@@ -34,6 +48,7 @@ def get_or_create_filing(
             """
             UPDATE filings
             SET zip_name = ?,
+                ingest_stage = NULL,
                 ingested_at = datetime('now')
             WHERE id = ?
             """,
@@ -51,76 +66,129 @@ def get_or_create_filing(
     return int(cur.lastrowid), False
 
 
+def get_ingest_stage(con: sqlite3.Connection, filing_id: int) -> str | None:
+    row = con.execute("SELECT ingest_stage FROM filings WHERE id = ?", (filing_id,)).fetchone()
+    return row["ingest_stage"] if row is not None else None
+
+
+def mark_ingest_stage(con: sqlite3.Connection, filing_id: int, stage: str) -> None:
+    if stage not in INGEST_STAGES:
+        raise ValueError(f"Unknown ingest stage: {stage!r}")
+    con.execute("UPDATE filings SET ingest_stage = ? WHERE id = ?", (stage, filing_id))
+
+
+def update_filing_counts(con: sqlite3.Connection, filing_id: int) -> None:
+    """Record the filing's row counts on `filings` so stats never need COUNT(*) over facts."""
+    con.execute(
+        """
+        UPDATE filings
+        SET fact_count    = (SELECT COUNT(*) FROM facts    WHERE filing_id = :id),
+            context_count = (SELECT COUNT(*) FROM contexts WHERE filing_id = :id),
+            unit_count    = (SELECT COUNT(*) FROM units    WHERE filing_id = :id)
+        WHERE id = :id
+        """,
+        {"id": filing_id},
+    )
+
+
 def _clear_filing_children(con: sqlite3.Connection, filing_id: int) -> None:
+    delete_fact_fts(con, filing_id)
     con.execute("DELETE FROM facts WHERE filing_id = ?", (filing_id,))
+    con.execute("DELETE FROM primary_financials WHERE filing_id = ?", (filing_id,))
+    con.execute("DELETE FROM context_dimensions WHERE filing_id = ?", (filing_id,))
     con.execute("DELETE FROM contexts WHERE filing_id = ?", (filing_id,))
     con.execute("DELETE FROM units WHERE filing_id = ?", (filing_id,))
 
 
+_FACTS_UPSERT_SQL = f"""
+INSERT INTO facts (
+  filing_id, {", ".join(FACT_COLUMNS)},
+  created_at, updated_at
+)
+VALUES (?, {", ".join("?" for _ in FACT_COLUMNS)}, datetime('now'), datetime('now'))
+ON CONFLICT(filing_id, name, context_ref, unit_ref, value_text, source_file)
+DO UPDATE SET
+  decimals=excluded.decimals,
+  precision=excluded.precision,
+  scale=excluded.scale,
+  sign=excluded.sign,
+  value_num=excluded.value_num,
+  value_mantissa=excluded.value_mantissa,
+  value_exponent=excluded.value_exponent,
+  is_numeric=excluded.is_numeric,
+  raw_text=excluded.raw_text,
+  source_locator=excluded.source_locator,
+  updated_at=datetime('now')
+;
+"""
+
+
+def _fact_row(f: Fact) -> tuple:
+    value_num = float(f.value_num) if f.value_num is not None else None
+    return (
+        f.name, f.context_ref, f.unit_ref,
+        f.decimals, f.precision, f.scale, f.sign,
+        f.value_text, value_num, *split_decimal(f.value_num), 1 if f.is_numeric else 0,
+        f.raw_text, f.source_file, f.source_locator,
+    )
+
+
 def upsert_facts(
     con: sqlite3.Connection,
     filing_id: int,
-    facts: Iterable[Fact],
+    facts: FactBatch | Iterable[Fact],
     *,
     chunk_size: int = 2000,
+    on_chunk: Callable[[], None] | None = None,
 ) -> int:
-    facts_list = list(facts)
-    if not facts_list:
-        return 0
+    """Upsert the filing's facts `chunk_size` rows at a time.
 
-    sql = """
-    INSERT INTO facts (
-      filing_id, name, context_ref, unit_ref,
-      decimals, precision, scale, sign,
-      value_text, value_num, is_numeric,
-      raw_text, source_file, source_locator,
-      created_at, updated_at
-    )
-    VALUES (
-      :filing_id, :name, :context_ref, :unit_ref,
-      :decimals, :precision, :scale, :sign,
-      :value_text, :value_num, :is_numeric,
-      :raw_text, :source_file, :source_locator,
-      datetime('now'), datetime('now')
-    )
-    ON CONFLICT(filing_id, name, context_ref, unit_ref, value_text, source_file)
-    DO UPDATE SET
-      decimals=excluded.decimals,
-      precision=excluded.precision,
-      scale=excluded.scale,
-      sign=excluded.sign,
-      value_num=excluded.value_num,
-      is_numeric=excluded.is_numeric,
-      raw_text=excluded.raw_text,
-      source_locator=excluded.source_locator,
-      updated_at=datetime('now')
-    ;
+    A FactBatch is bound column-wise as tuples without building per-fact objects.
+    `on_chunk` runs after each chunk (e.g. `con.commit` to bound the WAL on huge filings);
+    re-running after a partial commit is safe because rows are upserted.
     """
-
-    def to_params(f: Fact) -> dict:
-        value_num = float(f.value_num) if f.value_num is not None else None
-        return {
-            "filing_id": filing_id,
-            "name": f.name,
-            "context_ref": f.context_ref,
-            "unit_ref": f.unit_ref,
-            "decimals": f.decimals,
-            "precision": f.precision,
-            "scale": f.scale,
-            "sign": f.sign,
-            "value_text": f.value_text,
-            "value_num": value_num,
-            "is_numeric": 1 if f.is_numeric else 0,
-            "raw_text": f.raw_text,
-            "source_file": f.source_file,
-            "source_locator": f.source_locator,
-        }
+    rows = facts.rows() if isinstance(facts, FactBatch) else map(_fact_row, facts)
+    params = ((filing_id, *row) for row in rows)
 
     before = con.total_changes
-    params = [to_params(f) for f in facts_list]
-    for i in range(0, len(params), chunk_size):
-        con.executemany(sql, params[i : i + chunk_size])
-    return con.total_changes - before
+    while True:
+        chunk = list(islice(params, chunk_size))
+        if not chunk:
+            break
+        con.executemany(_FACTS_UPSERT_SQL, chunk)
+        if on_chunk is not None:
+            on_chunk()
+    changed = con.total_changes - before
+    if changed:
+        sync_fact_fts(con, filing_id)
+    return changed
+
+
+# --- label change listeners ---
+# In-process caches (e.g. LabelResolver) register here and are told which concepts
+# `upsert_labels` wrote, so they can drop stale entries.
+_label_listeners: list[Callable[[], Callable[[set[str]], None] | None]] = []
+
+
+def add_label_listener(callback: Callable[[set[str]], None]) -> None:
+    """Register `callback(concept_names)`; bound methods are held weakly."""
+    if hasattr(callback, "__self__"):
+        _label_listeners.append(weakref.WeakMethod(callback))
+    else:
+        _label_listeners.append(lambda: callback)
+
+
+def remove_label_listener(callback: Callable[[set[str]], None]) -> None:
+    _label_listeners[:] = [ref for ref in _label_listeners if ref() not in (None, callback)]
+
+
+def _notify_label_listeners(concepts: set[str]) -> None:
+    for ref in list(_label_listeners):
+        callback = ref()
+        if callback is None:
+            _label_listeners.remove(ref)
+        else:
+            callback(concepts)
 
 
 def upsert_labels(
@@ -161,7 +229,12 @@ def upsert_labels(
 
     for i in range(0, len(params), chunk_size):
         con.executemany(sql, params[i : i + chunk_size])
-    return con.total_changes - before
+    changed = con.total_changes - before
+    if changed:
+        concepts = {l.concept_name for l in labels_list}
+        sync_label_fts(con, concepts)
+        _notify_label_listeners(concepts)
+    return changed
 
 
 def upsert_contexts(con: sqlite3.Connection, filing_id: int, contexts: Iterable[Context], *, chunk_size: int = 2000) -> int:
@@ -172,12 +245,12 @@ def upsert_contexts(con: sqlite3.Connection, filing_id: int, contexts: Iterable[
     sql = """
     INSERT INTO contexts (
       filing_id, context_ref, entity_scheme, entity_identifier,
-      period_type, instant_date, start_date, end_date, dimensions_json,
+      period_type, instant_date, start_date, end_date, dimensions_json, has_dimensions,
       created_at, updated_at
     )
     VALUES (
       :filing_id, :context_ref, :entity_scheme, :entity_identifier,
-      :period_type, :instant_date, :start_date, :end_date, :dimensions_json,
+      :period_type, :instant_date, :start_date, :end_date, :dimensions_json, :has_dimensions,
       datetime('now'), datetime('now')
     )
     ON CONFLICT(filing_id, context_ref)
@@ -189,6 +262,7 @@ def upsert_contexts(con: sqlite3.Connection, filing_id: int, contexts: Iterable[
       start_date=excluded.start_date,
       end_date=excluded.end_date,
       dimensions_json=excluded.dimensions_json,
+      has_dimensions=excluded.has_dimensions,
       updated_at=datetime('now')
     ;
     """
@@ -205,13 +279,36 @@ def upsert_contexts(con: sqlite3.Connection, filing_id: int, contexts: Iterable[
             "start_date": c.start_date,
             "end_date": c.end_date,
             "dimensions_json": c.dimensions_json,
+            "has_dimensions": 1 if c.dimensions else 0,
         }
         for c in ctx_list
     ]
 
     for i in range(0, len(params), chunk_size):
         con.executemany(sql, params[i : i + chunk_size])
-    return con.total_changes - before
+    changed = con.total_changes - before
+
+    # Replace the axis/member rows of the upserted contexts
+    refs = [(filing_id, c.context_ref) for c in ctx_list]
+    dim_rows = [
+        (filing_id, c.context_ref, d.dimension, d.member, d.dim_type)
+        for c in ctx_list
+        for d in c.dimensions
+    ]
+    for i in range(0, len(refs), chunk_size):
+        con.executemany(
+            "DELETE FROM context_dimensions WHERE filing_id = ? AND context_ref = ?",
+            refs[i : i + chunk_size],
+        )
+    for i in range(0, len(dim_rows), chunk_size):
+        con.executemany(
+            """
+            INSERT OR REPLACE INTO context_dimensions (filing_id, context_ref, dimension, member, dim_type)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            dim_rows[i : i + chunk_size],
+        )
+    return changed
 
 
 def upsert_units(con: sqlite3.Connection, filing_id: int, units: Iterable[Unit], *, chunk_size: int = 2000) -> int:
@@ -262,16 +359,25 @@ class DbStats:
 
 
 def get_db_stats(con: sqlite3.Connection) -> DbStats:
-    def count(table: str) -> int:
-        row = con.execute(f"SELECT COUNT(*) AS c FROM {table}").fetchone()
-        return int(row["c"]) if row is not None else 0
+    # facts / contexts / units come from the per-filing counters (see update_filing_counts)
+    row = con.execute(
+        """
+        SELECT
+          COUNT(*) AS filings,
+          COALESCE(SUM(fact_count), 0) AS facts,
+          COALESCE(SUM(context_count), 0) AS contexts,
+          COALESCE(SUM(unit_count), 0) AS units
+        FROM filings
+        """
+    ).fetchone()
+    labels = con.execute("SELECT COUNT(*) FROM labels").fetchone()[0]
 
     return DbStats(
-        filings=count("filings"),
-        facts=count("facts"),
-        contexts=count("contexts"),
-        units=count("units"),
-        labels=count("labels"),
+        filings=int(row[0]),
+        facts=int(row[1]),
+        contexts=int(row[2]),
+        units=int(row[3]),
+        labels=int(labels),
     )
 
 
@@ -288,7 +394,7 @@ def get_latest_filing(con: sqlite3.Connection) -> LatestFiling | None:
         """
         SELECT id, zip_name, zip_sha256, ingested_at
         FROM filings
-        ORDER BY datetime(ingested_at) DESC, id DESC
+        ORDER BY ingested_at DESC, id DESC
         LIMIT 1
         """
     ).fetchone()
@@ -321,11 +427,11 @@ def get_stats_by_filing(con: sqlite3.Connection, *, limit: int = 50) -> list[Fil
           f.id AS filing_id,
           f.zip_name AS zip_name,
           f.ingested_at AS ingested_at,
-          (SELECT COUNT(*) FROM facts    WHERE filing_id = f.id) AS facts,
-          (SELECT COUNT(*) FROM contexts WHERE filing_id = f.id) AS contexts,
-          (SELECT COUNT(*) FROM units    WHERE filing_id = f.id) AS units
+          f.fact_count AS facts,
+          f.context_count AS contexts,
+          f.unit_count AS units
         FROM filings f
-        ORDER BY datetime(f.ingested_at) DESC, f.id DESC
+        ORDER BY f.ingested_at DESC, f.id DESC
         LIMIT ?
         """,
         (limit,),
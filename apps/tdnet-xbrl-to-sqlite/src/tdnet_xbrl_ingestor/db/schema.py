@@ -1,6 +1,15 @@
 from __future__ import annotations
 
 import sqlite3
+from decimal import Decimal, InvalidOperation
+
+from tdnet_xbrl_ingestor.db.fts import ensure_fts
+from tdnet_xbrl_ingestor.db.summary import rebuild_primary_financials
+from tdnet_xbrl_ingestor.utils.numeric import split_decimal
+
+
+# Rows read per step when a migration backfills existing facts
+MIGRATION_CHUNK_ROWS = 10000
 
 
 def ensure_schema(con: sqlite3.Connection) -> None:
@@ -14,10 +23,16 @@ def ensure_schema(con: sqlite3.Connection) -> None:
           company_code TEXT,
           period_start TEXT,
           period_end TEXT,
-          doc_type TEXT
+          doc_type TEXT,
+          fact_count INTEGER NOT NULL DEFAULT 0,
+          context_count INTEGER NOT NULL DEFAULT 0,
+          unit_count INTEGER NOT NULL DEFAULT 0,
+          ingest_stage TEXT
         );
         """
     )
+    _migrate_filing_counts(con)
+    _migrate_ingest_stage(con)
 
     con.execute(
         """
@@ -32,6 +47,7 @@ def ensure_schema(con: sqlite3.Connection) -> None:
           start_date TEXT,
           end_date TEXT,
           dimensions_json TEXT NOT NULL,
+          has_dimensions INTEGER NOT NULL DEFAULT 0,
           created_at TEXT NOT NULL DEFAULT (datetime('now')),
           updated_at TEXT NOT NULL DEFAULT (datetime('now')),
           FOREIGN KEY (filing_id) REFERENCES filings(id) ON DELETE CASCADE,
@@ -40,6 +56,25 @@ def ensure_schema(con: sqlite3.Connection) -> None:
         """
     )
 
+    migrated = _migrate_context_dimensions_flag(con)
+
+    # One row per (context, axis): filter contexts by axis/member without scanning dimensions_json
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS context_dimensions (
+          filing_id INTEGER NOT NULL,
+          context_ref TEXT NOT NULL,
+          dimension TEXT NOT NULL,
+          member TEXT NOT NULL,
+          dim_type TEXT NOT NULL,
+          PRIMARY KEY (filing_id, context_ref, dimension),
+          FOREIGN KEY (filing_id, context_ref) REFERENCES contexts(filing_id, context_ref) ON DELETE CASCADE
+        ) WITHOUT ROWID;
+        """
+    )
+    if migrated:
+        _backfill_context_dimensions(con)
+
     con.execute(
         """
         CREATE TABLE IF NOT EXISTS units (
@@ -69,6 +104,8 @@ def ensure_schema(con: sqlite3.Connection) -> None:
           sign TEXT,
           value_text TEXT NOT NULL,
           value_num REAL,
+          value_mantissa INTEGER,
+          value_exponent INTEGER,
           is_numeric INTEGER NOT NULL,
           raw_text TEXT,
           source_file TEXT NOT NULL,
@@ -96,13 +133,143 @@ def ensure_schema(con: sqlite3.Connection) -> None:
         """
     )
 
+    # Materialized per filing/period summary, maintained by db.summary at ingest time
+    summary_created = not _table_exists(con, "primary_financials")
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS primary_financials (
+          filing_id INTEGER NOT NULL,
+          period_start TEXT NOT NULL,
+          period_end TEXT NOT NULL,
+          net_sales REAL,
+          operating_income REAL,
+          ordinary_income REAL,
+          net_income REAL,
+          eps REAL,
+          updated_at TEXT NOT NULL DEFAULT (datetime('now')),
+          PRIMARY KEY (filing_id, period_start, period_end),
+          FOREIGN KEY (filing_id) REFERENCES filings(id) ON DELETE CASCADE
+        ) WITHOUT ROWID;
+        """
+    )
+
+    # --stats orders by ingested_at ('YYYY-MM-DD HH:MM:SS' sorts as text)
+    con.execute("CREATE INDEX IF NOT EXISTS idx_filings_ingested_at ON filings(ingested_at, id);")
+
     con.execute("CREATE INDEX IF NOT EXISTS idx_facts_filing ON facts(filing_id);")
+    _migrate_exact_values(con)
     con.execute("CREATE INDEX IF NOT EXISTS idx_facts_name ON facts(name);")
+    # Exact range queries / sums per concept (integral values all have exponent 0)
+    con.execute(
+        "CREATE INDEX IF NOT EXISTS idx_facts_exact ON facts(name, value_exponent, value_mantissa) "
+        "WHERE value_mantissa IS NOT NULL;"
+    )
     con.execute("CREATE INDEX IF NOT EXISTS idx_facts_context ON facts(context_ref);")
     con.execute("CREATE INDEX IF NOT EXISTS idx_facts_unit ON facts(unit_ref);")
 
     con.execute("CREATE INDEX IF NOT EXISTS idx_contexts_filing ON contexts(filing_id);")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_contexts_has_dimensions ON contexts(has_dimensions, filing_id);")
+    con.execute(
+        "CREATE INDEX IF NOT EXISTS idx_context_dimensions_member "
+        "ON context_dimensions(dimension, member, filing_id, context_ref);"
+    )
     con.execute("CREATE INDEX IF NOT EXISTS idx_units_filing ON units(filing_id);")
 
     con.execute("CREATE INDEX IF NOT EXISTS idx_labels_concept ON labels(concept_name);")
     con.execute("CREATE INDEX IF NOT EXISTS idx_labels_lang ON labels(lang);")
+
+    if summary_created:
+        # DBs created before the summary table existed: fill it once from the stored facts
+        rebuild_primary_financials(con)
+
+    ensure_fts(con)
+
+
+def _table_exists(con: sqlite3.Connection, name: str) -> bool:
+    return con.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone() is not None
+
+
+def _migrate_filing_counts(con: sqlite3.Connection) -> None:
+    """Add per-filing row counters to DBs created before they existed, and fill them once."""
+    cols = {row[1] for row in con.execute("PRAGMA table_info(filings)")}
+    if "fact_count" in cols:
+        return
+    for col in ("fact_count", "context_count", "unit_count"):
+        con.execute(f"ALTER TABLE filings ADD COLUMN {col} INTEGER NOT NULL DEFAULT 0;")
+
+    tables = {
+        row[0]
+        for row in con.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('facts', 'contexts', 'units')")
+    }
+    for col, table in (("fact_count", "facts"), ("context_count", "contexts"), ("unit_count", "units")):
+        if table in tables:
+            con.execute(f"UPDATE filings SET {col} = (SELECT COUNT(*) FROM {table} t WHERE t.filing_id = filings.id);")
+
+
+def _migrate_ingest_stage(con: sqlite3.Connection) -> None:
+    """Add the stage marker; filings ingested before it existed were committed whole."""
+    cols = {row[1] for row in con.execute("PRAGMA table_info(filings)")}
+    if "ingest_stage" in cols:
+        return
+    con.execute("ALTER TABLE filings ADD COLUMN ingest_stage TEXT;")
+    con.execute("UPDATE filings SET ingest_stage = 'labels';")
+
+
+def _migrate_exact_values(con: sqlite3.Connection) -> None:
+    """Add the exact value columns and fill them once from the stored normalized text."""
+    cols = {row[1] for row in con.execute("PRAGMA table_info(facts)")}
+    if "value_mantissa" in cols:
+        return
+    con.execute("ALTER TABLE facts ADD COLUMN value_mantissa INTEGER;")
+    con.execute("ALTER TABLE facts ADD COLUMN value_exponent INTEGER;")
+
+    # Keyset over the rowid in chunks, so large DBs are never held in memory at once
+    last_id = 0
+    while True:
+        rows = con.execute(
+            "SELECT id, value_text FROM facts WHERE id > ? AND is_numeric = 1 AND value_num IS NOT NULL "
+            "ORDER BY id LIMIT ?",
+            (last_id, MIGRATION_CHUNK_ROWS),
+        ).fetchall()
+        if not rows:
+            return
+        last_id = rows[-1][0]
+
+        updates = []
+        for fact_id, value_text in rows:
+            try:
+                mantissa, exponent = split_decimal(Decimal(value_text))
+            except InvalidOperation:
+                continue
+            if mantissa is not None:
+                updates.append((mantissa, exponent, fact_id))
+        con.executemany("UPDATE facts SET value_mantissa = ?, value_exponent = ? WHERE id = ?", updates)
+
+
+def _migrate_context_dimensions_flag(con: sqlite3.Connection) -> bool:
+    """Add contexts.has_dimensions to DBs created before context_dimensions existed.
+
+    Returns True when the column was added; `ensure_schema` then backfills
+    context_dimensions from dimensions_json once.
+    """
+    cols = {row[1] for row in con.execute("PRAGMA table_info(contexts)")}
+    if "has_dimensions" in cols:
+        return False
+    con.execute("ALTER TABLE contexts ADD COLUMN has_dimensions INTEGER NOT NULL DEFAULT 0;")
+    return True
+
+
+def _backfill_context_dimensions(con: sqlite3.Connection) -> None:
+    con.execute(
+        """
+        INSERT OR IGNORE INTO context_dimensions (filing_id, context_ref, dimension, member, dim_type)
+        SELECT
+          c.filing_id,
+          c.context_ref,
+          json_extract(j.value, '$.dimension'),
+          COALESCE(json_extract(j.value, '$.member'), json_extract(j.value, '$.value_xml'), ''),
+          json_extract(j.value, '$.type')
+        FROM contexts c, json_each(c.dimensions_json) j
+        """
+    )
+    con.execute("UPDATE contexts SET has_dimensions = (json_array_length(dimensions_json) > 0);")
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import re
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+from tdnet_xbrl_ingestor.db.connect import connect
+
+
+CATALOG_NAME = "catalog.sqlite"
+UNKNOWN_SHARD = "unknown"
+GRANULARITIES = ("year", "month")
+
+# Tables exposed as UNION ALL views by attach_shards (each row gets a `shard` column;
+# filing ids are only unique within a shard)
+SHARDED_TABLES = ("filings", "facts", "contexts", "context_dimensions", "units", "primary_financials")
+
+
+@dataclass(frozen=True, slots=True)
+class ShardLayout:
+    """Per-period shard files under `root`, plus a small catalog of all filings."""
+
+    root: Path
+    granularity: str = "year"
+
+    def __post_init__(self) -> None:
+        if self.granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown shard granularity: {self.granularity!r}")
+
+    @property
+    def catalog_path(self) -> Path:
+        return self.root / CATALOG_NAME
+
+    def shard_key(self, period_end: str | None) -> str:
+        """'2026-03-31' -> '2026' (year) / '2026-03' (month)."""
+        if not period_end or not re.match(r"^\d{4}-\d{2}", period_end):
+            return UNKNOWN_SHARD
+        return period_end[:4] if self.granularity == "year" else period_end[:7]
+
+    def shard_path(self, key: str) -> Path:
+        return self.root / f"filings_{key}.sqlite"
+
+
+def ensure_catalog(con: sqlite3.Connection) -> None:
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS catalog_filings (
+          zip_sha256 TEXT PRIMARY KEY,
+          zip_name TEXT NOT NULL,
+          shard TEXT NOT NULL,
+          filing_id INTEGER NOT NULL,
+          period_end TEXT,
+          ingested_at TEXT NOT NULL DEFAULT (datetime('now'))
+        ) WITHOUT ROWID;
+        """
+    )
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS shards (
+          shard TEXT PRIMARY KEY,
+          path TEXT NOT NULL,
+          read_only INTEGER NOT NULL DEFAULT 0,
+          compacted_at TEXT
+        ) WITHOUT ROWID;
+        """
+    )
+    con.execute("CREATE INDEX IF NOT EXISTS idx_catalog_filings_shard ON catalog_filings(shard, period_end);")
+
+
+@contextmanager
+def connect_catalog(layout: ShardLayout) -> Iterator[sqlite3.Connection]:
+    layout.root.mkdir(parents=True, exist_ok=True)
+    with connect(str(layout.catalog_path)) as con:
+        ensure_catalog(con)
+        yield con
+
+
+def _alias(key: str) -> str:
+    return "s_" + re.sub(r"\W", "_", key)
+
+
+def select_shards(con: sqlite3.Connection, start: str | None = None, end: str | None = None) -> list[tuple[str, str, bool]]:
+    """Shards whose key falls in [start, end] (compared by prefix, e.g. '2024' .. '2025-06').
+
+    Key and bound are cut to the shorter of the two, so a year bound covers every month
+    shard of that year (end='2024' keeps '2024-12') and a month bound keeps its year shard.
+    """
+    rows = con.execute("SELECT shard, path, read_only FROM shards ORDER BY shard").fetchall()
+    out = []
+    for key, path, read_only in rows:
+        if key != UNKNOWN_SHARD:
+            if start is not None and key[: len(start)] < start[: len(key)]:
+                continue
+            if end is not None and key[: len(end)] > end[: len(key)]:
+                continue
+        elif start is not None or end is not None:
+            continue
+        out.append((key, path, bool(read_only)))
+    return out
+
+
+def _columns(con: sqlite3.Connection, alias: str, table: str) -> list[str]:
+    return [r[1] for r in con.execute(f"PRAGMA {alias}.table_info({table})")]
+
+
+def _union_view_sql(table: str, columns_by_shard: list[tuple[str, list[str]]]) -> str:
+    """UNION ALL over the shards with an explicit column list.
+
+    Shards written by older versions may lack newer columns (e.g. value_mantissa); those
+    read as NULL, so `SELECT *` column counts never differ between the union's arms.
+    """
+    names: list[str] = []
+    # Newest shard first: its column order matches the current schema
+    for _, columns in reversed(columns_by_shard):
+        names.extend(c for c in columns if c not in names)
+
+    parts = []
+    for key, columns in columns_by_shard:
+        present = set(columns)
+        select = ", ".join(f'"{c}"' if c in present else f'NULL AS "{c}"' for c in names)
+        parts.append(f"SELECT '{key}' AS shard, {select} FROM {_alias(key)}.{table}")
+    return f"CREATE TEMP VIEW {table} AS " + " UNION ALL ".join(parts)
+
+
+@contextmanager
+def attach_shards(
+    layout: ShardLayout,
+    *,
+    start: str | None = None,
+    end: str | None = None,
+) -> Iterator[sqlite3.Connection]:
+    """Open the catalog and ATTACH only the shards covering [start, end].
+
+    TEMP views named like the shard tables (`facts`, `filings`, ...) union the attached
+    shards and add a `shard` column; join on (shard, filing_id). Read-only shards are
+    attached with `mode=ro`. SQLite attaches at most SQLITE_LIMIT_ATTACHED (10 by default)
+    databases, so a wider range raises ValueError; query it in narrower ranges. A shard
+    listed in the catalog whose file is gone raises FileNotFoundError (ATTACH would
+    otherwise create an empty database in its place).
+    """
+    layout.root.mkdir(parents=True, exist_ok=True)
+    # uri=True lets ATTACH take `file:...?mode=ro` URIs
+    con = sqlite3.connect(layout.catalog_path.resolve().as_uri(), uri=True)
+    con.row_factory = sqlite3.Row
+    try:
+        ensure_catalog(con)
+        con.commit()
+
+        shards = select_shards(con, start, end)
+        max_attached = con.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+        if len(shards) > max_attached:
+            raise ValueError(
+                f"{len(shards)} shards match start={start!r} end={end!r}, but SQLite attaches at most "
+                f"{max_attached}; narrow the range (e.g. one query per {max_attached} shards)"
+            )
+        for key, path, read_only in shards:
+            if not Path(path).exists():
+                raise FileNotFoundError(f"Shard {key!r} is in the catalog but its file is missing: {path}")
+            uri = Path(path).resolve().as_uri() + ("?mode=ro" if read_only else "")
+            con.execute(f"ATTACH DATABASE ? AS {_alias(key)}", (uri,))
+
+        for table in SHARDED_TABLES:
+            columns_by_shard = [(key, _columns(con, _alias(key), table)) for key, _, _ in shards]
+            columns_by_shard = [(key, columns) for key, columns in columns_by_shard if columns]
+            if columns_by_shard:
+                con.execute(_union_view_sql(table, columns_by_shard))
+
+        yield con
+    finally:
+        con.close()
+
+
+def compact_shard(layout: ShardLayout, key: str) -> None:
+    """VACUUM a closed period's shard once and mark it read-only (no more ingests)."""
+    path = layout.shard_path(key)
+    if not path.exists():
+        raise FileNotFoundError(path)
+
+    con = sqlite3.connect(path)
+    try:
+        con.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+        con.execute("VACUUM;")
+        # Read-only readers cannot create the -wal/-shm files, so switch back to a rollback journal
+        con.execute("PRAGMA journal_mode = DELETE;")
+    finally:
+        con.close()
+
+    with connect_catalog(layout) as cat:
+        cat.execute(
+            """
+            INSERT INTO shards (shard, path, read_only, compacted_at)
+            VALUES (?, ?, 1, datetime('now'))
+            ON CONFLICT(shard) DO UPDATE SET read_only = 1, compacted_at = excluded.compacted_at
+            """,
+            (key, str(path)),
+        )
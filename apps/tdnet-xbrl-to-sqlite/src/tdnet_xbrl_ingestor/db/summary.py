@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import sqlite3
+
+
+# Summary column -> concept local names (first match wins)
+PRIMARY_CONCEPTS: dict[str, tuple[str, ...]] = {
+    "net_sales": ("NetSales", "OperatingRevenues", "NetSalesOfCompletedConstructionContracts", "Revenue"),
+    "operating_income": ("OperatingIncome", "OperatingProfit"),
+    "ordinary_income": ("OrdinaryIncome",),
+    "net_income": ("ProfitAttributableToOwnersOfParent", "NetIncome", "Profit"),
+    "eps": ("NetIncomePerShare", "BasicEarningsPerShare"),
+}
+
+# Dimension members allowed on a "consolidated current-period result" context
+ALLOWED_MEMBERS = ("ConsolidatedMember", "ResultMember")
+
+
+def _local(expr: str) -> str:
+    return f"substr({expr}, instr({expr}, ':') + 1)"
+
+
+def _refresh_sql(filing_filter: str) -> str:
+    concept_names = sorted({name for names in PRIMARY_CONCEPTS.values() for name in names})
+    in_list = ", ".join(f"'{n}'" for n in concept_names)
+    columns = ", ".join(PRIMARY_CONCEPTS)
+
+    def aggregate(col: str, names: tuple[str, ...]) -> str:
+        picks = [f"MAX(CASE WHEN x.local_name = '{n}' THEN x.value_num END)" for n in names]
+        expr = picks[0] if len(picks) == 1 else f"COALESCE({', '.join(picks)})"
+        return f"{expr} AS {col}"
+
+    aggregates = ",\n      ".join(aggregate(col, names) for col, names in PRIMARY_CONCEPTS.items())
+    allowed = ", ".join(f"'{m}'" for m in ALLOWED_MEMBERS)
+
+    return f"""
+    INSERT INTO primary_financials (filing_id, period_start, period_end, {columns}, updated_at)
+    SELECT
+      x.filing_id, x.start_date, x.end_date,
+      {aggregates},
+      datetime('now')
+    FROM (
+      SELECT f.filing_id, c.start_date, c.end_date, f.value_num, {_local("f.name")} AS local_name
+      FROM facts f
+      JOIN contexts c ON c.filing_id = f.filing_id AND c.context_ref = f.context_ref
+      WHERE {filing_filter}
+        AND f.is_numeric = 1
+        AND c.period_type = 'duration'
+        AND c.start_date IS NOT NULL AND c.end_date IS NOT NULL
+        AND c.context_ref LIKE 'Current%'
+        AND NOT EXISTS (
+          SELECT 1 FROM context_dimensions d
+          WHERE d.filing_id = c.filing_id AND d.context_ref = c.context_ref
+            AND {_local("d.member")} NOT IN ({allowed})
+        )
+    ) x
+    WHERE x.local_name IN ({in_list})
+    GROUP BY x.filing_id, x.start_date, x.end_date
+    """
+
+
+def refresh_primary_financials(con: sqlite3.Connection, filing_id: int) -> int:
+    """Recompute the summary rows of one filing from its facts. Returns rows written."""
+    con.execute("DELETE FROM primary_financials WHERE filing_id = ?", (filing_id,))
+    cur = con.execute(_refresh_sql("f.filing_id = :filing_id"), {"filing_id": filing_id})
+    return cur.rowcount
+
+
+def rebuild_primary_financials(con: sqlite3.Connection) -> int:
+    """Recompute the whole summary table (e.g. after changing PRIMARY_CONCEPTS)."""
+    con.execute("DELETE FROM primary_financials")
+    cur = con.execute(_refresh_sql("1 = 1"))
+    return cur.rowcount
@@ -6,20 +6,35 @@ from typing import List
 from lxml import etree
 
 from tdnet_xbrl_ingestor.ingest.normalize import normalize_non_numeric, normalize_numeric
-from tdnet_xbrl_ingestor.models.entities import Fact
-from tdnet_xbrl_ingestor.utils.zipreader import read_bytes
+from tdnet_xbrl_ingestor.models.entities import Fact, FactBatch
+from tdnet_xbrl_ingestor.utils.zipreader import ZipSource, read_bytes
 
 
 IX_NS = "http://www.xbrl.org/2008/inlineXBRL"
 
 
 def extract_facts_from_ixbrl(
-    zip_path: str,
+    zip_path: ZipSource,
     ixbrl_inner_path: str,
     warnings: list[str] | None = None,
 ) -> List[Fact]:
+    batch = extract_fact_batch_from_ixbrl(zip_path, ixbrl_inner_path, warnings, keep_raw_text=True)
+    return batch.to_facts()
+
+
+def extract_fact_batch_from_ixbrl(
+    zip_path: ZipSource,
+    ixbrl_inner_path: str,
+    warnings: list[str] | None = None,
+    *,
+    batch: FactBatch | None = None,
+    keep_raw_text: bool = False,
+) -> FactBatch:
+    """Append the file's facts to `batch` (a new one if None) and return it."""
     if warnings is None:
         warnings = []
+    if batch is None:
+        batch = FactBatch(keep_raw_text=keep_raw_text)
 
     data = read_bytes(zip_path, ixbrl_inner_path)
 
@@ -36,40 +51,42 @@ def extract_facts_from_ixbrl(
         root = etree.fromstring(data, parser=parser)
     except etree.XMLSyntaxError as e:
         warnings.append(f"[ixbrl] XML parse failed: {ixbrl_inner_path}: {e}")
-        return []
+        return batch
 
     # ✅ lxml XPath cannot accept namespaces with None key
     ns = {k: v for k, v in (root.nsmap or {}).items() if k}
     ns["ix"] = IX_NS
 
-    facts: list[Fact] = []
-
     for el in root.xpath("//ix:nonFraction", namespaces=ns):
-        facts.append(_fact_from_element(el, ixbrl_inner_path, is_numeric=True, warnings=warnings))
+        _append_fact(batch, el, ixbrl_inner_path, is_numeric=True, warnings=warnings)
 
     for el in root.xpath("//ix:nonNumeric", namespaces=ns):
-        facts.append(_fact_from_element(el, ixbrl_inner_path, is_numeric=False, warnings=warnings))
+        _append_fact(batch, el, ixbrl_inner_path, is_numeric=False, warnings=warnings)
+
+    return batch
 
-    return [f for f in facts if f.name]
 
+def _attr(el: etree._Element, key: str) -> str | None:
+    value = el.get(key)
+    if value is None:
+        return None
+    return value.strip() or None
 
-def _fact_from_element(
+
+def _append_fact(
+    batch: FactBatch,
     el: etree._Element,
     source_file: str,
     *,
     is_numeric: bool,
     warnings: list[str],
-) -> Fact:
-    name = (el.get("name") or "").strip()
-    context_ref = (el.get("contextRef") or "").strip() or None
-    unit_ref = (el.get("unitRef") or "").strip() or None
-
-    decimals = (el.get("decimals") or "").strip() or None
-    precision = (el.get("precision") or "").strip() or None
-    scale = (el.get("scale") or "").strip() or None
-    sign = (el.get("sign") or "").strip() or None
+) -> None:
+    name = _attr(el, "name")
+    if name is None:
+        return
 
-    locator = (el.get("id") or "").strip() or None
+    sign = _attr(el, "sign")
+    scale = _attr(el, "scale")
 
     raw_text = "".join(el.itertext()).replace("\u00a0", " ").strip()
 
@@ -77,25 +94,23 @@ def _fact_from_element(
         norm = normalize_numeric(raw_text, sign_attr=sign, scale_attr=scale)
         if norm.warning:
             warnings.append(f"[ixbrl] {source_file} ({name}) {norm.warning}")
-        value_text = norm.value_text
         value_num: Decimal | None = norm.value_num
     else:
         norm = normalize_non_numeric(raw_text)
-        value_text = norm.value_text
         value_num = None
 
-    return Fact(
+    batch.append(
         name=name,
-        context_ref=context_ref,
-        unit_ref=unit_ref,
-        decimals=decimals,
-        precision=precision,
+        context_ref=_attr(el, "contextRef"),
+        unit_ref=_attr(el, "unitRef"),
+        decimals=_attr(el, "decimals"),
+        precision=_attr(el, "precision"),
         scale=scale,
         sign=sign,
         is_numeric=is_numeric,
-        value_text=value_text,
+        value_text=norm.value_text,
         value_num=value_num,
         raw_text=raw_text,
         source_file=source_file,
-        source_locator=locator,
+        source_locator=_attr(el, "id"),
     )
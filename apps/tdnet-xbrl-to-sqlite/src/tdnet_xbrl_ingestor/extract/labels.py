@@ -5,7 +5,7 @@ from typing import List
 from lxml import etree
 
 from tdnet_xbrl_ingestor.models.entities import Label
-from tdnet_xbrl_ingestor.utils.zipreader import read_bytes
+from tdnet_xbrl_ingestor.utils.zipreader import ZipSource, read_bytes
 
 
 LINK_NS = "http://www.xbrl.org/2003/linkbase"
@@ -13,7 +13,7 @@ XLINK_NS = "http://www.w3.org/1999/xlink"
 
 
 def extract_labels(
-    zip_path: str,
+    zip_path: ZipSource,
     lab_inner_path: str,
     warnings: list[str] | None = None,
 ) -> List[Label]:
@@ -5,8 +5,8 @@ from typing import List
 
 from lxml import etree
 
-from tdnet_xbrl_ingestor.models.entities import Context
-from tdnet_xbrl_ingestor.utils.zipreader import read_bytes
+from tdnet_xbrl_ingestor.models.entities import Context, Dimension
+from tdnet_xbrl_ingestor.utils.zipreader import ZipSource, read_bytes
 
 
 XBRLI_NS = "http://www.xbrl.org/2003/instance"
@@ -14,7 +14,7 @@ XBRLDI_NS = "http://xbrl.org/2006/xbrldi"
 
 
 def extract_contexts_from_ixbrl(
-    zip_path: str,
+    zip_path: ZipSource,
     ixbrl_inner_path: str,
     warnings: list[str] | None = None,
 ) -> List[Context]:
@@ -76,6 +76,15 @@ def extract_contexts_from_ixbrl(
             inner = "".join([etree.tostring(ch, encoding="unicode") for ch in mem])
             dims.append({"type": "typed", "dimension": dim, "value_xml": inner})
 
+        dimensions = tuple(
+            Dimension(
+                dimension=d["dimension"],
+                member=d["member"] if d["type"] == "explicit" else d["value_xml"],
+                dim_type=d["type"],
+            )
+            for d in dims
+        )
+
         out.append(
             Context(
                 context_ref=cid,
@@ -86,6 +95,7 @@ def extract_contexts_from_ixbrl(
                 start_date=start_date,
                 end_date=end_date,
                 dimensions_json=json.dumps(dims, ensure_ascii=False),
+                dimensions=dimensions,
             )
         )
 
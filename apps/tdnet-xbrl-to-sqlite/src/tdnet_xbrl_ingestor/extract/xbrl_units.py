@@ -6,14 +6,14 @@ from typing import List
 from lxml import etree
 
 from tdnet_xbrl_ingestor.models.entities import Unit
-from tdnet_xbrl_ingestor.utils.zipreader import read_bytes
+from tdnet_xbrl_ingestor.utils.zipreader import ZipSource, read_bytes
 
 
 XBRLI_NS = "http://www.xbrl.org/2003/instance"
 
 
 def extract_units_from_ixbrl(
-    zip_path: str,
+    zip_path: ZipSource,
     ixbrl_inner_path: str,
     warnings: list[str] | None = None,
 ) -> List[Unit]:
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-import zipfile
+
+from tdnet_xbrl_ingestor.utils.zipreader import ZipSource, zip_context
 
 
 @dataclass(frozen=True, slots=True)
@@ -10,12 +11,12 @@ class DiscoverResult:
     label_files: list[str]
 
 
-def discover_targets(zip_path: str) -> DiscoverResult:
+def discover_targets(zip_path: ZipSource) -> DiscoverResult:
     """Discover iXBRL (.htm/.xhtml) and label linkbase (*-lab.xml) inside TDnet ZIP."""
     ixbrl: list[str] = []
     labels: list[str] = []
 
-    with zipfile.ZipFile(zip_path) as zf:
+    with zip_context(zip_path) as zf:
         for name in zf.namelist():
             low = name.lower()
 
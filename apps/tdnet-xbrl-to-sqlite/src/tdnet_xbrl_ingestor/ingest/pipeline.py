@@ -1,26 +1,41 @@
 from __future__ import annotations
 
+import os
+import sqlite3
+import zipfile
 from dataclasses import dataclass
+from typing import Callable, Iterable
 
-from tdnet_xbrl_ingestor.utils.hashing import sha256_file
+from tdnet_xbrl_ingestor.utils.hashing import sha256_buffer, sha256_file, sha256_fileobj
+from tdnet_xbrl_ingestor.utils.zipreader import ZipSource, is_buffer, zip_context
 from tdnet_xbrl_ingestor.ingest.discover import discover_targets
 
-from tdnet_xbrl_ingestor.extract.ixbrl_facts import extract_facts_from_ixbrl
+from tdnet_xbrl_ingestor.extract.ixbrl_facts import extract_fact_batch_from_ixbrl
 from tdnet_xbrl_ingestor.extract.labels import extract_labels
 from tdnet_xbrl_ingestor.extract.xbrl_contexts import extract_contexts_from_ixbrl
 from tdnet_xbrl_ingestor.extract.xbrl_units import extract_units_from_ixbrl
 
+from tdnet_xbrl_ingestor.models.entities import Context, FactBatch, Label, Unit
+
 from tdnet_xbrl_ingestor.db.connect import connect
 from tdnet_xbrl_ingestor.db.schema import ensure_schema
+from tdnet_xbrl_ingestor.db.summary import refresh_primary_financials
 from tdnet_xbrl_ingestor.db.repo import (
+    INGEST_STAGES,
+    get_ingest_stage,
     get_or_create_filing,
+    mark_ingest_stage,
     upsert_facts,
     upsert_labels,
     upsert_contexts,
     upsert_units,
+    update_filing_counts,
 )
 
 
+COMMIT_MODES = ("filing", "stage")
+
+
 @dataclass
 class IngestResult:
     filing_id: int
@@ -31,65 +46,316 @@ class IngestResult:
     warnings: list[str]
 
 
-def run_pipeline(zip_path: str, db_path: str, on_duplicate: str = "skip") -> IngestResult:
+@dataclass
+class ExtractedFiling:
+    """Everything parsed from one ZIP, ready to be written (picklable)."""
+
+    zip_name: str
+    zip_sha256: str
+    contexts: list[Context]
+    units: list[Unit]
+    facts: FactBatch
+    labels: list[Label]
+    warnings: list[str]
+
+    # Same accessors as the lazy ZIP reader (extraction warnings are already in `warnings`)
+    def load_contexts_units(self, warnings: list[str]) -> tuple[list[Context], list[Unit]]:
+        return self.contexts, self.units
+
+    def load_facts(self, warnings: list[str]) -> FactBatch:
+        return self.facts
+
+    def load_labels(self, warnings: list[str]) -> list[Label]:
+        return self.labels
+
+
+def _sha256_source(source: ZipSource) -> str:
+    if is_buffer(source):
+        return sha256_buffer(source)
+    if isinstance(source, zipfile.ZipFile):
+        raise ValueError("zip_sha256 is required when passing an opened ZipFile")
+    if hasattr(source, "read"):
+        return sha256_fileobj(source)
+    return sha256_file(source)
+
+
+def _seekable(source: ZipSource) -> ZipSource:
+    """zipfile needs random access; buffer non-seekable streams (pipes, sockets) once."""
+    if hasattr(source, "read") and not isinstance(source, zipfile.ZipFile) and not source.seekable():
+        return source.read()
+    return source
+
+
+def _source_name(source: ZipSource) -> str:
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.basename(os.fspath(source))
+    name = getattr(source, "filename", None) or getattr(source, "name", None)
+    return os.path.basename(name) if isinstance(name, str) else "<memory>"
+
+
+def extract_filing(
+    zip_path: ZipSource,
+    *,
+    zip_sha256: str | None = None,
+    zip_name: str | None = None,
+    keep_raw_text: bool = False,
+) -> ExtractedFiling:
+    """Parse one ZIP without touching any DB (e.g. in a parser process feeding a writer)."""
+    zip_path = _seekable(zip_path)
+    zip_hash = zip_sha256 or _sha256_source(zip_path)
+    with zip_context(zip_path) as zf:
+        return _extract(zf, zip_hash, zip_name or _source_name(zip_path), keep_raw_text=keep_raw_text)
+
+
+class _ZipParts:
+    """Extracts each stage's rows from an open ZIP only when that stage runs."""
+
+    def __init__(self, zf: zipfile.ZipFile, *, keep_raw_text: bool = False):
+        self.zf = zf
+        self.keep_raw_text = keep_raw_text
+        # The ZIP is opened once; extractors read members from the same ZipFile
+        self.targets = discover_targets(zf)
+        self.warnings: list[str] = []
+
+    def load_contexts_units(self, warnings: list[str]) -> tuple[list[Context], list[Unit]]:
+        contexts: list[Context] = []
+        units: list[Unit] = []
+        for ixbrl_path in self.targets.ixbrl_files:
+            contexts.extend(extract_contexts_from_ixbrl(self.zf, ixbrl_path, warnings))
+            units.extend(extract_units_from_ixbrl(self.zf, ixbrl_path, warnings))
+        return contexts, units
+
+    def load_facts(self, warnings: list[str]) -> FactBatch:
+        batch = FactBatch(keep_raw_text=self.keep_raw_text)
+        for ixbrl_path in self.targets.ixbrl_files:
+            extract_fact_batch_from_ixbrl(self.zf, ixbrl_path, warnings, batch=batch)
+        return batch
+
+    def load_labels(self, warnings: list[str]) -> list[Label]:
+        labels: list[Label] = []
+        for lab_path in self.targets.label_files:
+            labels.extend(extract_labels(self.zf, lab_path, warnings))
+        return labels
+
+
+def _extract(zf: zipfile.ZipFile, zip_hash: str, zip_name: str, *, keep_raw_text: bool = False) -> ExtractedFiling:
+    parts = _ZipParts(zf, keep_raw_text=keep_raw_text)
     warnings: list[str] = []
+    contexts, units = parts.load_contexts_units(warnings)
+    facts = parts.load_facts(warnings)
+    labels = parts.load_labels(warnings)
+    return ExtractedFiling(
+        zip_name=zip_name,
+        zip_sha256=zip_hash,
+        contexts=contexts,
+        units=units,
+        facts=facts,
+        labels=labels,
+        warnings=warnings,
+    )
 
-    zip_hash = sha256_file(zip_path)
 
-    with connect(db_path) as con:
+def _skipped(filing_id: int) -> IngestResult:
+    return IngestResult(
+        filing_id=filing_id,
+        facts=0,
+        contexts=0,
+        units=0,
+        labels=0,
+        warnings=["Skipped duplicate ZIP"],
+    )
+
+
+def _write(
+    con: sqlite3.Connection,
+    filing_id: int,
+    parts: ExtractedFiling | _ZipParts,
+    *,
+    checkpoint: Callable[[], None] | None = None,
+    commit_rows: int | None = None,
+) -> IngestResult:
+    """Run the stages after the filing's last completed one, marking each as it finishes.
+
+    `checkpoint` (e.g. `con.commit`) runs after every stage and, with `commit_rows`,
+    after every `commit_rows` facts.
+    """
+    warnings = list(parts.warnings)
+    done = get_ingest_stage(con, filing_id)
+    todo = INGEST_STAGES[INGEST_STAGES.index(done) + 1 :] if done else INGEST_STAGES
+    if done:
+        warnings.append(f"Resumed after stage {done!r}")
+
+    def finish(stage: str) -> None:
+        mark_ingest_stage(con, filing_id, stage)
+        if checkpoint is not None:
+            checkpoint()
+
+    ctx_count = unit_count = fact_count = label_count = 0
+
+    # ✅ contexts / units first
+    if "contexts" in todo:
+        contexts, units = parts.load_contexts_units(warnings)
+        ctx_count = upsert_contexts(con, filing_id, contexts)
+        unit_count = upsert_units(con, filing_id, units)
+
+        if ctx_count == 0:
+            warnings.append("[context] No contexts extracted from any iXBRL file.")
+        if unit_count == 0:
+            warnings.append("[unit] No units extracted from any iXBRL file.")
+        finish("contexts")
+
+    # ✅ facts
+    if "facts" in todo:
+        fact_count = upsert_facts(
+            con,
+            filing_id,
+            parts.load_facts(warnings),
+            chunk_size=commit_rows or 2000,
+            on_chunk=checkpoint if commit_rows else None,
+        )
+        finish("facts")
+
+    # ✅ summary / counters (only this filing's rows)
+    if "summary" in todo:
+        refresh_primary_financials(con, filing_id)
+        update_filing_counts(con, filing_id)
+        finish("summary")
+
+    # ✅ labels
+    if "labels" in todo:
+        label_count = upsert_labels(con, parts.load_labels(warnings))
+        finish("labels")
+
+    return IngestResult(
+        filing_id=filing_id,
+        facts=fact_count,
+        contexts=ctx_count,
+        units=unit_count,
+        labels=label_count,
+        warnings=warnings,
+    )
+
+
+def store_filing(con: sqlite3.Connection, extracted: ExtractedFiling, on_duplicate: str = "skip") -> IngestResult:
+    """Write a parsed filing in the caller's transaction (the schema must already exist)."""
+    filing_id, skipped = get_or_create_filing(
+        con,
+        zip_path=extracted.zip_name,
+        zip_sha256=extracted.zip_sha256,
+        on_duplicate=on_duplicate,
+    )
+    if skipped:
+        return _skipped(filing_id)
+    return _write(con, filing_id, extracted)
+
+
+def run_pipeline(
+    zip_path: ZipSource,
+    db_path: str,
+    on_duplicate: str = "skip",
+    *,
+    zip_sha256: str | None = None,
+    zip_name: str | None = None,
+    commit: str = "filing",
+    commit_rows: int | None = None,
+    keep_raw_text: bool = False,
+) -> IngestResult:
+    """Ingest one ZIP.
+
+    `zip_path` may also be an in-memory buffer (bytes / bytearray / memoryview) or a
+    binary file object; hashing and member reads then use it directly, without a temp file.
+    `zip_name` is stored as `filings.zip_name` (default: the file name, or "<memory>").
+
+    `zip_sha256` lets callers that already hashed the ZIP (e.g. while downloading it)
+    skip re-reading the whole file just to hash it.
+
+    Commit granularity:
+    - commit="filing" (default): one transaction; a failure leaves nothing behind.
+    - commit="stage": commit after each of INGEST_STAGES. A failed ingest keeps the
+      completed stages, and the next run (on_duplicate="skip") resumes after them.
+    - commit_rows=N: additionally commit every N facts (implies per-stage commits).
+
+    `facts.raw_text` (the element text before normalization) is only stored with
+    `keep_raw_text=True`; `value_text` already holds the normalized value.
+    """
+    if commit not in COMMIT_MODES:
+        raise ValueError(f"Unknown commit mode: {commit!r}")
+
+    zip_path = _seekable(zip_path)
+    zip_hash = zip_sha256 or _sha256_source(zip_path)
+    name = zip_name or _source_name(zip_path)
+
+    with zip_context(zip_path) as zf, connect(db_path) as con:
         ensure_schema(con)
 
         filing_id, skipped = get_or_create_filing(
             con,
-            zip_path=zip_path,
+            zip_path=name,
             zip_sha256=zip_hash,
             on_duplicate=on_duplicate,
         )
 
         if skipped:
-            return IngestResult(
-                filing_id=filing_id,
-                facts=0,
-                contexts=0,
-                units=0,
-                labels=0,
-                warnings=["Skipped duplicate ZIP"],
-            )
-
-        targets = discover_targets(zip_path)
-
-        # ✅ contexts / units first
-        all_contexts = []
-        all_units = []
-        for ixbrl_path in targets.ixbrl_files:
-            all_contexts.extend(extract_contexts_from_ixbrl(zip_path, ixbrl_path, warnings))
-            all_units.extend(extract_units_from_ixbrl(zip_path, ixbrl_path, warnings))
-
-        ctx_count = upsert_contexts(con, filing_id, all_contexts)
-        unit_count = upsert_units(con, filing_id, all_units)
-
-        if ctx_count == 0:
-            warnings.append("[context] No contexts extracted from any iXBRL file.")
-        if unit_count == 0:
-            warnings.append("[unit] No units extracted from any iXBRL file.")
+            return _skipped(filing_id)
 
-        # ✅ facts
-        all_facts = []
-        for ixbrl_path in targets.ixbrl_files:
-            all_facts.extend(extract_facts_from_ixbrl(zip_path, ixbrl_path, warnings))
-        fact_count = upsert_facts(con, filing_id, all_facts)
-
-        # ✅ labels
-        all_labels = []
-        for lab_path in targets.label_files:
-            all_labels.extend(extract_labels(zip_path, lab_path, warnings))
-        label_count = upsert_labels(con, all_labels)
-
-        return IngestResult(
-            filing_id=filing_id,
-            facts=fact_count,
-            contexts=ctx_count,
-            units=unit_count,
-            labels=label_count,
-            warnings=warnings,
+        checkpoint = con.commit if commit == "stage" or commit_rows else None
+        if checkpoint is not None:
+            checkpoint()
+        return _write(
+            con,
+            filing_id,
+            _ZipParts(zf, keep_raw_text=keep_raw_text),
+            checkpoint=checkpoint,
+            commit_rows=commit_rows,
         )
+
+
+def run_batch(
+    zip_paths: Iterable[ZipSource],
+    db_path: str,
+    on_duplicate: str = "skip",
+    *,
+    commit_every: int = 10,
+    keep_raw_text: bool = False,
+) -> list[IngestResult | Exception]:
+    """Ingest many ZIPs on one connection, committing every `commit_every` filings.
+
+    Each filing runs in its own SAVEPOINT: a failing ZIP is rolled back alone and returned
+    as its exception, and the WAL only grows by one batch between commits.
+    """
+    results: list[IngestResult | Exception] = []
+    with connect(db_path) as con:
+        ensure_schema(con)
+        con.commit()
+
+        pending = 0
+        for source in zip_paths:
+            if not con.in_transaction:
+                con.execute("BEGIN")
+            con.execute("SAVEPOINT filing")
+            try:
+                source = _seekable(source)
+                zip_hash = _sha256_source(source)
+                with zip_context(source) as zf:
+                    filing_id, skipped = get_or_create_filing(
+                        con,
+                        zip_path=_source_name(source),
+                        zip_sha256=zip_hash,
+                        on_duplicate=on_duplicate,
+                    )
+                    if skipped:
+                        result = _skipped(filing_id)
+                    else:
+                        result = _write(con, filing_id, _ZipParts(zf, keep_raw_text=keep_raw_text))
+                con.execute("RELEASE filing")
+                results.append(result)
+            except Exception as e:
+                con.execute("ROLLBACK TO filing")
+                con.execute("RELEASE filing")
+                results.append(e)
+
+            pending += 1
+            if pending >= commit_every:
+                con.commit()
+                pending = 0
+    return results
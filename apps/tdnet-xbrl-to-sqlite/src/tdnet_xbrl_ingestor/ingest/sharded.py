@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterable
+
+from tdnet_xbrl_ingestor.db.shards import ShardLayout, connect_catalog
+from tdnet_xbrl_ingestor.extract.xbrl_contexts import extract_contexts_from_ixbrl
+from tdnet_xbrl_ingestor.ingest.discover import discover_targets
+from tdnet_xbrl_ingestor.ingest.pipeline import IngestResult, _seekable, _sha256_source, _source_name, run_pipeline
+from tdnet_xbrl_ingestor.models.entities import Context
+from tdnet_xbrl_ingestor.utils.zipreader import ZipSource, zip_context
+
+
+def current_period_end(contexts: Iterable[Context]) -> str | None:
+    """Latest end date of the `Current*` contexts (falls back to any context)."""
+    current: list[str] = []
+    others: list[str] = []
+    for c in contexts:
+        date = c.end_date or c.instant_date
+        if not date:
+            continue
+        (current if c.context_ref.startswith("Current") else others).append(date)
+    dates = current or others
+    return max(dates) if dates else None
+
+
+def run_sharded_pipeline(
+    zip_path: ZipSource,
+    root: str | Path,
+    on_duplicate: str = "skip",
+    *,
+    granularity: str = "year",
+    zip_sha256: str | None = None,
+    zip_name: str | None = None,
+    commit: str = "filing",
+    commit_rows: int | None = None,
+    keep_raw_text: bool = False,
+) -> IngestResult:
+    """Ingest one ZIP into the shard of its current fiscal period (`root/filings_<key>.sqlite`).
+
+    The catalog (`root/catalog.sqlite`) maps every ZIP hash to its shard, so duplicates are
+    detected without opening the shards. Compacted (read-only) shards are never written.
+    `commit` / `commit_rows` / `keep_raw_text` are passed to run_pipeline; a filing is only added to the
+    catalog once complete, so a failed staged ingest resumes in its shard on the next run.
+    """
+    layout = ShardLayout(Path(root), granularity)
+
+    zip_path = _seekable(zip_path)
+
+    zip_hash = zip_sha256 or _sha256_source(zip_path)
+    name = zip_name or _source_name(zip_path)
+
+    with connect_catalog(layout) as cat:
+        row = cat.execute(
+            "SELECT shard, filing_id FROM catalog_filings WHERE zip_sha256 = ?", (zip_hash,)
+        ).fetchone()
+        if row is not None and on_duplicate == "skip":
+            return IngestResult(
+                filing_id=int(row["filing_id"]),
+                facts=0,
+                contexts=0,
+                units=0,
+                labels=0,
+                warnings=[f"Skipped duplicate ZIP (shard={row['shard']})"],
+            )
+
+    with zip_context(zip_path) as zf:
+        if row is not None:
+            # replace: stay in the shard the filing already lives in
+            key = str(row["shard"])
+            period_end = None
+        else:
+            contexts: list[Context] = []
+            ignored: list[str] = []
+            for ixbrl_path in discover_targets(zf).ixbrl_files:
+                contexts.extend(extract_contexts_from_ixbrl(zf, ixbrl_path, ignored))
+            period_end = current_period_end(contexts)
+            key = layout.shard_key(period_end)
+
+        shard_path = layout.shard_path(key)
+        with connect_catalog(layout) as cat:
+            shard = cat.execute("SELECT read_only FROM shards WHERE shard = ?", (key,)).fetchone()
+            if shard is not None and shard["read_only"]:
+                raise PermissionError(f"Shard {key} is compacted (read-only): {shard_path}")
+            # Registered before writing, so partially committed (staged) ingests stay visible
+            cat.execute(
+                "INSERT INTO shards (shard, path) VALUES (?, ?) ON CONFLICT(shard) DO NOTHING",
+                (key, str(shard_path)),
+            )
+
+        result = run_pipeline(
+            zf,
+            str(shard_path),
+            on_duplicate,
+            zip_sha256=zip_hash,
+            zip_name=name,
+            commit=commit,
+            commit_rows=commit_rows,
+            keep_raw_text=keep_raw_text,
+        )
+
+    with connect_catalog(layout) as cat:
+        cat.execute(
+            """
+            INSERT INTO catalog_filings (zip_sha256, zip_name, shard, filing_id, period_end)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(zip_sha256) DO UPDATE SET
+              zip_name = excluded.zip_name,
+              filing_id = excluded.filing_id,
+              ingested_at = datetime('now')
+            """,
+            (zip_hash, name, key, result.filing_id, period_end),
+        )
+
+    return result
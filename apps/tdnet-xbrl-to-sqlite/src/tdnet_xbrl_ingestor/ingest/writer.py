@@ -0,0 +1,341 @@
+from __future__ import annotations
+
+import ipaddress
+import os
+import queue
+import secrets
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing.connection import Client, Connection, Listener
+from pathlib import Path
+from typing import Iterable
+
+from tdnet_xbrl_ingestor.db.connect import connect
+from tdnet_xbrl_ingestor.db.repo import INGEST_STAGES
+from tdnet_xbrl_ingestor.db.schema import ensure_schema
+from tdnet_xbrl_ingestor.ingest.pipeline import (
+    ExtractedFiling,
+    IngestResult,
+    _seekable,
+    _sha256_source,
+    _skipped,
+    extract_filing,
+    store_filing,
+)
+from tdnet_xbrl_ingestor.utils.zipreader import ZipSource
+
+
+# One writer process owns the DB; parser processes send ExtractedFiling batches to it.
+# Messages are pickled over multiprocessing.connection (unpickling runs code), so the
+# service only binds loopback addresses and every client must present a secret authkey:
+# TDNET_WRITER_AUTHKEY, or a random key kept in `<db>.writer-key` (mode 0600).
+
+DEFAULT_ADDRESS = ("127.0.0.1", 47650)
+AUTHKEY_ENV = "TDNET_WRITER_AUTHKEY"
+KEY_FILE_SUFFIX = ".writer-key"
+
+
+def key_file(db_path: str | Path) -> Path:
+    return Path(f"{db_path}{KEY_FILE_SUFFIX}")
+
+
+def load_or_create_authkey(db_path: str | Path) -> bytes:
+    """Service side: TDNET_WRITER_AUTHKEY, else the key file next to the DB (created once)."""
+    env = os.environ.get(AUTHKEY_ENV)
+    if env:
+        return env.encode("utf-8")
+    path = key_file(db_path)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        return path.read_bytes().strip()
+    with os.fdopen(fd, "w", encoding="ascii") as f:
+        f.write(secrets.token_hex(32))
+    return path.read_bytes().strip()
+
+
+def resolve_authkey(db_path: str | Path | None = None) -> bytes:
+    """Client side: TDNET_WRITER_AUTHKEY, else the key file the service created for `db_path`."""
+    env = os.environ.get(AUTHKEY_ENV)
+    if env:
+        return env.encode("utf-8")
+    if db_path is not None and key_file(db_path).exists():
+        return key_file(db_path).read_bytes().strip()
+    raise RuntimeError(
+        f"No writer authkey: set {AUTHKEY_ENV} or pass the DB path whose {KEY_FILE_SUFFIX} file the service created"
+    )
+
+
+def check_loopback(address: tuple[str, int]) -> None:
+    host = address[0]
+    if host == "localhost":
+        return
+    try:
+        loopback = ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        loopback = False
+    if not loopback:
+        raise ValueError(f"Writer service address must be loopback (127.0.0.1 / ::1 / localhost): {host!r}")
+
+
+def parse_address(text: str) -> tuple[str, int]:
+    """'127.0.0.1:47650' / ':47650' -> (host, port). Non-loopback hosts are rejected."""
+    host, _, port = text.rpartition(":")
+    address = (host.strip("[]") or DEFAULT_ADDRESS[0], int(port))
+    check_loopback(address)
+    return address
+
+
+@dataclass
+class _Job:
+    extracted: ExtractedFiling
+    on_duplicate: str
+    future: Future
+
+
+class WriterService:
+    """Single DB writer that group-commits filings sent by any number of local clients.
+
+    Jobs arriving within `max_wait_ms` of each other (up to `max_batch`) share one
+    transaction; each filing runs in its own SAVEPOINT so a bad one does not undo the rest.
+    Clients get their IngestResult only after the group is committed.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        address: tuple[str, int] = DEFAULT_ADDRESS,
+        *,
+        authkey: bytes | None = None,
+        max_batch: int = 32,
+        max_wait_ms: int = 200,
+    ):
+        check_loopback(address)
+        self.db_path = db_path
+        self.address = address
+        self.authkey = authkey if authkey is not None else load_or_create_authkey(db_path)
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self._jobs: queue.Queue[_Job | None] = queue.Queue()
+        self._listener: Listener | None = None
+        self._writer: threading.Thread | None = None
+        self._closed = threading.Event()
+        self.commits = 0
+
+    # --- lifecycle ---
+
+    def start(self) -> tuple[str, int]:
+        """Create the schema, start the writer thread and listen. Returns the bound address."""
+        with connect(self.db_path) as con:
+            ensure_schema(con)
+        self._listener = Listener(self.address, authkey=self.authkey)
+        self._writer = threading.Thread(target=self._write_loop, name="tdnet-writer", daemon=True)
+        self._writer.start()
+        return self._listener.address
+
+    def serve_forever(self) -> None:
+        if self._listener is None:
+            self.start()
+        assert self._listener is not None
+        try:
+            while not self._closed.is_set():
+                try:
+                    conn = self._listener.accept()
+                except OSError:
+                    if self._closed.is_set():
+                        break
+                    raise
+                except Exception as e:  # bad authkey etc.: keep serving
+                    print(f"[WRITER][WARN] rejected client: {e}")
+                    continue
+                threading.Thread(target=self._serve_client, args=(conn,), daemon=True).start()
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        if self._listener is not None:
+            self._listener.close()
+        self._jobs.put(None)
+        if self._writer is not None:
+            self._writer.join()
+
+    # --- per client ---
+
+    def _serve_client(self, conn: Connection) -> None:
+        with conn:
+            while True:
+                try:
+                    msg = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    reply = self._handle(msg)
+                except Exception as e:
+                    reply = e
+                try:
+                    conn.send(reply)
+                except (BrokenPipeError, OSError):
+                    return
+
+    def _handle(self, msg: tuple):
+        kind = msg[0]
+        if kind == "has":
+            # lets parsers skip already ingested ZIPs before parsing them; a filing whose
+            # staged ingest stopped part-way is not reported, so it gets resumed
+            with connect(self.db_path) as con:
+                row = con.execute(
+                    "SELECT id FROM filings WHERE zip_sha256 = ? AND ingest_stage = ?",
+                    (msg[1], INGEST_STAGES[-1]),
+                ).fetchone()
+            return int(row["id"]) if row is not None else None
+        if kind == "store":
+            if self._closed.is_set():
+                raise RuntimeError("writer service is closed")
+            job = _Job(msg[1], msg[2], Future())
+            self._jobs.put(job)
+            return job.future.result()
+        raise ValueError(f"Unknown writer message: {kind!r}")
+
+    # --- writer thread ---
+
+    def _next_group(self) -> list[_Job] | None:
+        first = self._jobs.get()
+        if first is None:
+            return None
+        group = [first]
+        deadline = time.monotonic() + self.max_wait_ms / 1000
+        while len(group) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                job = self._jobs.get(timeout=max(remaining, 0)) if remaining > 0 else self._jobs.get_nowait()
+            except queue.Empty:
+                break
+            if job is None:
+                self._jobs.put(None)  # stop after this group
+                break
+            group.append(job)
+        return group
+
+    def _write_loop(self) -> None:
+        while True:
+            group = self._next_group()
+            if group is None:
+                return
+            self._commit_group(group)
+
+    def _commit_group(self, group: list[_Job]) -> None:
+        results: list[tuple[_Job, IngestResult | BaseException]] = []
+        try:
+            with connect(self.db_path) as con:
+                con.execute("BEGIN IMMEDIATE")
+                for job in group:
+                    con.execute("SAVEPOINT filing")
+                    try:
+                        results.append((job, store_filing(con, job.extracted, job.on_duplicate)))
+                        con.execute("RELEASE filing")
+                    except Exception as e:
+                        con.execute("ROLLBACK TO filing")
+                        con.execute("RELEASE filing")
+                        results.append((job, e))
+            self.commits += 1
+        except Exception as e:
+            for job in group:
+                if not job.future.done():
+                    job.future.set_exception(e)
+            return
+
+        for job, outcome in results:
+            if isinstance(outcome, BaseException):
+                job.future.set_exception(outcome)
+            else:
+                job.future.set_result(outcome)
+
+
+class WriterClient:
+    """Connection from a parser process to a running WriterService."""
+
+    def __init__(
+        self,
+        address: tuple[str, int] = DEFAULT_ADDRESS,
+        *,
+        authkey: bytes | None = None,
+        db_path: str | Path | None = None,
+    ):
+        """`db_path` locates the service's key file when TDNET_WRITER_AUTHKEY is not set."""
+        check_loopback(address)
+        self._conn = Client(address, authkey=authkey if authkey is not None else resolve_authkey(db_path))
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> WriterClient:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _call(self, *msg):
+        self._conn.send(msg)
+        reply = self._conn.recv()
+        if isinstance(reply, BaseException):
+            raise reply
+        return reply
+
+    def existing_filing_id(self, zip_sha256: str) -> int | None:
+        """Id of the completely ingested filing with this hash (None if absent or unfinished)."""
+        return self._call("has", zip_sha256)
+
+    def store(self, extracted: ExtractedFiling, on_duplicate: str = "skip") -> IngestResult:
+        return self._call("store", extracted, on_duplicate)
+
+    def ingest(
+        self,
+        zip_path: ZipSource,
+        on_duplicate: str = "skip",
+        *,
+        zip_sha256: str | None = None,
+        zip_name: str | None = None,
+        keep_raw_text: bool = False,
+    ) -> IngestResult:
+        """Parse locally, then hand the rows to the writer (duplicates are not parsed)."""
+        zip_path = _seekable(zip_path)
+        zip_hash = zip_sha256 or _sha256_source(zip_path)
+        if on_duplicate == "skip":
+            filing_id = self.existing_filing_id(zip_hash)
+            if filing_id is not None:
+                return _skipped(filing_id)
+        extracted = extract_filing(zip_path, zip_sha256=zip_hash, zip_name=zip_name, keep_raw_text=keep_raw_text)
+        return self.store(extracted, on_duplicate)
+
+
+def _ingest_one(zip_path: str, address: tuple[str, int], authkey: bytes, on_duplicate: str) -> IngestResult:
+    with WriterClient(address, authkey=authkey) as client:
+        return client.ingest(zip_path, on_duplicate)
+
+
+def ingest_many_via_writer(
+    zip_paths: Iterable[str | Path],
+    address: tuple[str, int] = DEFAULT_ADDRESS,
+    *,
+    workers: int | None = None,
+    authkey: bytes | None = None,
+    db_path: str | Path | None = None,
+    on_duplicate: str = "skip",
+) -> dict[str, IngestResult | Exception]:
+    """Parse ZIPs on `workers` processes; all writes go through the writer service."""
+    key = authkey if authkey is not None else resolve_authkey(db_path)
+    paths = [str(p) for p in zip_paths]
+    out: dict[str, IngestResult | Exception] = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {p: pool.submit(_ingest_one, p, address, key, on_duplicate) for p in paths}
+        for path, fut in futures.items():
+            try:
+                out[path] = fut.result()
+            except Exception as e:
+                out[path] = e
+    return out
@@ -2,7 +2,9 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from decimal import Decimal
-from typing import Optional
+from typing import Iterator, Optional
+
+from tdnet_xbrl_ingestor.utils.numeric import split_decimal
 
 
 @dataclass(frozen=True, slots=True)
@@ -25,6 +27,118 @@ class Fact:
     source_locator: str | None
 
 
+# Column order of FactBatch rows (= the facts INSERT column order after filing_id)
+FACT_COLUMNS = (
+    "name", "context_ref", "unit_ref",
+    "decimals", "precision", "scale", "sign",
+    "value_text", "value_num", "value_mantissa", "value_exponent", "is_numeric",
+    "raw_text", "source_file", "source_locator",
+)
+
+
+class FactBatch:
+    """Columnar facts: one list per column, repeated strings interned per batch.
+
+    Extractors append here instead of building a Fact per element, and the repo binds
+    `rows()` tuples directly. `value_num` is the float stored in the REAL column; the exact
+    value is kept as `value_mantissa` * 10**`value_exponent` (see utils.numeric).
+    `raw_text` is only kept when `keep_raw_text`.
+    """
+
+    __slots__ = FACT_COLUMNS + ("keep_raw_text", "_strings")
+
+    def __init__(self, *, keep_raw_text: bool = False):
+        for col in FACT_COLUMNS:
+            setattr(self, col, [])
+        self.keep_raw_text = keep_raw_text
+        self._strings: dict[str, str] = {}
+
+    def __getstate__(self) -> dict:
+        return {col: getattr(self, col) for col in FACT_COLUMNS + ("keep_raw_text",)}
+
+    def __setstate__(self, state: dict) -> None:
+        for col, value in state.items():
+            setattr(self, col, value)
+        self._strings = {}
+
+    def __len__(self) -> int:
+        return len(self.name)
+
+    def _intern(self, value: str | None) -> str | None:
+        if value is None:
+            return None
+        return self._strings.setdefault(value, value)
+
+    def append(
+        self,
+        *,
+        name: str,
+        context_ref: str | None,
+        unit_ref: str | None,
+        decimals: str | None,
+        precision: str | None,
+        scale: str | None,
+        sign: str | None,
+        is_numeric: bool,
+        value_text: str,
+        value_num: Decimal | float | None,
+        raw_text: str | None,
+        source_file: str,
+        source_locator: str | None,
+    ) -> None:
+        intern = self._intern
+        self.name.append(intern(name))
+        self.context_ref.append(intern(context_ref))
+        self.unit_ref.append(intern(unit_ref))
+        self.decimals.append(intern(decimals))
+        self.precision.append(intern(precision))
+        self.scale.append(intern(scale))
+        self.sign.append(intern(sign))
+        self.value_text.append(value_text)
+        self.value_num.append(float(value_num) if value_num is not None else None)
+        mantissa, exponent = split_decimal(value_num) if isinstance(value_num, Decimal) else (None, None)
+        self.value_mantissa.append(mantissa)
+        self.value_exponent.append(exponent)
+        self.is_numeric.append(1 if is_numeric else 0)
+        self.raw_text.append(raw_text if self.keep_raw_text else None)
+        self.source_file.append(intern(source_file))
+        self.source_locator.append(source_locator)
+
+    def extend(self, other: FactBatch) -> None:
+        for col in FACT_COLUMNS:
+            values = getattr(other, col)
+            if col in ("name", "context_ref", "unit_ref", "decimals", "precision", "scale", "sign", "source_file"):
+                values = [self._intern(v) for v in values]
+            getattr(self, col).extend(values)
+
+    def rows(self) -> Iterator[tuple]:
+        """Tuples in FACT_COLUMNS order."""
+        return zip(*(getattr(self, col) for col in FACT_COLUMNS))
+
+    def to_facts(self) -> list[Fact]:
+        return [
+            Fact(
+                name=name,
+                context_ref=context_ref,
+                unit_ref=unit_ref,
+                decimals=decimals,
+                precision=precision,
+                scale=scale,
+                sign=sign,
+                is_numeric=bool(is_numeric),
+                value_text=value_text,
+                value_num=Decimal(value_text) if value_num is not None else None,
+                raw_text=raw_text or "",
+                source_file=source_file,
+                source_locator=source_locator,
+            )
+            for (
+                name, context_ref, unit_ref, decimals, precision, scale, sign,
+                value_text, value_num, _mantissa, _exponent, is_numeric, raw_text, source_file, source_locator,
+            ) in self.rows()
+        ]
+
+
 @dataclass(frozen=True, slots=True)
 class Label:
     concept_name: str
@@ -33,6 +147,13 @@ class Label:
     label_text: str
 
 
+@dataclass(frozen=True, slots=True)
+class Dimension:
+    dimension: str
+    member: str  # explicit: member QName / typed: inner XML
+    dim_type: str  # "explicit" | "typed"
+
+
 @dataclass(frozen=True, slots=True)
 class Context:
     context_ref: str
@@ -43,6 +164,7 @@ class Context:
     start_date: str | None
     end_date: str | None
     dimensions_json: str
+    dimensions: tuple[Dimension, ...] = ()
 
 
 @dataclass(frozen=True, slots=True)
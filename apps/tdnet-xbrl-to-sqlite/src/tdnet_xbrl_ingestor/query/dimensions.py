@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import sqlite3
+from typing import Mapping
+
+
+def find_contexts(
+    con: sqlite3.Connection,
+    members: Mapping[str, str] | None = None,
+    *,
+    exact: bool = False,
+    filing_id: int | None = None,
+) -> list[tuple[int, str]]:
+    """Return `(filing_id, context_ref)` of contexts having all given axis -> member pairs.
+
+    - `members=None` (or empty): contexts without any dimension (e.g. consolidated, default axes).
+    - `exact=True`: the context has no dimensions other than `members`.
+
+    Uses `idx_contexts_has_dimensions` / `idx_context_dimensions_member` instead of
+    scanning `contexts.dimensions_json`.
+    """
+    if not members:
+        sql = "SELECT filing_id, context_ref FROM contexts WHERE has_dimensions = 0"
+        params: list = []
+        if filing_id is not None:
+            sql += " AND filing_id = ?"
+            params.append(filing_id)
+        return [(int(r[0]), str(r[1])) for r in con.execute(sql + " ORDER BY filing_id, context_ref", params)]
+
+    parts = []
+    params = []
+    for dimension, member in members.items():
+        part = "SELECT filing_id, context_ref FROM context_dimensions WHERE dimension = ? AND member = ?"
+        params += [dimension, member]
+        if filing_id is not None:
+            part += " AND filing_id = ?"
+            params.append(filing_id)
+        parts.append(part)
+    sql = " INTERSECT ".join(parts)
+
+    if exact:
+        sql = f"""
+        SELECT m.filing_id, m.context_ref
+        FROM ({sql}) m
+        WHERE (
+          SELECT COUNT(*) FROM context_dimensions d
+          WHERE d.filing_id = m.filing_id AND d.context_ref = m.context_ref
+        ) = ?
+        """
+        params.append(len(members))
+
+    return [(int(r[0]), str(r[1])) for r in con.execute(f"SELECT * FROM ({sql}) ORDER BY 1, 2", params)]
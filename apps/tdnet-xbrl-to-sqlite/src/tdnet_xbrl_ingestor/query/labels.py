@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Iterable
+
+from tdnet_xbrl_ingestor.db.repo import add_label_listener, remove_label_listener
+
+
+STANDARD_LABEL_ROLE = "http://www.xbrl.org/2003/role/label"
+TERSE_LABEL_ROLE = "http://www.xbrl.org/2003/role/terseLabel"
+VERBOSE_LABEL_ROLE = "http://www.xbrl.org/2003/role/verboseLabel"
+
+DEFAULT_ROLES = (STANDARD_LABEL_ROLE, TERSE_LABEL_ROLE, VERBOSE_LABEL_ROLE)
+DEFAULT_LANGS = ("ja", "en")
+
+
+def _stored_id(concept: str) -> str:
+    return concept.replace(":", "_")
+
+
+def _candidates(concept: str) -> list[str]:
+    """Fact names use `prefix:Local`; label linkbases usually reference the `prefix_Local` id."""
+    alt = _stored_id(concept)
+    return [concept] if alt == concept else [concept, alt]
+
+
+class LabelResolver:
+    """Resolve concept names to display labels (e.g. `tse-ed-t:NetSales` -> 売上高).
+
+    Labels are picked by `langs` order first, then `roles` order; any other label of the
+    concept is used as a last resort. Results (including "no label") are kept in a bounded
+    LRU cache. Entries are dropped when `upsert_labels` writes labels for the concept in
+    this process.
+    """
+
+    def __init__(
+        self,
+        con: sqlite3.Connection,
+        *,
+        maxsize: int = 10000,
+        langs: Iterable[str] = DEFAULT_LANGS,
+        roles: Iterable[str] = DEFAULT_ROLES,
+    ):
+        self.con = con
+        self.maxsize = maxsize
+        self._lang_rank = {lang: i for i, lang in enumerate(langs)}
+        self._role_rank = {role: i for i, role in enumerate(roles)}
+        self._cache: OrderedDict[str, str | None] = OrderedDict()
+        # stored id (`prefix_Local`) -> cache keys that depend on it, so invalidation is O(1)
+        self._keys_by_id: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        add_label_listener(self.invalidate)
+
+    def close(self) -> None:
+        remove_label_listener(self.invalidate)
+        self.invalidate()
+
+    # --- cache ---
+
+    def _get(self, key: str) -> tuple[bool, str | None]:
+        with self._lock:
+            if key not in self._cache:
+                return False, None
+            self._cache.move_to_end(key)
+            return True, self._cache[key]
+
+    def _put(self, key: str, label: str | None) -> None:
+        with self._lock:
+            self._cache[key] = label
+            self._cache.move_to_end(key)
+            self._keys_by_id.setdefault(_stored_id(key), set()).add(key)
+            while len(self._cache) > self.maxsize:
+                evicted, _ = self._cache.popitem(last=False)
+                keys = self._keys_by_id[_stored_id(evicted)]
+                keys.discard(evicted)
+                if not keys:
+                    del self._keys_by_id[_stored_id(evicted)]
+
+    def invalidate(self, concepts: Iterable[str] | None = None) -> None:
+        with self._lock:
+            if concepts is None:
+                self._cache.clear()
+                self._keys_by_id.clear()
+                return
+            for concept in concepts:
+                # `prefix:Local` and `prefix_Local` keys both read the labels of either name
+                for key in self._keys_by_id.pop(_stored_id(concept), ()):
+                    del self._cache[key]
+
+    # --- lookup ---
+
+    def _pick(self, rows: list[tuple[str | None, str | None, str]]) -> str | None:
+        if not rows:
+            return None
+        unknown_lang = len(self._lang_rank)
+        unknown_role = len(self._role_rank)
+        role, lang, text = min(
+            rows,
+            key=lambda r: (self._lang_rank.get(r[1], unknown_lang), self._role_rank.get(r[0], unknown_role), r[2]),
+        )
+        return text
+
+    def _fetch(self, names: list[str]) -> dict[str, list[tuple[str | None, str | None, str]]]:
+        rows_by_name: dict[str, list[tuple[str | None, str | None, str]]] = {}
+        if not names:
+            return rows_by_name
+        # One query for the whole batch (json_each avoids the bound-parameter limit)
+        for name, role, lang, text in self.con.execute(
+            """
+            SELECT concept_name, role, lang, label_text
+            FROM labels
+            WHERE concept_name IN (SELECT value FROM json_each(?))
+            """,
+            (json.dumps(names),),
+        ):
+            rows_by_name.setdefault(name, []).append((role, lang, text))
+        return rows_by_name
+
+    def resolve(self, concept: str) -> str | None:
+        return self.resolve_many([concept])[concept]
+
+    def resolve_many(self, concepts: Iterable[str]) -> dict[str, str | None]:
+        out: dict[str, str | None] = {}
+        missing: list[str] = []
+        for concept in concepts:
+            if concept in out:
+                continue
+            found, label = self._get(concept)
+            if not found:
+                # warm() caches stored ids (`prefix_Local`)
+                for alt in _candidates(concept)[1:]:
+                    alt_found, alt_label = self._get(alt)
+                    if alt_found and alt_label is not None:
+                        found, label = True, alt_label
+            if found:
+                self.hits += 1
+                out[concept] = label
+            else:
+                out[concept] = None
+                missing.append(concept)
+
+        if missing:
+            self.misses += len(missing)
+            rows_by_name = self._fetch([name for c in missing for name in _candidates(c)])
+            for concept in missing:
+                label = None
+                for name in _candidates(concept):
+                    label = self._pick(rows_by_name.get(name, []))
+                    if label is not None:
+                        break
+                self._put(concept, label)
+                out[concept] = label
+        return out
+
+    def warm(self, concepts: Iterable[str] | None = None) -> int:
+        """Fill the cache with a single query: the given concepts, or every labelled concept."""
+        if concepts is not None:
+            return len(self.resolve_many(concepts))
+
+        rows_by_name: dict[str, list[tuple[str | None, str | None, str]]] = {}
+        for name, role, lang, text in self.con.execute(
+            "SELECT concept_name, role, lang, label_text FROM labels ORDER BY concept_name"
+        ):
+            rows_by_name.setdefault(name, []).append((role, lang, text))
+
+        count = 0
+        for name, rows in rows_by_name.items():
+            if count >= self.maxsize:
+                break
+            self._put(name, self._pick(rows))
+            count += 1
+        return count
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from dataclasses import dataclass
+from decimal import ROUND_CEILING, ROUND_FLOOR, Decimal
+from typing import Iterable
+
+from tdnet_xbrl_ingestor.utils.numeric import INT64_MAX, INT64_MIN, join_decimal, sum_scaled
+
+
+# Exact numeric queries over facts.value_mantissa / value_exponent
+# (idx_facts_exact). value_num (REAL) is never used, so results do not drift.
+
+
+@dataclass(frozen=True, slots=True)
+class NumericFact:
+    fact_id: int
+    filing_id: int
+    name: str
+    context_ref: str | None
+    unit_ref: str | None
+    value: Decimal
+
+
+def _filters(
+    filing_ids: Iterable[int] | None,
+    context_ref: str | None,
+    unit_ref: str | None,
+) -> tuple[str, list]:
+    sql = ""
+    params: list = []
+    if filing_ids is not None:
+        sql += " AND filing_id IN (SELECT value FROM json_each(?))"
+        params.append(json.dumps(sorted(set(filing_ids))))
+    if context_ref is not None:
+        sql += " AND context_ref = ?"
+        params.append(context_ref)
+    if unit_ref is not None:
+        sql += " AND unit_ref = ?"
+        params.append(unit_ref)
+    return sql, params
+
+
+def _mantissa_bound(value: Decimal, exponent: int, rounding: str) -> int:
+    bound = int(value.scaleb(-exponent).to_integral_value(rounding=rounding))
+    return min(max(bound, INT64_MIN), INT64_MAX)
+
+
+def find_facts_in_range(
+    con: sqlite3.Connection,
+    name: str,
+    low: Decimal | int | None = None,
+    high: Decimal | int | None = None,
+    *,
+    filing_ids: Iterable[int] | None = None,
+    context_ref: str | None = None,
+    unit_ref: str | None = None,
+    limit: int = 1000,
+) -> list[NumericFact]:
+    """Facts of `name` with low <= value <= high (exact), smallest first.
+
+    Each stored exponent is one index range on (name, value_exponent, value_mantissa);
+    amounts in yen all share exponent 0.
+    """
+    extra, extra_params = _filters(filing_ids, context_ref, unit_ref)
+    exponents = [
+        int(r[0])
+        for r in con.execute(
+            "SELECT DISTINCT value_exponent FROM facts WHERE name = ? AND value_mantissa IS NOT NULL",
+            (name,),
+        )
+    ]
+
+    out: list[NumericFact] = []
+    for exponent in exponents:
+        sql = (
+            "SELECT id, filing_id, name, context_ref, unit_ref, value_mantissa FROM facts "
+            "WHERE name = ? AND value_exponent = ? AND value_mantissa IS NOT NULL"
+        )
+        params: list = [name, exponent]
+        if low is not None:
+            sql += " AND value_mantissa >= ?"
+            params.append(_mantissa_bound(Decimal(low), exponent, ROUND_CEILING))
+        if high is not None:
+            sql += " AND value_mantissa <= ?"
+            params.append(_mantissa_bound(Decimal(high), exponent, ROUND_FLOOR))
+        sql += extra + " ORDER BY value_mantissa LIMIT ?"
+        params += extra_params + [limit]
+
+        for fact_id, filing_id, fact_name, ctx, unit, mantissa in con.execute(sql, params):
+            out.append(NumericFact(int(fact_id), int(filing_id), fact_name, ctx, unit, join_decimal(mantissa, exponent)))
+
+    out.sort(key=lambda f: (f.value, f.fact_id))
+    return out[:limit]
+
+
+def sum_facts(
+    con: sqlite3.Connection,
+    name: str,
+    *,
+    filing_ids: Iterable[int] | None = None,
+    context_ref: str | None = None,
+    unit_ref: str | None = None,
+) -> Decimal | None:
+    """Exact total of `name` (None if there is no numeric value).
+
+    SQLite sums the integer mantissas per exponent; only the few per-exponent totals are
+    combined here, with Python ints. Values too large for int64 fall back to their value_text.
+    """
+    extra, extra_params = _filters(filing_ids, context_ref, unit_ref)
+
+    sums: dict[int, int] = {}
+    try:
+        groups = con.execute(
+            "SELECT value_exponent, SUM(value_mantissa) FROM facts "
+            "WHERE name = ? AND value_mantissa IS NOT NULL" + extra + " GROUP BY value_exponent",
+            [name] + extra_params,
+        ).fetchall()
+        for exponent, mantissa_sum in groups:
+            sums[int(exponent)] = int(mantissa_sum)
+    except sqlite3.OperationalError as e:
+        if "overflow" not in str(e):
+            raise
+        # int64 SUM overflow: add the mantissas with Python ints instead
+        for exponent, mantissa in con.execute(
+            "SELECT value_exponent, value_mantissa FROM facts "
+            "WHERE name = ? AND value_mantissa IS NOT NULL" + extra,
+            [name] + extra_params,
+        ):
+            sums[exponent] = sums.get(exponent, 0) + mantissa
+
+    for (value_text,) in con.execute(
+        "SELECT value_text FROM facts "
+        "WHERE name = ? AND is_numeric = 1 AND value_num IS NOT NULL AND value_mantissa IS NULL" + extra,
+        [name] + extra_params,
+    ):
+        sign, digits, exponent = Decimal(value_text).as_tuple()
+        mantissa = int("".join(map(str, digits))) * (-1 if sign else 1)
+        sums[exponent] = sums.get(exponent, 0) + mantissa
+
+    return sum_scaled(sums) if sums else None
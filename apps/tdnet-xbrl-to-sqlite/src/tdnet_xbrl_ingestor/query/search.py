@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import sqlite3
+from dataclasses import dataclass
+
+
+# The trigram index cannot match terms shorter than 3 characters; those fall back to LIKE.
+MIN_FTS_TERM = 3
+
+
+@dataclass(frozen=True, slots=True)
+class FactHit:
+    fact_id: int
+    filing_id: int
+    zip_name: str
+    name: str
+    context_ref: str | None
+    period_type: str | None
+    start_date: str | None
+    end_date: str | None
+    instant_date: str | None
+    snippet: str
+
+
+@dataclass(frozen=True, slots=True)
+class LabelHit:
+    concept_name: str
+    role: str | None
+    lang: str | None
+    label_text: str
+
+
+def _terms(query: str) -> list[str]:
+    return [t for t in query.split() if t]
+
+
+def _match_expr(terms: list[str]) -> str:
+    # Each whitespace-separated term is matched as a literal phrase; all terms must match
+    return " AND ".join('"' + t.replace('"', '""') + '"' for t in terms)
+
+
+def _like(term: str) -> str:
+    return "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def search_facts(
+    con: sqlite3.Connection,
+    query: str,
+    *,
+    limit: int = 50,
+    filing_id: int | None = None,
+) -> list[FactHit]:
+    """Search non-numeric facts (narrative text) with the `facts_fts` trigram index."""
+    terms = _terms(query)
+    if not terms:
+        return []
+
+    fts_terms = [t for t in terms if len(t) >= MIN_FTS_TERM]
+    short_terms = [t for t in terms if len(t) < MIN_FTS_TERM]
+
+    params: list = []
+    where: list[str] = []
+    if fts_terms:
+        source = "facts_fts JOIN facts f ON f.id = facts_fts.rowid"
+        snippet = "snippet(facts_fts, 0, '[', ']', '…', 16)"
+        order = "facts_fts.rank"
+        where.append("facts_fts MATCH ?")
+        params.append(_match_expr(fts_terms))
+    else:
+        source = "facts f"
+        snippet = "substr(f.value_text, 1, 64)"
+        order = "f.id"
+        where.append("f.is_numeric = 0")
+    for term in short_terms:
+        where.append("f.value_text LIKE ? ESCAPE '\\'")
+        params.append(_like(term))
+    if filing_id is not None:
+        where.append("f.filing_id = ?")
+        params.append(filing_id)
+    params.append(limit)
+
+    rows = con.execute(
+        f"""
+        SELECT
+          f.id, f.filing_id, fl.zip_name, f.name, f.context_ref,
+          c.period_type, c.start_date, c.end_date, c.instant_date,
+          {snippet} AS snippet
+        FROM {source}
+        JOIN filings fl ON fl.id = f.filing_id
+        LEFT JOIN contexts c ON c.filing_id = f.filing_id AND c.context_ref = f.context_ref
+        WHERE {" AND ".join(where)}
+        ORDER BY {order}
+        LIMIT ?
+        """,
+        params,
+    ).fetchall()
+
+    return [
+        FactHit(
+            fact_id=int(r[0]),
+            filing_id=int(r[1]),
+            zip_name=str(r[2]),
+            name=str(r[3]),
+            context_ref=r[4],
+            period_type=r[5],
+            start_date=r[6],
+            end_date=r[7],
+            instant_date=r[8],
+            snippet=str(r[9]),
+        )
+        for r in rows
+    ]
+
+
+def search_labels(con: sqlite3.Connection, query: str, *, limit: int = 50) -> list[LabelHit]:
+    """Search concept labels (e.g. 売上高) with the `labels_fts` trigram index."""
+    terms = _terms(query)
+    if not terms:
+        return []
+
+    fts_terms = [t for t in terms if len(t) >= MIN_FTS_TERM]
+    short_terms = [t for t in terms if len(t) < MIN_FTS_TERM]
+
+    params: list = []
+    where: list[str] = []
+    if fts_terms:
+        source = "labels_fts JOIN labels l ON l.id = labels_fts.rowid"
+        order = "labels_fts.rank"
+        where.append("labels_fts MATCH ?")
+        params.append(_match_expr(fts_terms))
+    else:
+        source = "labels l"
+        order = "l.concept_name"
+    for term in short_terms:
+        where.append("l.label_text LIKE ? ESCAPE '\\'")
+        params.append(_like(term))
+    params.append(limit)
+
+    rows = con.execute(
+        f"""
+        SELECT l.concept_name, l.role, l.lang, l.label_text
+        FROM {source}
+        WHERE {" AND ".join(where)}
+        ORDER BY {order}
+        LIMIT ?
+        """,
+        params,
+    ).fetchall()
+    return [LabelHit(concept_name=r[0], role=r[1], lang=r[2], label_text=r[3]) for r in rows]
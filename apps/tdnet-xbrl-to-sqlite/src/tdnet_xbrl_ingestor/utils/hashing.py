@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import hashlib
+from typing import BinaryIO
 
 
 def sha256_file(path: str, *, chunk_size: int = 1024 * 1024) -> str:
@@ -9,3 +10,18 @@ def sha256_file(path: str, *, chunk_size: int = 1024 * 1024) -> str:
         for chunk in iter(lambda: f.read(chunk_size), b""):
             h.update(chunk)
     return h.hexdigest()
+
+
+def sha256_buffer(buffer: bytes | bytearray | memoryview) -> str:
+    # hashlib reads the buffer protocol directly, so memoryviews are not copied
+    return hashlib.sha256(buffer).hexdigest()
+
+
+def sha256_fileobj(f: BinaryIO, *, chunk_size: int = 1024 * 1024) -> str:
+    """Hash a seekable binary file object from the start, then rewind it."""
+    h = hashlib.sha256()
+    f.seek(0)
+    for chunk in iter(lambda: f.read(chunk_size), b""):
+        h.update(chunk)
+    f.seek(0)
+    return h.hexdigest()
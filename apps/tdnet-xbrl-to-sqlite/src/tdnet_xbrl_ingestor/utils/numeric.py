@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from decimal import Decimal
+
+
+# Exact numeric values are stored as value = mantissa * 10**exponent in two INTEGER
+# columns. Integral values always use exponent 0, so yen amounts are stored as plain
+# integers; fractions use the smallest mantissa (12.50 -> (125, -1)).
+
+INT64_MIN = -(2**63)
+INT64_MAX = 2**63 - 1
+
+
+def split_decimal(value: Decimal | None) -> tuple[int | None, int | None]:
+    """Decimal -> (mantissa, exponent); (None, None) if missing, not finite or not int64."""
+    if value is None or not value.is_finite():
+        return None, None
+
+    if value == value.to_integral_value():
+        mantissa, exponent = int(value), 0
+    else:
+        # as_tuple() is exact; normalize() would round to the context precision
+        sign, digits, exponent = value.as_tuple()
+        mantissa = int("".join(map(str, digits)))
+        while mantissa % 10 == 0:
+            mantissa //= 10
+            exponent += 1
+        if sign:
+            mantissa = -mantissa
+
+    if not INT64_MIN <= mantissa <= INT64_MAX:
+        return None, None
+    return mantissa, exponent
+
+
+def join_decimal(mantissa: int, exponent: int) -> Decimal:
+    # Built from the digit tuple: exact for any size (arithmetic would round to 28 digits)
+    digits = tuple(int(d) for d in str(abs(mantissa)))
+    return Decimal((1 if mantissa < 0 else 0, digits, exponent))
+
+
+def sum_scaled(parts: dict[int, int]) -> Decimal:
+    """Exact sum of {exponent: mantissa_total} using integer arithmetic only."""
+    if not parts:
+        return Decimal(0)
+    base = min(parts)
+    return join_decimal(sum(m * 10 ** (e - base) for e, m in parts.items()), base)
@@ -1,14 +1,83 @@
 from __future__ import annotations
 
+import contextlib
+import io
+import os
 import zipfile
+from typing import BinaryIO, Union
 
+# A ZIP can be given as a path, an in-memory buffer (bytes / bytearray / memoryview),
+# a seekable binary file object, or an already opened ZipFile.
+ZipSource = Union[str, os.PathLike, bytes, bytearray, memoryview, BinaryIO, zipfile.ZipFile]
 
-def read_bytes(zip_path: str, inner_path: str) -> bytes:
-    with zipfile.ZipFile(zip_path) as zf:
+
+class BufferReader(io.RawIOBase):
+    """Seekable read-only file over a buffer, without copying the buffer itself."""
+
+    def __init__(self, buffer: bytes | bytearray | memoryview):
+        self._view = memoryview(buffer).cast("B")
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = len(self._view) + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence!r}")
+        if pos < 0:
+            raise ValueError(f"Negative seek position: {pos}")
+        self._pos = pos
+        return pos
+
+    def readinto(self, b) -> int:
+        chunk = self._view[self._pos : self._pos + len(b)]
+        n = len(chunk)
+        b[:n] = chunk
+        self._pos += n
+        return n
+
+
+def is_buffer(source: ZipSource) -> bool:
+    return isinstance(source, (bytes, bytearray, memoryview))
+
+
+def open_zip(source: ZipSource) -> zipfile.ZipFile:
+    """Open any ZipSource as a ZipFile (an already opened ZipFile is returned as is)."""
+    if isinstance(source, zipfile.ZipFile):
+        return source
+    if is_buffer(source):
+        return zipfile.ZipFile(BufferReader(source))
+    if hasattr(source, "read") and not source.seekable():
+        # zipfile needs random access (central directory is at the end)
+        return zipfile.ZipFile(io.BytesIO(source.read()))
+    return zipfile.ZipFile(source)
+
+
+def zip_context(source: ZipSource):
+    """Context manager yielding a ZipFile; closes it only if it was opened here."""
+    if isinstance(source, zipfile.ZipFile):
+        return contextlib.nullcontext(source)
+    return open_zip(source)
+
+
+def read_bytes(zip_path: ZipSource, inner_path: str) -> bytes:
+    with zip_context(zip_path) as zf:
         return zf.read(inner_path)
 
 
-def read_text(zip_path: str, inner_path: str, encoding: str = "utf-8") -> str:
+def read_text(zip_path: ZipSource, inner_path: str, encoding: str = "utf-8") -> str:
     data = read_bytes(zip_path, inner_path)
     # TDnetはUTF-8が多い。念のためBOM除去。
     text = data.decode(encoding, errors="replace")
@@ -70,12 +70,14 @@ class ZipIngestHandler(FileSystemEventHandler):
         on_duplicate: str = "skip",
         move_policy: MovePolicy | None = None,
         stable_timeout_sec: float = 60.0,
+        writer_address: tuple[str, int] | None = None,
     ):
         self.watch_dir = watch_dir
         self.db_path = db_path
         self.on_duplicate = on_duplicate
         self.move_policy = move_policy or MovePolicy(None, None)
         self.stable_timeout_sec = stable_timeout_sec
+        self.writer_address = writer_address
         self.move_policy.ensure_dirs()
 
     # Some apps write via temp file then rename; handle both.
@@ -107,11 +109,18 @@ class ZipIngestHandler(FileSystemEventHandler):
             return
 
         try:
-            result = run_pipeline(
-                zip_path=str(path),
-                db_path=str(self.db_path),
-                on_duplicate=self.on_duplicate,
-            )
+            if self.writer_address is not None:
+                # Parse here, let the writer service own the DB
+                from tdnet_xbrl_ingestor.ingest.writer import WriterClient
+
+                with WriterClient(self.writer_address, db_path=self.db_path) as client:
+                    result = client.ingest(str(path), self.on_duplicate)
+            else:
+                result = run_pipeline(
+                    zip_path=str(path),
+                    db_path=str(self.db_path),
+                    on_duplicate=self.on_duplicate,
+                )
             print(
                 f"[WATCH] ingested {path.name}: filing_id={result.filing_id} facts={result.facts} contexts={result.contexts} units={result.units}"
             )
@@ -143,6 +152,7 @@ def watch_folder(
     processed_dir: str | Path | None = "processed",
     failed_dir: str | Path | None = "failed",
     stable_timeout_sec: float = 60.0,
+    writer_address: tuple[str, int] | None = None,
 ) -> None:
     """Watch a folder for new ZIPs and ingest them.
 
@@ -150,6 +160,7 @@ def watch_folder(
 
     - If `processed_dir`/`failed_dir` are relative paths, they are created under `watch_dir`.
     - Pass None to disable moving.
+    - With `writer_address`, ZIPs are parsed here and written by a running writer service.
     """
 
     watch_dir = Path(watch_dir).resolve()
@@ -172,6 +183,7 @@ def watch_folder(
         on_duplicate=on_duplicate,
         move_policy=move_policy,
         stable_timeout_sec=stable_timeout_sec,
+        writer_address=writer_address,
     )
 
     observer = Observer()
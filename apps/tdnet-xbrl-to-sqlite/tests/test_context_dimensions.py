@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import zipfile
+from pathlib import Path
+
+from tdnet_xbrl_ingestor.db.connect import connect
+from tdnet_xbrl_ingestor.ingest.pipeline import run_pipeline
+from tdnet_xbrl_ingestor.query.dimensions import find_contexts
+
+
+AXIS = "jpcrp_cor:ConsolidatedOrNonConsolidatedAxis"
+
+
+def _context(cid: str, *members: tuple[str, str]) -> str:
+    segment = ""
+    if members:
+        segment = "<xbrli:segment>" + "".join(
+            f'<xbrldi:explicitMember dimension="{d}">{m}</xbrldi:explicitMember>' for d, m in members
+        ) + "</xbrli:segment>"
+    return (
+        f'<xbrli:context id="{cid}"><xbrli:entity>'
+        f'<xbrli:identifier scheme="http://disclosure.edinet-fsa.go.jp">E00001</xbrli:identifier>{segment}'
+        "</xbrli:entity><xbrli:period><xbrli:instant>2026-03-31</xbrli:instant></xbrli:period></xbrli:context>"
+    )
+
+
+def test_context_dimensions_index(tmp_path: Path):
+    contexts = "".join(
+        [
+            _context("Consolidated"),
+            _context("NonConsolidated", (AXIS, "jpcrp_cor:NonConsolidatedMember")),
+            _context(
+                "NonConsolidatedSegment",
+                (AXIS, "jpcrp_cor:NonConsolidatedMember"),
+                ("jpcrp_cor:OperatingSegmentsAxis", "X:SegmentAMember"),
+            ),
+        ]
+    )
+    xhtml = f"""<?xml version="1.0" encoding="utf-8"?>
+    <html xmlns="http://www.w3.org/1999/xhtml"
+          xmlns:ix="http://www.xbrl.org/2008/inlineXBRL"
+          xmlns:xbrli="http://www.xbrl.org/2003/instance"
+          xmlns:xbrldi="http://xbrl.org/2006/xbrldi">
+      <body><ix:header><ix:resources>{contexts}</ix:resources></ix:header></body>
+    </html>
+    """.encode("utf-8")
+
+    zip_path = tmp_path / "sample.zip"
+    with zipfile.ZipFile(zip_path, "w") as zf:
+        zf.writestr("XBRLData/Summary/sample-ixbrl.htm", xhtml)
+
+    db_path = str(tmp_path / "db.sqlite")
+    result = run_pipeline(str(zip_path), db_path)
+
+    with connect(db_path) as con:
+        assert find_contexts(con) == [(result.filing_id, "Consolidated")]
+
+        members = {AXIS: "jpcrp_cor:NonConsolidatedMember"}
+        assert [ref for _, ref in find_contexts(con, members)] == ["NonConsolidated", "NonConsolidatedSegment"]
+        assert [ref for _, ref in find_contexts(con, members, exact=True)] == ["NonConsolidated"]
+
+    # replace re-ingest must not leave stale dimension rows
+    run_pipeline(str(zip_path), db_path, on_duplicate="replace")
+    with connect(db_path) as con:
+        assert con.execute("SELECT COUNT(*) FROM context_dimensions").fetchone()[0] == 3
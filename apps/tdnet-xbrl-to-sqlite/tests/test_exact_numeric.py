@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import zipfile
+from decimal import Decimal
+from pathlib import Path
+
+from tdnet_xbrl_ingestor.db.connect import connect
+from tdnet_xbrl_ingestor.ingest.pipeline import run_pipeline
+from tdnet_xbrl_ingestor.query.numeric import find_facts_in_range, sum_facts
+
+
+def _make_zip(path: Path, *facts: tuple[str, str]) -> Path:
+    body = "".join(
+        f'<ix:nonFraction name="{name}" contextRef="CurrentYearDuration" unitRef="JPY" decimals="0">{value}</ix:nonFraction>'
+        for name, value in facts
+    )
+    xhtml = f"""<?xml version="1.0" encoding="utf-8"?>
+    <html xmlns="http://www.w3.org/1999/xhtml"
+          xmlns:ix="http://www.xbrl.org/2008/inlineXBRL">
+      <body>{body}</body>
+    </html>
+    """.encode("utf-8")
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("XBRLData/Summary/sample-ixbrl.htm", xhtml)
+    return path
+
+
+def test_exact_values_sum_and_range(tmp_path: Path):
+    db_path = str(tmp_path / "db.sqlite")
+    # 2**53 + 1 cannot be represented as a float
+    run_pipeline(str(_make_zip(tmp_path / "a.zip", ("tse-ed-t:NetSales", "9,007,199,254,740,993"),
+                               ("tse-ed-t:NetIncomePerShare", "12.50"))), db_path)
+    run_pipeline(str(_make_zip(tmp_path / "b.zip", ("tse-ed-t:NetSales", "1"),
+                               ("tse-ed-t:NetIncomePerShare", "0.25"))), db_path)
+    run_pipeline(str(_make_zip(tmp_path / "c.zip", ("tse-ed-t:NetSales", "△500"))), db_path)
+
+    with connect(db_path) as con:
+        row = con.execute(
+            "SELECT value_mantissa, value_exponent, value_num FROM facts WHERE value_text = '9007199254740993'"
+        ).fetchone()
+        assert (row[0], row[1]) == (9007199254740993, 0)
+        assert int(row[2]) != 9007199254740993
+
+        assert sum_facts(con, "tse-ed-t:NetSales") == Decimal("9007199254740494")
+        assert sum_facts(con, "tse-ed-t:NetSales", filing_ids=[2, 3]) == Decimal("-499")
+        assert sum_facts(con, "tse-ed-t:NetIncomePerShare") == Decimal("12.75")
+        assert sum_facts(con, "tse-ed-t:Missing") is None
+
+        hits = find_facts_in_range(con, "tse-ed-t:NetSales", low=0, high=Decimal("9007199254740993"))
+        assert [h.value for h in hits] == [Decimal(1), Decimal("9007199254740993")]
+        hits = find_facts_in_range(con, "tse-ed-t:NetIncomePerShare", low=Decimal("0.3"))
+        assert [h.value for h in hits] == [Decimal("12.5")]
+
+        plan = " ".join(
+            str(r[-1])
+            for r in con.execute(
+                "EXPLAIN QUERY PLAN SELECT id FROM facts WHERE name = ? AND value_exponent = 0 "
+                "AND value_mantissa IS NOT NULL AND value_mantissa >= ?",
+                ("tse-ed-t:NetSales", 0),
+            )
+        )
+        assert "idx_facts_exact" in plan
+
+
+def test_exact_values_migration_backfills_in_chunks(tmp_path: Path, monkeypatch):
+    from tdnet_xbrl_ingestor.db import schema
+
+    db_path = str(tmp_path / "db.sqlite")
+    facts = [(f"tse-ed-t:Item{i}", f"{i}.5") for i in range(5)] + [("tse-ed-t:NetSales", "9,007,199,254,740,993")]
+    run_pipeline(str(_make_zip(tmp_path / "a.zip", *facts)), db_path)
+
+    with connect(db_path) as con:
+        expected = con.execute("SELECT id, value_mantissa, value_exponent FROM facts ORDER BY id").fetchall()
+        # A DB created before the exact value columns existed
+        con.execute("DROP INDEX idx_facts_exact")
+        con.execute("ALTER TABLE facts DROP COLUMN value_exponent")
+        con.execute("ALTER TABLE facts DROP COLUMN value_mantissa")
+
+    monkeypatch.setattr(schema, "MIGRATION_CHUNK_ROWS", 2)
+    with connect(db_path) as con:
+        schema.ensure_schema(con)
+        rows = con.execute("SELECT id, value_mantissa, value_exponent FROM facts ORDER BY id").fetchall()
+        assert [tuple(r) for r in rows] == [tuple(r) for r in expected]
+        assert (9007199254740993, 0) in [(r[1], r[2]) for r in rows]
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import pickle
+import zipfile
+from pathlib import Path
+
+from tdnet_xbrl_ingestor.db.connect import connect
+from tdnet_xbrl_ingestor.extract.ixbrl_facts import extract_fact_batch_from_ixbrl
+from tdnet_xbrl_ingestor.ingest.pipeline import run_pipeline
+
+
+def _make_zip(tmp_path: Path) -> tuple[Path, str]:
+    xhtml = """<?xml version="1.0" encoding="utf-8"?>
+    <html xmlns="http://www.w3.org/1999/xhtml"
+          xmlns:ix="http://www.xbrl.org/2008/inlineXBRL">
+      <body>
+        <ix:nonFraction name="tse-ed-t:NetSales" contextRef="C1" unitRef="U1" decimals="-6" scale="6">1,234</ix:nonFraction>
+        <ix:nonFraction name="tse-ed-t:NetSales" contextRef="C2" unitRef="U1" decimals="-6" scale="6">△1,000</ix:nonFraction>
+        <ix:nonNumeric name="tse-ed-t:CompanyName" contextRef="C1"> テスト株式会社 </ix:nonNumeric>
+        <ix:nonNumeric contextRef="C1">no name</ix:nonNumeric>
+      </body>
+    </html>
+    """.encode("utf-8")
+    zip_path = tmp_path / "sample.zip"
+    inner = "XBRLData/Summary/sample-ixbrl.htm"
+    with zipfile.ZipFile(zip_path, "w") as zf:
+        zf.writestr(inner, xhtml)
+    return zip_path, inner
+
+
+def test_fact_batch_columns(tmp_path: Path):
+    zip_path, inner = _make_zip(tmp_path)
+
+    batch = extract_fact_batch_from_ixbrl(str(zip_path), inner)
+
+    assert len(batch) == 3
+    assert batch.value_text == ["1234000000", "-1000000000", "テスト株式会社"]
+    assert batch.value_num == [1234000000.0, -1000000000.0, None]
+    assert batch.is_numeric == [1, 1, 0]
+    assert batch.raw_text == [None, None, None]
+    # Repeated strings share one object
+    assert batch.name[0] is batch.name[1]
+    assert batch.source_file[0] is batch.source_file[2]
+
+    restored = pickle.loads(pickle.dumps(batch))
+    assert list(restored.rows()) == list(batch.rows())
+
+    facts = batch.to_facts()
+    assert facts[1].value_num is not None and int(facts[1].value_num) == -1000000000
+
+
+def test_raw_text_is_opt_in(tmp_path: Path):
+    zip_path, _ = _make_zip(tmp_path)
+
+    plain_db = str(tmp_path / "plain.sqlite")
+    raw_db = str(tmp_path / "raw.sqlite")
+    run_pipeline(str(zip_path), plain_db)
+    run_pipeline(str(zip_path), raw_db, keep_raw_text=True)
+
+    query = "SELECT raw_text FROM facts ORDER BY id"
+    with connect(plain_db) as con:
+        assert [r[0] for r in con.execute(query)] == [None, None, None]
+    with connect(raw_db) as con:
+        assert [r[0] for r in con.execute(query)] == ["1,234", "△1,000", "テスト株式会社"]
+
+
+def test_raw_text_flag_reaches_shards(tmp_path: Path):
+    from tdnet_xbrl_ingestor.db.shards import ShardLayout, attach_shards
+    from tdnet_xbrl_ingestor.ingest.sharded import run_sharded_pipeline
+
+    zip_path, _ = _make_zip(tmp_path)
+    root = tmp_path / "shards"
+    run_sharded_pipeline(str(zip_path), root, keep_raw_text=True)
+
+    with attach_shards(ShardLayout(root)) as con:
+        assert [r[0] for r in con.execute("SELECT raw_text FROM facts")] == ["1,234", "△1,000", "テスト株式会社"]
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import sqlite3
+
+from tdnet_xbrl_ingestor.db.repo import upsert_labels
+from tdnet_xbrl_ingestor.db.schema import ensure_schema
+from tdnet_xbrl_ingestor.models.entities import Label
+from tdnet_xbrl_ingestor.query.labels import STANDARD_LABEL_ROLE, TERSE_LABEL_ROLE, LabelResolver
+
+
+def test_label_resolver_prefers_ja_standard_label_and_invalidates():
+    con = sqlite3.connect(":memory:")
+    ensure_schema(con)
+    upsert_labels(
+        con,
+        [
+            Label("tse-ed-t_NetSales", TERSE_LABEL_ROLE, "ja", "売上"),
+            Label("tse-ed-t_NetSales", STANDARD_LABEL_ROLE, "en", "Net sales"),
+            Label("tse-ed-t_NetSales", STANDARD_LABEL_ROLE, "ja", "売上高"),
+        ],
+    )
+
+    resolver = LabelResolver(con, maxsize=10)
+    assert resolver.warm() == 1
+
+    # Fact names use `prefix:Local`; served from the warmed cache
+    assert resolver.resolve("tse-ed-t:NetSales") == "売上高"
+    assert resolver.resolve("tse-ed-t:Unknown") is None
+    assert resolver.hits == 1
+
+    upsert_labels(con, [Label("tse-ed-t:Unknown", STANDARD_LABEL_ROLE, "ja", "不明")])
+    assert resolver.resolve("tse-ed-t:Unknown") == "不明"
+
+    resolver.close()
+
+
+def test_label_resolver_invalidates_both_name_forms_and_stays_bounded():
+    con = sqlite3.connect(":memory:")
+    ensure_schema(con)
+    upsert_labels(con, [Label(f"jppfs_cor_Item{i}", STANDARD_LABEL_ROLE, "ja", f"項目{i}") for i in range(5)])
+
+    resolver = LabelResolver(con, maxsize=3)
+    for i in range(5):
+        assert resolver.resolve(f"jppfs_cor:Item{i}") == f"項目{i}"
+    assert len(resolver._cache) == len(resolver._keys_by_id) == 3
+
+    # Writing the stored id drops the `prefix:Local` entry (and vice versa)
+    upsert_labels(con, [Label("jppfs_cor_Item4", STANDARD_LABEL_ROLE, "ja", "新項目4")])
+    assert "jppfs_cor:Item4" not in resolver._cache
+    assert resolver.resolve("jppfs_cor:Item4") == "新項目4"
+
+    upsert_labels(con, [Label("jppfs_cor:Item3", STANDARD_LABEL_ROLE, "ja", "新項目3")])
+    assert resolver.resolve("jppfs_cor:Item3") == "新項目3"
+    assert len(resolver._cache) == len(resolver._keys_by_id) == 3
+
+    resolver.close()
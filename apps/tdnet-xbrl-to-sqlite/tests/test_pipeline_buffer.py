@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import io
+import sqlite3
+import zipfile
+from pathlib import Path
+
+from tdnet_xbrl_ingestor.ingest.pipeline import run_pipeline
+
+
+XHTML = """<?xml version="1.0" encoding="utf-8"?>
+<html xmlns="http://www.w3.org/1999/xhtml"
+      xmlns:ix="http://www.xbrl.org/2008/inlineXBRL">
+  <body>
+    <ix:nonFraction name="tse-ed-t:NetSales" contextRef="C1" unitRef="U1" decimals="0">1,234</ix:nonFraction>
+    <ix:nonNumeric name="tse-ed-t:CompanyName" contextRef="C1">テスト株式会社</ix:nonNumeric>
+  </body>
+</html>
+""".encode("utf-8")
+
+
+def _zip_bytes() -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr("XBRLData/Summary/sample-ixbrl.htm", XHTML)
+    return buf.getvalue()
+
+
+def test_run_pipeline_accepts_buffers_and_file_objects(tmp_path: Path):
+    data = _zip_bytes()
+    zip_path = tmp_path / "sample.zip"
+    zip_path.write_bytes(data)
+
+    from_path = run_pipeline(str(zip_path), str(tmp_path / "path.sqlite"))
+    from_view = run_pipeline(memoryview(data), str(tmp_path / "view.sqlite"), zip_name="sample.zip")
+    from_file = run_pipeline(io.BytesIO(data), str(tmp_path / "file.sqlite"))
+
+    assert from_path.facts == from_view.facts == from_file.facts == 2
+
+    names = []
+    for db in ("path", "view", "file"):
+        con = sqlite3.connect(tmp_path / f"{db}.sqlite")
+        names.append(con.execute("SELECT zip_name, zip_sha256 FROM filings").fetchone())
+        con.close()
+    assert names[0] == names[1]
+    assert names[2][0] == "<memory>"
+    assert names[2][1] == names[0][1]
+
+    # Same bytes are recognized as a duplicate regardless of the input type
+    dup = run_pipeline(bytes(data), str(tmp_path / "path.sqlite"))
+    assert dup.filing_id == from_path.filing_id
+    assert dup.warnings == ["Skipped duplicate ZIP"]
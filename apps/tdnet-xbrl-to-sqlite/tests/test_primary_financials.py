@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import zipfile
+from pathlib import Path
+
+from tdnet_xbrl_ingestor.db.connect import connect
+from tdnet_xbrl_ingestor.db.schema import ensure_schema
+from tdnet_xbrl_ingestor.db.summary import rebuild_primary_financials
+from tdnet_xbrl_ingestor.ingest.pipeline import run_pipeline
+
+
+def _context(cid: str, start: str, end: str, *members: str) -> str:
+    segment = ""
+    if members:
+        segment = "<xbrli:segment>" + "".join(
+            f'<xbrldi:explicitMember dimension="tse-ed-t:Axis{i}">{m}</xbrldi:explicitMember>'
+            for i, m in enumerate(members)
+        ) + "</xbrli:segment>"
+    return (
+        f'<xbrli:context id="{cid}"><xbrli:entity>'
+        f'<xbrli:identifier scheme="http://www.tse.or.jp">12345</xbrli:identifier>{segment}</xbrli:entity>'
+        f"<xbrli:period><xbrli:startDate>{start}</xbrli:startDate><xbrli:endDate>{end}</xbrli:endDate>"
+        "</xbrli:period></xbrli:context>"
+    )
+
+
+def test_primary_financials_summary(tmp_path: Path):
+    contexts = "".join(
+        [
+            _context("CurrentYearDuration_ConsolidatedMember_ResultMember", "2025-04-01", "2026-03-31",
+                     "tse-ed-t:ConsolidatedMember", "tse-ed-t:ResultMember"),
+            _context("CurrentYearDuration_NonConsolidatedMember_ResultMember", "2025-04-01", "2026-03-31",
+                     "tse-ed-t:NonConsolidatedMember", "tse-ed-t:ResultMember"),
+            _context("PriorYearDuration_ConsolidatedMember_ResultMember", "2024-04-01", "2025-03-31",
+                     "tse-ed-t:ConsolidatedMember", "tse-ed-t:ResultMember"),
+        ]
+    )
+
+    def fact(name: str, ctx: str, value: str) -> str:
+        return f'<ix:nonFraction name="tse-ed-t:{name}" contextRef="{ctx}" unitRef="JPY" decimals="-6">{value}</ix:nonFraction>'
+
+    cur = "CurrentYearDuration_ConsolidatedMember_ResultMember"
+    facts = "".join(
+        [
+            fact("NetSales", cur, "1,000"),
+            fact("OperatingIncome", cur, "100"),
+            fact("NetIncomePerShare", cur, "12.5"),
+            fact("NetSales", "CurrentYearDuration_NonConsolidatedMember_ResultMember", "700"),
+            fact("NetSales", "PriorYearDuration_ConsolidatedMember_ResultMember", "900"),
+        ]
+    )
+    xhtml = f"""<?xml version="1.0" encoding="utf-8"?>
+    <html xmlns="http://www.w3.org/1999/xhtml"
+          xmlns:ix="http://www.xbrl.org/2008/inlineXBRL"
+          xmlns:xbrli="http://www.xbrl.org/2003/instance"
+          xmlns:xbrldi="http://xbrl.org/2006/xbrldi">
+      <body><ix:header><ix:resources>{contexts}</ix:resources></ix:header>{facts}</body>
+    </html>
+    """.encode("utf-8")
+
+    zip_path = tmp_path / "sample.zip"
+    with zipfile.ZipFile(zip_path, "w") as zf:
+        zf.writestr("XBRLData/Summary/sample-ixbrl.htm", xhtml)
+
+    db_path = str(tmp_path / "db.sqlite")
+    result = run_pipeline(str(zip_path), db_path)
+
+    query = "SELECT filing_id, period_start, period_end, net_sales, operating_income, ordinary_income, eps FROM primary_financials"
+    expected = [(result.filing_id, "2025-04-01", "2026-03-31", 1000.0, 100.0, None, 12.5)]
+    with connect(db_path) as con:
+        assert [tuple(r) for r in con.execute(query)] == expected
+
+        assert rebuild_primary_financials(con) == 1
+        assert [tuple(r) for r in con.execute(query)] == expected
+
+        # A DB created before the summary table existed gets it filled on first open
+        con.execute("DROP TABLE primary_financials")
+        ensure_schema(con)
+        assert [tuple(r) for r in con.execute(query)] == expected
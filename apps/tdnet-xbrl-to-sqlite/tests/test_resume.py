@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from tdnet_xbrl_ingestor.db.connect import connect
+from tdnet_xbrl_ingestor.db.repo import get_ingest_stage
+from tdnet_xbrl_ingestor.ingest import pipeline
+from tdnet_xbrl_ingestor.ingest.pipeline import run_batch, run_pipeline
+
+
+LAB = """<?xml version="1.0" encoding="utf-8"?>
+<link:linkbase xmlns:link="http://www.xbrl.org/2003/linkbase" xmlns:xlink="http://www.w3.org/1999/xlink">
+  <link:labelLink>
+    <link:loc xlink:type="locator" xlink:href="x.xsd#tse-ed-t_NetSales" xlink:label="NetSales"/>
+    <link:label xlink:type="resource" xlink:label="label_NetSales"
+                xlink:role="http://www.xbrl.org/2003/role/label" xml:lang="ja">売上高</link:label>
+    <link:labelArc xlink:type="arc" xlink:from="NetSales" xlink:to="label_NetSales"/>
+  </link:labelLink>
+</link:linkbase>
+"""
+
+
+def _make_zip(path: Path, value: str) -> Path:
+    xhtml = f"""<?xml version="1.0" encoding="utf-8"?>
+    <html xmlns="http://www.w3.org/1999/xhtml"
+          xmlns:ix="http://www.xbrl.org/2008/inlineXBRL"
+          xmlns:xbrli="http://www.xbrl.org/2003/instance">
+      <body>
+        <ix:header><ix:resources>
+          <xbrli:context id="CurrentYearDuration"><xbrli:entity>
+            <xbrli:identifier scheme="http://www.tse.or.jp">12345</xbrli:identifier></xbrli:entity>
+            <xbrli:period><xbrli:startDate>2025-04-01</xbrli:startDate><xbrli:endDate>2026-03-31</xbrli:endDate></xbrli:period>
+          </xbrli:context>
+        </ix:resources></ix:header>
+        <ix:nonFraction name="tse-ed-t:NetSales" contextRef="CurrentYearDuration" unitRef="JPY" decimals="0">{value}</ix:nonFraction>
+      </body>
+    </html>
+    """.encode("utf-8")
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("XBRLData/Summary/sample-ixbrl.htm", xhtml)
+        zf.writestr("XBRLData/Summary/sample-lab.xml", LAB)
+    return path
+
+
+def test_stage_commits_resume_after_failure(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    db_path = str(tmp_path / "db.sqlite")
+    zip_path = _make_zip(tmp_path / "a.zip", "100")
+
+    def boom(con, labels):
+        raise RuntimeError("label stage failed")
+
+    with monkeypatch.context() as m:
+        m.setattr(pipeline, "upsert_labels", boom)
+        with pytest.raises(RuntimeError):
+            run_pipeline(str(zip_path), db_path, commit="stage", commit_rows=1)
+
+    with connect(db_path) as con:
+        filing_id = con.execute("SELECT id FROM filings").fetchone()[0]
+        assert get_ingest_stage(con, filing_id) == "summary"
+        assert con.execute("SELECT COUNT(*) FROM facts").fetchone()[0] == 1
+
+    result = run_pipeline(str(zip_path), db_path)
+    assert result.filing_id == filing_id
+    assert result.facts == 0 and result.labels == 1
+    assert "Resumed after stage 'summary'" in result.warnings
+
+    with connect(db_path) as con:
+        assert get_ingest_stage(con, filing_id) == "labels"
+
+    assert run_pipeline(str(zip_path), db_path).warnings == ["Skipped duplicate ZIP"]
+
+
+def test_filing_commit_leaves_nothing_on_failure(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    db_path = str(tmp_path / "db.sqlite")
+    zip_path = _make_zip(tmp_path / "a.zip", "100")
+
+    monkeypatch.setattr(pipeline, "upsert_labels", lambda con, labels: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        run_pipeline(str(zip_path), db_path)
+
+    with connect(db_path) as con:
+        assert con.execute("SELECT COUNT(*) FROM filings").fetchone()[0] == 0
+
+
+def test_run_batch_isolates_failures(tmp_path: Path):
+    db_path = str(tmp_path / "db.sqlite")
+    good = [_make_zip(tmp_path / f"{i}.zip", str(100 + i)) for i in range(3)]
+    bad = tmp_path / "bad.zip"
+    bad.write_bytes(b"not a zip")
+
+    results = run_batch([str(good[0]), str(bad), str(good[1]), str(good[2])], db_path, commit_every=2)
+
+    assert isinstance(results[1], zipfile.BadZipFile)
+    assert [r.facts for i, r in enumerate(results) if i != 1] == [1, 1, 1]
+    with connect(db_path) as con:
+        assert con.execute("SELECT COUNT(*) FROM filings WHERE ingest_stage = 'labels'").fetchone()[0] == 3
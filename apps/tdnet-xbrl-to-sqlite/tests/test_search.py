@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import zipfile
+from pathlib import Path
+
+from tdnet_xbrl_ingestor.db.connect import connect
+from tdnet_xbrl_ingestor.ingest.pipeline import run_pipeline
+from tdnet_xbrl_ingestor.query.search import search_facts, search_labels
+
+
+def test_full_text_search_facts_and_labels(tmp_path: Path):
+    xhtml = """<?xml version="1.0" encoding="utf-8"?>
+    <html xmlns="http://www.w3.org/1999/xhtml"
+          xmlns:ix="http://www.xbrl.org/2008/inlineXBRL">
+      <body>
+        <ix:nonNumeric name="tse-ed-t:NotesForecasts" contextRef="C1">業績予想は現時点で入手可能な情報に基づいています。</ix:nonNumeric>
+        <ix:nonNumeric name="tse-ed-t:CompanyName" contextRef="C1">テスト株式会社</ix:nonNumeric>
+        <ix:nonFraction name="tse-ed-t:NetSales" contextRef="C1" unitRef="JPY" decimals="0">1,234</ix:nonFraction>
+      </body>
+    </html>
+    """.encode("utf-8")
+    lab_xml = """<?xml version="1.0" encoding="UTF-8"?>
+    <link:linkbase xmlns:link="http://www.xbrl.org/2003/linkbase"
+                   xmlns:xlink="http://www.w3.org/1999/xlink">
+      <link:labelLink>
+        <link:loc xlink:type="locator" xlink:href="test.xsd#tse-ed-t_NetSales" xlink:label="loc1"/>
+        <link:label xlink:type="resource" xlink:label="lab1" xml:lang="ja">売上高</link:label>
+        <link:labelArc xlink:type="arc" xlink:from="loc1" xlink:to="lab1"/>
+      </link:labelLink>
+    </link:linkbase>
+    """.encode("utf-8")
+
+    zip_path = tmp_path / "sample.zip"
+    with zipfile.ZipFile(zip_path, "w") as zf:
+        zf.writestr("XBRLData/Summary/sample-ixbrl.htm", xhtml)
+        zf.writestr("XBRLData/Summary/sample-lab.xml", lab_xml)
+
+    db_path = str(tmp_path / "db.sqlite")
+    result = run_pipeline(str(zip_path), db_path)
+
+    with connect(db_path) as con:
+        hits = search_facts(con, "入手可能な情報")
+        assert [h.name for h in hits] == ["tse-ed-t:NotesForecasts"]
+        assert "[入手可能な情報]" in hits[0].snippet
+
+        # 2-character terms fall back to LIKE
+        assert [h.name for h in search_facts(con, "株式")] == ["tse-ed-t:CompanyName"]
+
+        assert [l.concept_name for l in search_labels(con, "売上高")] == ["tse-ed-t_NetSales"]
+
+    # replace re-ingest keeps the index in sync (no duplicates, no stale rows)
+    run_pipeline(str(zip_path), db_path, on_duplicate="replace")
+    with connect(db_path) as con:
+        hits = search_facts(con, "入手可能な情報", filing_id=result.filing_id)
+        assert len(hits) == 1
+        assert con.execute("SELECT COUNT(*) FROM facts_fts").fetchone()[0] == 2
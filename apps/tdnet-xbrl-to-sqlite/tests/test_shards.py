@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import sqlite3
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from tdnet_xbrl_ingestor.db.shards import ShardLayout, attach_shards, compact_shard, connect_catalog, select_shards
+from tdnet_xbrl_ingestor.ingest.sharded import run_sharded_pipeline
+
+
+def _make_zip(path: Path, end_date: str, value: str) -> Path:
+    start = f"{int(end_date[:4]) - 1}{end_date[4:7]}-01"
+    xhtml = f"""<?xml version="1.0" encoding="utf-8"?>
+    <html xmlns="http://www.w3.org/1999/xhtml"
+          xmlns:ix="http://www.xbrl.org/2008/inlineXBRL"
+          xmlns:xbrli="http://www.xbrl.org/2003/instance">
+      <body>
+        <ix:header><ix:resources>
+          <xbrli:context id="CurrentYearDuration"><xbrli:entity>
+            <xbrli:identifier scheme="http://www.tse.or.jp">12345</xbrli:identifier></xbrli:entity>
+            <xbrli:period><xbrli:startDate>{start}</xbrli:startDate><xbrli:endDate>{end_date}</xbrli:endDate></xbrli:period>
+          </xbrli:context>
+        </ix:resources></ix:header>
+        <ix:nonFraction name="tse-ed-t:NetSales" contextRef="CurrentYearDuration" unitRef="JPY" decimals="0">{value}</ix:nonFraction>
+      </body>
+    </html>
+    """.encode("utf-8")
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("XBRLData/Summary/sample-ixbrl.htm", xhtml)
+    return path
+
+
+def test_sharded_ingest_and_attach(tmp_path: Path):
+    root = tmp_path / "shards"
+    z2025 = _make_zip(tmp_path / "a.zip", "2025-03-31", "100")
+    z2026 = _make_zip(tmp_path / "b.zip", "2026-03-31", "200")
+
+    run_sharded_pipeline(z2025, root)
+    run_sharded_pipeline(z2026, root)
+    dup = run_sharded_pipeline(z2026, root)
+    assert dup.warnings == ["Skipped duplicate ZIP (shard=2026)"]
+
+    layout = ShardLayout(root)
+    assert layout.shard_path("2025").exists() and layout.shard_path("2026").exists()
+
+    with attach_shards(layout) as con:
+        rows = con.execute("SELECT shard, value_num FROM facts ORDER BY shard").fetchall()
+        assert [tuple(r) for r in rows] == [("2025", 100.0), ("2026", 200.0)]
+
+    # Only the shards in range are attached
+    with attach_shards(layout, start="2026", end="2026-12") as con:
+        assert [tuple(r) for r in con.execute("SELECT shard, net_sales FROM primary_financials")] == [("2026", 200.0)]
+        assert [r[1] for r in con.execute("PRAGMA database_list")] == ["main", "temp", "s_2026"]
+
+    compact_shard(layout, "2025")
+    with pytest.raises(PermissionError):
+        run_sharded_pipeline(z2025, root, on_duplicate="replace")
+
+    with attach_shards(layout, start="2025", end="2025") as con:
+        assert con.execute("SELECT COUNT(*) FROM filings").fetchone()[0] == 1
+        with pytest.raises(sqlite3.OperationalError):
+            con.execute("DELETE FROM s_2025.facts")
+
+
+def test_sharded_staged_ingest_resumes(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    from tdnet_xbrl_ingestor.ingest import pipeline
+
+    root = tmp_path / "shards"
+    zip_path = _make_zip(tmp_path / "a.zip", "2026-03-31", "100")
+
+    with monkeypatch.context() as m:
+        m.setattr(pipeline, "upsert_labels", lambda con, labels: 1 / 0)
+        with pytest.raises(ZeroDivisionError):
+            run_sharded_pipeline(zip_path, root, commit="stage", commit_rows=1)
+
+    # Stages up to the summary were committed in the shard; nothing in the catalog yet
+    with attach_shards(ShardLayout(root)) as con:
+        assert con.execute("SELECT COUNT(*) FROM catalog_filings").fetchone()[0] == 0
+        assert con.execute("SELECT ingest_stage FROM filings").fetchone()[0] == "summary"
+
+    result = run_sharded_pipeline(zip_path, root)
+    assert "Resumed after stage 'summary'" in result.warnings
+    with attach_shards(ShardLayout(root)) as con:
+        assert con.execute("SELECT shard FROM catalog_filings").fetchone()[0] == "2026"
+
+
+def test_attach_shards_handles_old_columns_and_attach_limit(tmp_path: Path):
+    root = tmp_path / "shards"
+    run_sharded_pipeline(_make_zip(tmp_path / "a.zip", "2025-03-31", "100"), root)
+    run_sharded_pipeline(_make_zip(tmp_path / "b.zip", "2026-03-31", "200"), root)
+    layout = ShardLayout(root)
+
+    # A shard written before the exact-value columns existed
+    old = sqlite3.connect(layout.shard_path("2025"))
+    old.execute("DROP INDEX idx_facts_exact")
+    old.execute("ALTER TABLE facts DROP COLUMN value_exponent")
+    old.execute("ALTER TABLE facts DROP COLUMN value_mantissa")
+    old.commit()
+    old.close()
+
+    with attach_shards(layout) as con:
+        rows = con.execute("SELECT shard, value_mantissa, value_num FROM facts ORDER BY shard").fetchall()
+        assert [tuple(r) for r in rows] == [("2025", None, 100.0), ("2026", 200, 200.0)]
+
+    with sqlite3.connect(layout.catalog_path) as cat:
+        cat.executemany(
+            "INSERT INTO shards (shard, path) VALUES (?, ?)",
+            [(str(year), str(layout.shard_path(str(year)))) for year in range(2010, 2020)],
+        )
+    with pytest.raises(ValueError, match="attaches at most 10"):
+        with attach_shards(layout):
+            pass
+    # The catalog rows above have no files behind them
+    with pytest.raises(FileNotFoundError, match="filings_2019.sqlite"):
+        with attach_shards(layout, start="2019", end="2026"):
+            pass
+    assert not layout.shard_path("2019").exists()
+    with attach_shards(layout, start="2020", end="2026") as con:
+        assert con.execute("SELECT COUNT(*) FROM filings").fetchone()[0] == 2
+
+
+def test_select_shards_compares_by_common_prefix(tmp_path: Path):
+    months = ["2023-12", "2024-01", "2024-03", "2024-12", "2025-01"]
+    with connect_catalog(ShardLayout(tmp_path, granularity="month")) as cat:
+        cat.executemany("INSERT INTO shards (shard, path) VALUES (?, ?)", [(m, f"{m}.sqlite") for m in months])
+
+        def keys(start=None, end=None):
+            return [key for key, _, _ in select_shards(cat, start, end)]
+
+        # A year-only bound covers every month of that year
+        assert keys(end="2024") == ["2023-12", "2024-01", "2024-03", "2024-12"]
+        assert keys(start="2024", end="2024") == ["2024-01", "2024-03", "2024-12"]
+        assert keys(start="2024-02", end="2024-12") == ["2024-03", "2024-12"]
+
+        # Year shards with month bounds: the bound's year keeps its shard
+        cat.execute("DELETE FROM shards")
+        cat.executemany("INSERT INTO shards (shard, path) VALUES (?, ?)", [(y, f"{y}.sqlite") for y in ("2023", "2024", "2025")])
+        assert keys(start="2024-06", end="2025-01") == ["2024", "2025"]
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import zipfile
+from pathlib import Path
+
+from tdnet_xbrl_ingestor.db.connect import connect
+from tdnet_xbrl_ingestor.db.repo import get_db_stats, get_stats_by_filing
+from tdnet_xbrl_ingestor.ingest.pipeline import run_pipeline
+
+
+def test_stats_use_per_filing_counters(tmp_path: Path):
+    xhtml = """<?xml version="1.0" encoding="utf-8"?>
+    <html xmlns="http://www.w3.org/1999/xhtml"
+          xmlns:ix="http://www.xbrl.org/2008/inlineXBRL">
+      <body>
+        <ix:nonFraction name="tse-ed-t:NetSales" contextRef="C1" unitRef="U1" decimals="0">1,234</ix:nonFraction>
+        <ix:nonNumeric name="tse-ed-t:CompanyName" contextRef="C1">テスト株式会社</ix:nonNumeric>
+      </body>
+    </html>
+    """.encode("utf-8")
+
+    db_path = str(tmp_path / "db.sqlite")
+    for i in range(2):
+        zip_path = tmp_path / f"sample{i}.zip"
+        with zipfile.ZipFile(zip_path, "w") as zf:
+            zf.writestr("XBRLData/Summary/sample-ixbrl.htm", xhtml.replace(b"1,234", str(i).encode()))
+        run_pipeline(str(zip_path), db_path)
+
+    with connect(db_path) as con:
+        stats = get_db_stats(con)
+        assert (stats.filings, stats.facts) == (2, 4)
+        assert stats.facts == con.execute("SELECT COUNT(*) FROM facts").fetchone()[0]
+
+        rows = get_stats_by_filing(con, limit=10)
+        assert [r.facts for r in rows] == [2, 2]
+        assert rows[0].filing_id > rows[1].filing_id
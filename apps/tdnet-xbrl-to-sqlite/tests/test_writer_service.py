@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import threading
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from tdnet_xbrl_ingestor.db.connect import connect
+from tdnet_xbrl_ingestor.ingest.pipeline import extract_filing
+from tdnet_xbrl_ingestor.ingest.writer import (
+    WriterClient,
+    WriterService,
+    ingest_many_via_writer,
+    key_file,
+    parse_address,
+)
+
+
+def _make_zip(path: Path, value: str) -> Path:
+    xhtml = f"""<?xml version="1.0" encoding="utf-8"?>
+    <html xmlns="http://www.w3.org/1999/xhtml"
+          xmlns:ix="http://www.xbrl.org/2008/inlineXBRL"
+          xmlns:xbrli="http://www.xbrl.org/2003/instance">
+      <body>
+        <ix:header><ix:resources>
+          <xbrli:context id="CurrentYearDuration"><xbrli:entity>
+            <xbrli:identifier scheme="http://www.tse.or.jp">12345</xbrli:identifier></xbrli:entity>
+            <xbrli:period><xbrli:startDate>2025-04-01</xbrli:startDate><xbrli:endDate>2026-03-31</xbrli:endDate></xbrli:period>
+          </xbrli:context>
+        </ix:resources></ix:header>
+        <ix:nonFraction name="tse-ed-t:NetSales" contextRef="CurrentYearDuration" unitRef="JPY" decimals="0">{value}</ix:nonFraction>
+      </body>
+    </html>
+    """.encode("utf-8")
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("XBRLData/Summary/sample-ixbrl.htm", xhtml)
+    return path
+
+
+def test_writer_service_group_commit(tmp_path: Path):
+    db_path = str(tmp_path / "db.sqlite")
+    zips = [_make_zip(tmp_path / f"{i}.zip", str(100 + i)) for i in range(4)]
+
+    service = WriterService(db_path, ("127.0.0.1", 0), authkey=b"test", max_wait_ms=500)
+    address = service.start()
+    thread = threading.Thread(target=service.serve_forever, daemon=True)
+    thread.start()
+    try:
+        results = ingest_many_via_writer(zips, address, workers=2, authkey=b"test")
+        assert all(r.facts == 1 for r in results.values()), results
+        # Parsers finishing within the group-commit window share a transaction
+        assert service.commits < len(zips)
+
+        with WriterClient(address, authkey=b"test") as client:
+            dup = client.ingest(str(zips[0]))
+            assert dup.warnings == ["Skipped duplicate ZIP"]
+
+            # A failing filing is rolled back alone and reported to its sender
+            bad = extract_filing(str(zips[1]))
+            try:
+                client.store(bad, on_duplicate="bogus")
+            except ValueError as e:
+                assert "bogus" in str(e)
+            else:
+                raise AssertionError("expected ValueError")
+    finally:
+        service.close()
+
+    with connect(db_path) as con:
+        values = sorted(r[0] for r in con.execute("SELECT value_num FROM facts"))
+        assert values == [100.0, 101.0, 102.0, 103.0]
+
+
+def test_writer_service_requires_loopback_and_secret_key(tmp_path: Path, monkeypatch):
+    monkeypatch.delenv("TDNET_WRITER_AUTHKEY", raising=False)
+    db_path = str(tmp_path / "db.sqlite")
+
+    with pytest.raises(ValueError):
+        parse_address("0.0.0.0:47650")
+    with pytest.raises(ValueError):
+        WriterService(db_path, ("0.0.0.0", 0))
+    # Clients without the env var need the service's key file
+    with pytest.raises(RuntimeError):
+        WriterClient(("127.0.0.1", 1), db_path=db_path)
+
+    service = WriterService(db_path, ("127.0.0.1", 0))
+    address = service.start()
+    threading.Thread(target=service.serve_forever, daemon=True).start()
+    try:
+        key = key_file(db_path)
+        assert key.stat().st_mode & 0o777 == 0o600
+        assert len(key.read_bytes()) == 64
+
+        with WriterClient(address, db_path=db_path) as client:
+            assert client.existing_filing_id("0" * 64) is None
+    finally:
+        service.close()
+
+
+def test_writer_resumes_unfinished_staged_ingest(tmp_path: Path, monkeypatch):
+    from tdnet_xbrl_ingestor.ingest import pipeline
+
+    db_path = str(tmp_path / "db.sqlite")
+    zip_path = _make_zip(tmp_path / "a.zip", "100")
+
+    with monkeypatch.context() as m:
+        m.setattr(pipeline, "upsert_labels", lambda con, labels: 1 / 0)
+        with pytest.raises(ZeroDivisionError):
+            pipeline.run_pipeline(str(zip_path), db_path, commit="stage")
+
+    service = WriterService(db_path, ("127.0.0.1", 0), authkey=b"test")
+    address = service.start()
+    threading.Thread(target=service.serve_forever, daemon=True).start()
+    try:
+        with WriterClient(address, authkey=b"test") as client:
+            result = client.ingest(str(zip_path))
+            assert "Resumed after stage 'summary'" in result.warnings
+            assert client.ingest(str(zip_path)).warnings == ["Skipped duplicate ZIP"]
+    finally:
+        service.close()
+
+    with connect(db_path) as con:
+        assert con.execute("SELECT ingest_stage FROM filings").fetchone()[0] == "labels"
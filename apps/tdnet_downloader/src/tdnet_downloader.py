@@ -1,7 +1,21 @@
 import argparse
-from pathlib import Path
+import asyncio
+import hashlib
+import http.client
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path, PurePosixPath
+from queue import Queue
+from typing import Callable
+from urllib.parse import urlsplit
 
 import yaml
+from playwright.async_api import async_playwright
 from playwright.sync_api import sync_playwright, TimeoutError as PWTimeoutError
 
 TDNET_URL = "https://www.release.tdnet.info/index.html"
@@ -13,6 +27,20 @@ KESSAN_KEYWORDS = [
 ]
 
 
+# ダウンロード済み記録（out_dir 直下、JSON Lines）
+MANIFEST_NAME = ".tdnet_manifest.jsonl"
+
+# 開示番号（XBRL の ZIP 名）の例: 081220260114533459 → 2026-01-14 の開示
+DISCLOSURE_ID_RE = re.compile(r"^\d{4}(\d{8})\d+$")
+
+# HTTP 直接ダウンロード（download.mode: http）の既定値
+HTTP_CHUNK_SIZE = 256 * 1024
+HTTP_USER_AGENT = "tdnet-downloader/1.0"
+HTTP_RETRY_WAIT = 2
+# 206 応答の Content-Range の例: bytes 1048576-2097151/2097152
+CONTENT_RANGE_RE = re.compile(r"^bytes (\d+)-\d+/(?:\d+|\*)$")
+
+
 # -----------------------------
 # 設定読み込み
 # -----------------------------
@@ -21,18 +49,203 @@ def load_config(path: str) -> dict:
         return yaml.safe_load(f)
 
 
+# -----------------------------
+# ダウンロード済み記録
+# -----------------------------
+def disclosure_id_from_href(href: str | None) -> str | None:
+    """XBRL リンクの URL から開示番号（ZIP のファイル名）を取り出す"""
+    if not href:
+        return None
+    stem = PurePosixPath(urlsplit(href).path).stem
+    return stem or None
+
+
+def disclosure_date(disclosure_id: str) -> str | None:
+    m = DISCLOSURE_ID_RE.match(disclosure_id)
+    return m.group(1) if m else None
+
+
+def save_hashed(src: Path, save_path: Path, keep_data: bool = False) -> tuple[str, bytes | None]:
+    """
+    ブラウザが受け取った一時ファイルを1回だけ読み、save_path に書き出しながら sha256 を計算する。
+    keep_data=True なら内容も返す（取り込みに渡すため、保存先を読み直さない）
+    """
+    h = hashlib.sha256()
+    data = bytearray() if keep_data else None
+    with open(src, "rb") as fin, open(save_path, "wb") as fout:
+        for chunk in iter(lambda: fin.read(HTTP_CHUNK_SIZE), b""):
+            h.update(chunk)
+            fout.write(chunk)
+            if data is not None:
+                data += chunk
+    return h.hexdigest(), bytes(data) if data is not None else None
+
+
+class DownloadManifest:
+    """
+    ダウンロード済みの開示を開示番号をキーに記録する（1行1件の JSON Lines、追記のみ）。
+    記録があり、ファイルも残っている開示は XBRL のクリック・転送を省略する。
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.entries: dict[str, dict] = {}
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # 書き込み途中で止まった行は無視する
+                        continue
+                    self.entries[entry["disclosure_id"]] = entry
+
+    def cached_path(self, disclosure_id: str | None, out: Path) -> Path | None:
+        if disclosure_id is None:
+            return None
+        entry = self.entries.get(disclosure_id)
+        if entry is None:
+            return None
+        path = out / entry["filename"]
+        return path if path.exists() else None
+
+    def record(self, ticker: str, disclosure_id: str, path: Path, sha256: str) -> dict:
+        entry = {
+            "ticker": str(ticker),
+            "disclosure_id": disclosure_id,
+            "date": disclosure_date(disclosure_id),
+            "filename": path.name,
+            "sha256": sha256,
+            "downloaded_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.entries[disclosure_id] = entry
+        return entry
+
+
+# ダウンロード完了時のコールバック: (ticker, 保存先, sha256, ZIP の内容)
+OnDownloaded = Callable[[str, Path, str, bytes], None]
+
+
+# -----------------------------
+# 取り込み（tdnet-xbrl-to-sqlite）への受け渡し
+# -----------------------------
+class IngestQueue:
+    """
+    ダウンロードした ZIP を、フォルダ監視を介さずに同じプロセス内で tdnet_xbrl_ingestor に取り込む。
+    受信した内容（bytes）とダウンロード時に計算した sha256 を渡すので、取り込み側は ZIP を開き直さない。
+    SQLite への書き込みは1本のスレッドで順に行う。
+    """
+
+    def __init__(self, db_path: str, on_duplicate: str = "skip"):
+        try:
+            from tdnet_xbrl_ingestor.ingest.pipeline import run_pipeline
+        except ImportError as e:
+            raise RuntimeError(
+                "ingest.db を使うには tdnet-xbrl-to-sqlite をインストールしてください"
+                "（pip install -e ../tdnet-xbrl-to-sqlite）"
+            ) from e
+
+        self._run_pipeline = run_pipeline
+        self.db_path = str(db_path)
+        self.on_duplicate = on_duplicate
+        self.ingested = 0
+        self.failed = 0
+        self._queue: Queue = Queue()
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+        self._thread.start()
+
+    def submit(self, ticker: str, path: Path, sha256: str, data: bytes):
+        self._queue.put((ticker, path, sha256, data))
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            ticker, path, sha256, data = item
+            try:
+                result = self._run_pipeline(
+                    data, self.db_path, self.on_duplicate, zip_sha256=sha256, zip_name=path.name
+                )
+            except Exception as e:
+                self.failed += 1
+                print(f"[{ticker}] ✖ ingest error: {e}")
+                continue
+            self.ingested += 1
+            print(f"[{ticker}] ✔ ingested: filing_id={result.filing_id} facts={result.facts}")
+
+    def close(self):
+        """キューに残っている ZIP をすべて取り込んでから終了する"""
+        self._queue.put(None)
+        self._thread.join()
+
+
 # -----------------------------
 # メイン処理
 # -----------------------------
+def _open_search_frame(page, url: str, date_from: str):
+    page.goto(url, wait_until="domcontentloaded")
+
+    # 検索フォームの iframe
+    frame = page.locator("iframe").content_frame
+    if frame is None:
+        raise RuntimeError("トップの iframe が取得できませんでした")
+
+    frame.locator('select[name="t0"]').select_option(date_from)
+    return frame
+
+
+def _find_xbrl_link(frame, ticker: str):
+    """ticker で検索し、最新の決算短信の XBRL リンクを返す（見つからなければ None）"""
+    # 入力 → 検索
+    frame.locator("#freewordtxt").fill(str(ticker))
+    frame.locator("#searchbtn").click()
+
+    # 結果一覧 iframe
+    mainlist = frame.locator('iframe[name="mainlist"]').content_frame
+    if mainlist is None:
+        raise RuntimeError("mainlist iframe が取得できませんでした")
+
+    # ticker 行が出るまで待つ
+    rows = mainlist.locator("tr", has_text=str(ticker))
+    rows.first.wait_for(timeout=15000)
+
+    # 決算短信（表記ゆれ対応）でフィルタ
+    target_row = None
+    for kw in KESSAN_KEYWORDS:
+        cand = rows.filter(has_text=kw)
+        if cand.count() > 0:
+            target_row = cand.first  # TDnetは新しい順
+            break
+
+    if target_row is None:
+        print("✖ 決算短信が見つかりません（スキップ）")
+        return None
+
+    xbrl = target_row.get_by_role("link", name="XBRL").first
+    xbrl.wait_for(state="visible", timeout=15000)
+    return xbrl
+
+
 def download_latest_kessan_tanshin_xbrl_for_tickers(
     tickers: list[str],
     date_from: str,
     out_dir: str,
     headless: bool = False,
     wait_ms: int = 800,
+    url: str = TDNET_URL,
+    manifest_path: str | None = None,
+    on_downloaded: OnDownloaded | None = None,
 ):
     out = Path(out_dir)
     out.mkdir(parents=True, exist_ok=True)
+    manifest = DownloadManifest(Path(manifest_path) if manifest_path else out / MANIFEST_NAME)
 
     results: dict[str, Path | None] = {}
 
@@ -41,55 +254,36 @@ def download_latest_kessan_tanshin_xbrl_for_tickers(
         context = browser.new_context(accept_downloads=True)
         page = context.new_page()
 
-        page.goto(TDNET_URL, wait_until="domcontentloaded")
-
-        # 検索フォームの iframe
-        frame = page.locator("iframe").content_frame
-        if frame is None:
-            raise RuntimeError("トップの iframe が取得できませんでした")
-
-        frame.locator('select[name="t0"]').select_option(date_from)
+        frame = _open_search_frame(page, url, date_from)
 
         for ticker in tickers:
             print(f"\n=== processing ticker {ticker} ===")
 
             try:
-                # 入力 → 検索
-                frame.locator("#freewordtxt").fill(str(ticker))
-                frame.locator("#searchbtn").click()
-
-                # 結果一覧 iframe
-                mainlist = frame.locator('iframe[name="mainlist"]').content_frame
-                if mainlist is None:
-                    raise RuntimeError("mainlist iframe が取得できませんでした")
-
-                # ticker 行が出るまで待つ
-                rows = mainlist.locator("tr", has_text=str(ticker))
-                rows.first.wait_for(timeout=15000)
-
-                # 決算短信（表記ゆれ対応）でフィルタ
-                target_row = None
-                for kw in KESSAN_KEYWORDS:
-                    cand = rows.filter(has_text=kw)
-                    if cand.count() > 0:
-                        target_row = cand.first  # TDnetは新しい順
-                        break
-
-                if target_row is None:
-                    print("✖ 決算短信が見つかりません（スキップ）")
+                xbrl = _find_xbrl_link(frame, ticker)
+                if xbrl is None:
                     results[ticker] = None
                     continue
 
-                # XBRL クリック
-                xbrl = target_row.get_by_role("link", name="XBRL").first
-                xbrl.wait_for(state="visible", timeout=15000)
+                # 取得済みの開示ならクリックしない
+                disclosure_id = disclosure_id_from_href(xbrl.get_attribute("href"))
+                cached = manifest.cached_path(disclosure_id, out)
+                if cached is not None:
+                    print(f"⏭ skip (取得済み): {cached.name}")
+                    results[ticker] = cached
+                    continue
 
+                # XBRL クリック
                 with page.expect_download(timeout=20000) as dl_info:
                     xbrl.click()
                 download = dl_info.value
 
                 save_path = out / f"{ticker}_{download.suggested_filename}"
-                download.save_as(save_path)
+                # save_as でコピーしてから読み直す代わりに、1回読んで保存とハッシュを同時に行う
+                digest, data = save_hashed(Path(download.path()), save_path, keep_data=on_downloaded is not None)
+                manifest.record(ticker, disclosure_id or Path(download.suggested_filename).stem, save_path, digest)
+                if on_downloaded is not None:
+                    on_downloaded(ticker, save_path, digest, data)
 
                 results[ticker] = save_path
                 print(f"✔ downloaded: {save_path.name}")
@@ -109,6 +303,449 @@ def download_latest_kessan_tanshin_xbrl_for_tickers(
     return results
 
 
+def collect_latest_xbrl_links(
+    tickers: list[str],
+    date_from: str,
+    headless: bool = False,
+    wait_ms: int = 800,
+    url: str = TDNET_URL,
+) -> dict[str, str | None]:
+    """ブラウザでは検索だけを行い、ticker ごとに最新の決算短信 XBRL の URL を集める"""
+    results: dict[str, str | None] = {}
+
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=headless)
+        context = browser.new_context()
+        page = context.new_page()
+
+        frame = _open_search_frame(page, url, date_from)
+
+        for ticker in tickers:
+            print(f"\n=== collecting ticker {ticker} ===")
+
+            try:
+                xbrl = _find_xbrl_link(frame, ticker)
+                # 相対パスでも絶対 URL で受け取れるよう、DOM の href プロパティを読む
+                results[ticker] = xbrl.evaluate("a => a.href") if xbrl is not None else None
+                page.wait_for_timeout(wait_ms)
+
+            except PWTimeoutError:
+                print("✖ timeout (決算短信/XBRLが見つからない)")
+                results[ticker] = None
+            except Exception as e:
+                print(f"✖ error: {e}")
+                results[ticker] = None
+
+        context.close()
+        browser.close()
+
+    return results
+
+
+# -----------------------------
+# 並列処理（async）
+# -----------------------------
+class RateLimiter:
+    """全ワーカー共通で、TDnet へのリクエストの間隔を min_interval_ms 以上あける"""
+
+    def __init__(self, min_interval_ms: int):
+        self.min_interval = min_interval_ms / 1000
+        self._lock = asyncio.Lock()
+        self._next_at = 0.0
+
+    async def wait(self):
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            if self._next_at > now:
+                await asyncio.sleep(self._next_at - now)
+                # 負荷が高いと起床が遅れるので、次の間隔は実際に起きた時刻から数える
+                now = max(self._next_at, loop.time())
+            self._next_at = now + self.min_interval
+
+
+async def _open_search_frame_async(page, url: str, date_from: str, limiter: RateLimiter):
+    await limiter.wait()
+    await page.goto(url, wait_until="domcontentloaded")
+
+    # 検索フォームの iframe
+    frame = page.locator("iframe").content_frame
+    if frame is None:
+        raise RuntimeError("トップの iframe が取得できませんでした")
+
+    await frame.locator('select[name="t0"]').select_option(date_from)
+    return frame
+
+
+async def _find_xbrl_link_async(frame, ticker: str, limiter: RateLimiter):
+    """ticker で検索し、最新の決算短信の XBRL リンクを返す（見つからなければ None）"""
+    # 入力 → 検索
+    await frame.locator("#freewordtxt").fill(str(ticker))
+    await limiter.wait()
+    await frame.locator("#searchbtn").click()
+
+    # 結果一覧 iframe
+    mainlist = frame.locator('iframe[name="mainlist"]').content_frame
+    if mainlist is None:
+        raise RuntimeError("mainlist iframe が取得できませんでした")
+
+    # ticker 行が出るまで待つ
+    rows = mainlist.locator("tr", has_text=str(ticker))
+    await rows.first.wait_for(timeout=15000)
+
+    # 決算短信（表記ゆれ対応）でフィルタ
+    target_row = None
+    for kw in KESSAN_KEYWORDS:
+        cand = rows.filter(has_text=kw)
+        if await cand.count() > 0:
+            target_row = cand.first  # TDnetは新しい順
+            break
+
+    if target_row is None:
+        print(f"[{ticker}] ✖ 決算短信が見つかりません（スキップ）")
+        return None
+
+    xbrl = target_row.get_by_role("link", name="XBRL").first
+    await xbrl.wait_for(state="visible", timeout=15000)
+    return xbrl
+
+
+async def _download_ticker_async(
+    page,
+    frame,
+    ticker: str,
+    out: Path,
+    manifest: DownloadManifest,
+    limiter: RateLimiter,
+    on_downloaded: OnDownloaded | None = None,
+) -> Path | None:
+    xbrl = await _find_xbrl_link_async(frame, ticker, limiter)
+    if xbrl is None:
+        return None
+
+    # 取得済みの開示ならクリックしない
+    disclosure_id = disclosure_id_from_href(await xbrl.get_attribute("href"))
+    cached = manifest.cached_path(disclosure_id, out)
+    if cached is not None:
+        print(f"[{ticker}] ⏭ skip (取得済み): {cached.name}")
+        return cached
+
+    # XBRL クリック
+    await limiter.wait()
+    async with page.expect_download(timeout=20000) as dl_info:
+        await xbrl.click()
+    download = await dl_info.value
+
+    save_path = out / f"{ticker}_{download.suggested_filename}"
+    # ファイルの読み書きとハッシュ計算はスレッドで行い、他のコンテキストを止めない
+    digest, data = await asyncio.to_thread(
+        save_hashed, Path(await download.path()), save_path, on_downloaded is not None
+    )
+    manifest.record(ticker, disclosure_id or Path(download.suggested_filename).stem, save_path, digest)
+    if on_downloaded is not None:
+        await asyncio.to_thread(on_downloaded, ticker, save_path, digest, data)
+
+    print(f"[{ticker}] ✔ downloaded: {save_path.name}")
+    return save_path
+
+
+async def _collect_link_async(page, frame, ticker: str, limiter: RateLimiter) -> str | None:
+    xbrl = await _find_xbrl_link_async(frame, ticker, limiter)
+    if xbrl is None:
+        return None
+    return await xbrl.evaluate("a => a.href")
+
+
+async def _ticker_worker_async(
+    browser,
+    queue: asyncio.Queue,
+    results: dict,
+    date_from: str,
+    url: str,
+    limiter: RateLimiter,
+    handle,
+):
+    """queue の ticker を handle(page, frame, ticker) で1件ずつ処理し、戻り値を results に入れる"""
+    # ワーカーごとに独立したブラウザコンテキスト（Cookie・ダウンロードを共有しない）を使う
+    context = await browser.new_context(accept_downloads=True)
+    page = await context.new_page()
+    frame = None
+    try:
+        while True:
+            try:
+                ticker = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+
+            try:
+                if frame is None:
+                    frame = await _open_search_frame_async(page, url, date_from, limiter)
+                results[ticker] = await handle(page, frame, ticker)
+            except PWTimeoutError:
+                print(f"[{ticker}] ✖ timeout (決算短信/XBRLが見つからない)")
+                results[ticker] = None
+            except Exception as e:
+                print(f"[{ticker}] ✖ error: {e}")
+                results[ticker] = None
+                # ページの状態が分からないので、次の ticker はトップから開き直す
+                frame = None
+    finally:
+        await context.close()
+
+
+async def _run_ticker_pool_async(
+    tickers: list[str],
+    date_from: str,
+    headless: bool,
+    concurrency: int,
+    rate_limit_ms: int,
+    url: str,
+    make_handle,
+) -> dict:
+    queue: asyncio.Queue = asyncio.Queue()
+    for ticker in tickers:
+        queue.put_nowait(ticker)
+
+    results: dict = {}
+    limiter = RateLimiter(rate_limit_ms)
+    handle = make_handle(limiter)
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=headless)
+        try:
+            workers = max(1, min(concurrency, len(tickers)))
+            await asyncio.gather(
+                *(
+                    _ticker_worker_async(browser, queue, results, date_from, url, limiter, handle)
+                    for _ in range(workers)
+                )
+            )
+        finally:
+            await browser.close()
+
+    # 入力の ticker 順で返す
+    return {ticker: results.get(ticker) for ticker in tickers}
+
+
+async def download_latest_kessan_tanshin_xbrl_for_tickers_async(
+    tickers: list[str],
+    date_from: str,
+    out_dir: str,
+    headless: bool = True,
+    concurrency: int = 4,
+    rate_limit_ms: int = 800,
+    url: str = TDNET_URL,
+    manifest_path: str | None = None,
+    on_downloaded: OnDownloaded | None = None,
+):
+    """
+    ブラウザコンテキストを concurrency 個立ち上げ、ticker を並列に処理する。
+    TDnet へのアクセス（ページ表示・検索・ダウンロード）は全体で rate_limit_ms 間隔に制限する。
+    """
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    manifest = DownloadManifest(Path(manifest_path) if manifest_path else out / MANIFEST_NAME)
+
+    def make_handle(limiter):
+        return lambda page, frame, ticker: _download_ticker_async(
+            page, frame, ticker, out, manifest, limiter, on_downloaded
+        )
+
+    return await _run_ticker_pool_async(tickers, date_from, headless, concurrency, rate_limit_ms, url, make_handle)
+
+
+async def collect_latest_xbrl_links_async(
+    tickers: list[str],
+    date_from: str,
+    headless: bool = True,
+    concurrency: int = 4,
+    rate_limit_ms: int = 800,
+    url: str = TDNET_URL,
+) -> dict[str, str | None]:
+    """collect_latest_xbrl_links の並列版"""
+
+    def make_handle(limiter):
+        return lambda page, frame, ticker: _collect_link_async(page, frame, ticker, limiter)
+
+    return await _run_ticker_pool_async(tickers, date_from, headless, concurrency, rate_limit_ms, url, make_handle)
+
+
+# -----------------------------
+# HTTP 直接ダウンロード
+# -----------------------------
+class DownloadError(Exception):
+    """再試行しても取得できない HTTP エラー（404 など）"""
+
+
+class HttpDownloader:
+    """
+    XBRL の ZIP を HTTP で直接ダウンロードする。
+    スレッドごとに keep-alive の接続をホスト単位で使い回し、ファイルには少しずつ書き込む。
+    途中で切れた場合は `.part` の続きから Range リクエストで再開する。
+    """
+
+    def __init__(self, concurrency: int = 4, retries: int = 3, timeout: float = 30):
+        self.concurrency = max(1, concurrency)
+        self.retries = retries
+        self.timeout = timeout
+        self._local = threading.local()
+        self._all_connections = []
+        self._lock = threading.Lock()
+
+    def _connection(self, scheme: str, netloc: str):
+        conns = getattr(self._local, "conns", None)
+        if conns is None:
+            conns = self._local.conns = {}
+        conn = conns.get((scheme, netloc))
+        if conn is None:
+            cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            conn = conns[(scheme, netloc)] = cls(netloc, timeout=self.timeout)
+            with self._lock:
+                self._all_connections.append(conn)
+        return conn
+
+    def _drop_connection(self, scheme: str, netloc: str):
+        conn = getattr(self._local, "conns", {}).pop((scheme, netloc), None)
+        if conn is not None:
+            conn.close()
+
+    def close(self):
+        with self._lock:
+            for conn in self._all_connections:
+                conn.close()
+            self._all_connections.clear()
+
+    def fetch(self, url: str, save_path: Path, keep_data: bool = False) -> tuple[str, bytes | None]:
+        """url を save_path に保存し、(内容の sha256, 内容) を返す。内容は keep_data=True のときだけ"""
+        parts = urlsplit(url)
+        part_path = save_path.with_name(save_path.name + ".part")
+        for attempt in range(self.retries + 1):
+            try:
+                return self._fetch_once(parts, url, save_path, part_path, keep_data)
+            except (OSError, http.client.HTTPException) as e:
+                # 接続が壊れている可能性があるので作り直す。.part は残して続きから再開する
+                self._drop_connection(parts.scheme, parts.netloc)
+                if attempt == self.retries:
+                    raise DownloadError(f"{url}: {e}") from e
+                time.sleep(HTTP_RETRY_WAIT * (attempt + 1))
+
+    def _fetch_once(
+        self, parts, url: str, save_path: Path, part_path: Path, keep_data: bool = False
+    ) -> tuple[str, bytes | None]:
+        offset = part_path.stat().st_size if part_path.exists() else 0
+        headers = {"User-Agent": HTTP_USER_AGENT}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+
+        target = parts.path + (f"?{parts.query}" if parts.query else "")
+        conn = self._connection(parts.scheme, parts.netloc)
+        conn.request("GET", target, headers=headers)
+        res = conn.getresponse()
+
+        if res.status == 206 and offset:
+            m = CONTENT_RANGE_RE.match(res.getheader("Content-Range") or "")
+            if m is None or int(m.group(1)) != offset:
+                # 要求した位置からの続きではない。継ぎ足すと壊れるので .part を捨てて最初から取り直す
+                print(f"⚠ Content-Range が .part と合わないため最初から取り直します: {url}")
+                self._drop_connection(parts.scheme, parts.netloc)
+                part_path.unlink()
+                return self._fetch_once(parts, url, save_path, part_path, keep_data)
+            mode = "ab"
+        elif res.status == 200:
+            # Range に対応していないサーバーは最初から送り直してくる
+            mode = "wb"
+        elif res.status == 416 and offset:
+            # .part が既に全体を含んでいる
+            mode = None
+        elif res.status >= 500:
+            res.read()
+            raise ConnectionError(f"HTTP {res.status}")
+        else:
+            res.read()
+            raise DownloadError(f"{url}: HTTP {res.status}")
+
+        # 受信しながらハッシュを計算し、取り込みに渡す場合は内容もメモリに持つ
+        h = hashlib.sha256()
+        data = bytearray() if keep_data else None
+        if mode != "wb" and offset:
+            # 再開時は前回までに受信した部分だけを読む
+            with open(part_path, "rb") as f:
+                for chunk in iter(lambda: f.read(HTTP_CHUNK_SIZE), b""):
+                    h.update(chunk)
+                    if data is not None:
+                        data += chunk
+
+        if mode is None:
+            res.read()
+        else:
+            expected = res.getheader("Content-Length")
+            received = 0
+            with open(part_path, mode) as f:
+                for chunk in iter(lambda: res.read(HTTP_CHUNK_SIZE), b""):
+                    h.update(chunk)
+                    f.write(chunk)
+                    if data is not None:
+                        data += chunk
+                    received += len(chunk)
+            # 途中で切断されても read() は空を返すだけなので、長さで確かめる
+            if expected is not None and received != int(expected):
+                raise http.client.IncompleteRead(b"", int(expected) - received)
+
+        os.replace(part_path, save_path)
+        return h.hexdigest(), bytes(data) if data is not None else None
+
+
+def download_xbrl_links(
+    links: dict[str, str | None],
+    out_dir: str,
+    concurrency: int = 4,
+    retries: int = 3,
+    timeout: float = 30,
+    manifest_path: str | None = None,
+    on_downloaded: OnDownloaded | None = None,
+) -> dict[str, Path | None]:
+    """collect_latest_xbrl_links で集めた URL を、並列に HTTP で直接ダウンロードする"""
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    manifest = DownloadManifest(Path(manifest_path) if manifest_path else out / MANIFEST_NAME)
+
+    results: dict[str, Path | None] = {ticker: None for ticker in links}
+    downloader = HttpDownloader(concurrency=concurrency, retries=retries, timeout=timeout)
+    try:
+        with ThreadPoolExecutor(max_workers=downloader.concurrency) as executor:
+            futures = {}
+            for ticker, link in links.items():
+                if link is None:
+                    continue
+                disclosure_id = disclosure_id_from_href(link)
+                cached = manifest.cached_path(disclosure_id, out)
+                if cached is not None:
+                    print(f"[{ticker}] ⏭ skip (取得済み): {cached.name}")
+                    results[ticker] = cached
+                    continue
+                save_path = out / f"{ticker}_{PurePosixPath(urlsplit(link).path).name}"
+                future = executor.submit(downloader.fetch, link, save_path, on_downloaded is not None)
+                futures[future] = (ticker, disclosure_id, save_path)
+
+            # 記録の追記は呼び出し側のスレッドでまとめて行う
+            for future in as_completed(futures):
+                ticker, disclosure_id, save_path = futures[future]
+                try:
+                    digest, data = future.result()
+                except DownloadError as e:
+                    print(f"[{ticker}] ✖ error: {e}")
+                    continue
+                manifest.record(ticker, disclosure_id or save_path.stem, save_path, sha256=digest)
+                results[ticker] = save_path
+                print(f"[{ticker}] ✔ downloaded: {save_path.name}")
+                if on_downloaded is not None:
+                    on_downloaded(ticker, save_path, digest, data)
+    finally:
+        downloader.close()
+
+    return results
+
+
 # -----------------------------
 # CLI
 # -----------------------------
@@ -128,15 +765,78 @@ if __name__ == "__main__":
 
     tdnet_cfg = config["tdnet"]
     pw_cfg = config.get("playwright", {})
-
-    result = download_latest_kessan_tanshin_xbrl_for_tickers(
-        tickers=tdnet_cfg["tickers"],
-        date_from=tdnet_cfg["date_from"],
-        out_dir=tdnet_cfg["out_dir"],
-        headless=pw_cfg.get("headless", False),
-        wait_ms=pw_cfg.get("wait_ms", 800),
-    )
+    dl_cfg = config.get("download", {})
+    ingest_cfg = config.get("ingest", {})
+
+    # ダウンロードしたものを、その場で SQLite に取り込む
+    ingest_queue = IngestQueue(ingest_cfg["db"], ingest_cfg.get("on_duplicate", "skip")) if ingest_cfg.get("db") else None
+    on_downloaded = ingest_queue.submit if ingest_queue is not None else None
+
+    concurrency = pw_cfg.get("concurrency", 1)
+    rate_limit_ms = pw_cfg.get("rate_limit_ms", pw_cfg.get("wait_ms", 800))
+    try:
+        if dl_cfg.get("mode", "browser") == "http":
+            # 1. ブラウザで XBRL の URL だけを集める
+            if concurrency > 1:
+                links = asyncio.run(
+                    collect_latest_xbrl_links_async(
+                        tickers=tdnet_cfg["tickers"],
+                        date_from=tdnet_cfg["date_from"],
+                        headless=pw_cfg.get("headless", False),
+                        concurrency=concurrency,
+                        rate_limit_ms=rate_limit_ms,
+                        url=tdnet_cfg.get("url", TDNET_URL),
+                    )
+                )
+            else:
+                links = collect_latest_xbrl_links(
+                    tickers=tdnet_cfg["tickers"],
+                    date_from=tdnet_cfg["date_from"],
+                    headless=pw_cfg.get("headless", False),
+                    wait_ms=pw_cfg.get("wait_ms", 800),
+                    url=tdnet_cfg.get("url", TDNET_URL),
+                )
+            # 2. HTTP で直接ダウンロードする
+            result = download_xbrl_links(
+                links,
+                out_dir=tdnet_cfg["out_dir"],
+                concurrency=dl_cfg.get("concurrency", 4),
+                retries=dl_cfg.get("retries", 3),
+                timeout=dl_cfg.get("timeout", 30),
+                manifest_path=tdnet_cfg.get("manifest"),
+                on_downloaded=on_downloaded,
+            )
+        elif concurrency > 1:
+            result = asyncio.run(
+                download_latest_kessan_tanshin_xbrl_for_tickers_async(
+                    tickers=tdnet_cfg["tickers"],
+                    date_from=tdnet_cfg["date_from"],
+                    out_dir=tdnet_cfg["out_dir"],
+                    headless=pw_cfg.get("headless", False),
+                    concurrency=concurrency,
+                    rate_limit_ms=rate_limit_ms,
+                    url=tdnet_cfg.get("url", TDNET_URL),
+                    manifest_path=tdnet_cfg.get("manifest"),
+                    on_downloaded=on_downloaded,
+                )
+            )
+        else:
+            result = download_latest_kessan_tanshin_xbrl_for_tickers(
+                tickers=tdnet_cfg["tickers"],
+                date_from=tdnet_cfg["date_from"],
+                out_dir=tdnet_cfg["out_dir"],
+                headless=pw_cfg.get("headless", False),
+                wait_ms=pw_cfg.get("wait_ms", 800),
+                url=tdnet_cfg.get("url", TDNET_URL),
+                manifest_path=tdnet_cfg.get("manifest"),
+                on_downloaded=on_downloaded,
+            )
+    finally:
+        if ingest_queue is not None:
+            ingest_queue.close()
 
     print("\n=== summary ===")
     for ticker, path in result.items():
         print(ticker, "->", path)
+    if ingest_queue is not None:
+        print(f"ingested={ingest_queue.ingested} failed={ingest_queue.failed}")
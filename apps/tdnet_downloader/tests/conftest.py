@@ -0,0 +1,24 @@
+import sys
+import types
+
+try:
+    import playwright.async_api  # noqa: F401
+    import playwright.sync_api  # noqa: F401
+except ImportError:
+    # Playwright が入っていない環境でも HTTP / 並列処理部分をテストできるよう、import だけ通す
+    # （ブラウザを使うテストは async_playwright をフェイクに差し替える）
+    def _unavailable(*args, **kwargs):
+        raise RuntimeError("playwright is not installed")
+
+    _sync_api = types.ModuleType("playwright.sync_api")
+    _sync_api.sync_playwright = _unavailable
+    _sync_api.TimeoutError = type("TimeoutError", (Exception,), {})
+    _async_api = types.ModuleType("playwright.async_api")
+    _async_api.async_playwright = _unavailable
+    _async_api.TimeoutError = _sync_api.TimeoutError
+    _playwright = types.ModuleType("playwright")
+    _playwright.sync_api = _sync_api
+    _playwright.async_api = _async_api
+    sys.modules.update(
+        {"playwright": _playwright, "playwright.sync_api": _sync_api, "playwright.async_api": _async_api}
+    )
@@ -0,0 +1,499 @@
+import asyncio
+import hashlib
+import re
+import threading
+import time
+from html.parser import HTMLParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import PurePosixPath
+from urllib.parse import parse_qs, urlencode, urljoin, urlsplit
+from urllib.request import urlopen
+
+import pytest
+
+import src.tdnet_downloader as td
+from src.tdnet_downloader import (
+    MANIFEST_NAME,
+    DownloadManifest,
+    collect_latest_xbrl_links_async,
+    download_latest_kessan_tanshin_xbrl_for_tickers_async,
+)
+
+RATE_LIMIT_MS = 50
+SEARCH_DELAY = 0.2  # 検索結果の表示にかかる時間
+ZIP_BODY = b"PK\x05\x06" + bytes(18)  # 空の ZIP
+
+# TDnet と同じく、トップページ → 検索フォームの iframe → 結果一覧の iframe（mainlist）の入れ子にする
+INDEX_PAGE = """<!DOCTYPE html>
+<html><body><iframe src="/search.html"></iframe></body></html>
+"""
+
+SEARCH_PAGE = """<!DOCTYPE html>
+<html><body>
+<form action="/mainlist.html" target="mainlist">
+<select name="t0"><option value="20250101">20250101</option><option value="20260101">20260101</option></select>
+<input id="freewordtxt" name="q"><button id="searchbtn" type="submit">検索</button>
+</form>
+<iframe name="mainlist" src="/mainlist.html"></iframe>
+</body></html>
+"""
+
+# (開示日, ticker, 表題, XBRL の ZIP)。新しい順
+DISCLOSURES = [
+    ("20260117", "8306", "決算短信", "081220260117500004.zip"),
+    ("20260116", "9984", "決算短信", "081220260116500003.zip"),
+    ("20260115", "6758", "四半期決算短信", "081220260115500002.zip"),
+    ("20260114", "7203", "決算短信", "081220260114533459.zip"),
+    ("20260110", "4063", "業績予想の修正", None),
+    ("20251105", "7203", "四半期決算短信", "081220251105500001.zip"),
+    ("20251020", "4063", "決算短信", "081220251020500005.zip"),
+]
+
+
+def _mainlist_page(date_from, query):
+    rows = []
+    for date, ticker, title, zip_name in DISCLOSURES:
+        if date < date_from or query not in ticker:
+            continue
+        link = f'<a href="/xbrl/{zip_name}">XBRL</a>' if zip_name else ""
+        rows.append(f"<tr><td>{date}</td><td>{ticker}</td><td>{title}</td><td>{link}</td></tr>")
+    return "<!DOCTYPE html>\n<html><body><table>" + "".join(rows) + "</table></body></html>"
+
+
+class _TdnetHandler(BaseHTTPRequestHandler):
+    """TDnet のトップ・検索フォーム・結果一覧・XBRL の ZIP を返す。検索は SEARCH_DELAY かかる"""
+
+    def do_GET(self):
+        server = self.server
+        url = urlsplit(self.path)
+        server.paths.append(self.path)
+
+        if url.path in ("/", "/index.html"):
+            body = INDEX_PAGE.encode("utf-8")
+        elif url.path == "/search.html":
+            body = SEARCH_PAGE.encode("utf-8")
+        elif url.path == "/mainlist.html":
+            params = parse_qs(url.query)
+            query = params.get("q", [""])[0]
+            if query:
+                # 検索中の数（= 並行して結果を待っているワーカー数）を数える
+                with server.lock:
+                    server.searching += 1
+                    server.max_searching = max(server.max_searching, server.searching)
+                try:
+                    time.sleep(SEARCH_DELAY)
+                finally:
+                    with server.lock:
+                        server.searching -= 1
+                body = _mainlist_page(params["t0"][0], query).encode("utf-8")
+            else:
+                body = _mainlist_page("", "-").encode("utf-8")
+        elif url.path.startswith("/xbrl/"):
+            body = ZIP_BODY
+        else:
+            self.send_error(404)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def tdnet_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _TdnetHandler)
+    server.paths = []
+    server.lock = threading.Lock()
+    server.searching = 0
+    server.max_searching = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _index_url(server):
+    host, port = server.server_address
+    return f"http://{host}:{port}/index.html"
+
+
+# -----------------------------
+# フェイクの Playwright
+# -----------------------------
+class Element:
+    def __init__(self, tag, attrs, parent=None):
+        self.tag = tag
+        self.attrs = attrs
+        self.parent = parent
+        self.children = []
+        self.texts = []
+
+    def text(self):
+        return "".join(self.texts) + "".join(c.text() for c in self.children)
+
+    def iter(self):
+        for child in self.children:
+            yield child
+            yield from child.iter()
+
+    def select(self, selector):
+        """'tag' / '#id' / 'tag[attr="value"]' だけに対応する"""
+        m = re.fullmatch(r'(\w+)?(?:#([\w-]+))?(?:\[(\w+)="([^"]*)"\])?', selector)
+        tag, id_, attr, value = m.groups()
+        return [
+            e
+            for e in self.iter()
+            if (tag is None or e.tag == tag)
+            and (id_ is None or e.attrs.get("id") == id_)
+            and (attr is None or e.attrs.get(attr) == value)
+        ]
+
+    def closest(self, tag):
+        e = self.parent
+        while e is not None and e.tag != tag:
+            e = e.parent
+        return e
+
+
+class _DocumentParser(HTMLParser):
+    VOID = {"input", "meta", "br", "img"}
+
+    def __init__(self):
+        super().__init__()
+        self.root = Element("#document", {})
+        self._current = self.root
+
+    def handle_starttag(self, tag, attrs):
+        e = Element(tag, {k: v or "" for k, v in attrs}, self._current)
+        self._current.children.append(e)
+        if tag not in self.VOID:
+            self._current = e
+
+    def handle_endtag(self, tag):
+        e = self._current
+        while e is not self.root and e.tag != tag:
+            e = e.parent
+        if e is not self.root:
+            self._current = e.parent
+
+    def handle_data(self, data):
+        self._current.texts.append(data)
+
+
+def _load(url):
+    with urlopen(url) as res:
+        parser = _DocumentParser()
+        parser.feed(res.read().decode("utf-8"))
+        return parser.root
+
+
+class FakeLocator:
+    """Playwright の Locator のうち、ダウンローダーが使う操作だけを真似る。要素は使うたびに探し直す"""
+
+    def __init__(self, frame, find):
+        self.frame = frame
+        self._find = find  # document -> 要素のリスト
+
+    async def _elements(self):
+        return self._find(await self.frame.document())
+
+    async def _one(self):
+        elements = await self._elements()
+        if not elements:
+            raise td.PWTimeoutError("element not found")
+        return elements[0]
+
+    @property
+    def first(self):
+        return FakeLocator(self.frame, lambda doc: self._find(doc)[:1])
+
+    @property
+    def content_frame(self):
+        return FakeFrame(self.frame.page, iframe=self)
+
+    def filter(self, has_text):
+        return FakeLocator(self.frame, lambda doc: [e for e in self._find(doc) if has_text in e.text()])
+
+    def get_by_role(self, role, name):
+        assert role == "link"
+        return FakeLocator(
+            self.frame,
+            lambda doc: [a for e in self._find(doc) for a in e.select("a") if "href" in a.attrs and name in a.text()],
+        )
+
+    async def count(self):
+        return len(await self._elements())
+
+    async def wait_for(self, state=None, timeout=None):
+        await self._one()
+
+    async def get_attribute(self, name):
+        return (await self._one()).attrs.get(name)
+
+    async def evaluate(self, expression):
+        assert expression == "a => a.href"
+        return urljoin(self.frame.url, (await self._one()).attrs["href"])
+
+    async def select_option(self, value):
+        select = await self._one()
+        assert value in [o.attrs.get("value") for o in select.select("option")]
+        select.attrs["value"] = value
+
+    async def fill(self, value):
+        (await self._one()).attrs["value"] = value
+
+    async def click(self):
+        e = await self._one()
+        page = self.frame.page
+        page.pool.requests.append(asyncio.get_running_loop().time())
+        if e.tag == "a":
+            await page.start_download(urljoin(self.frame.url, e.attrs["href"]))
+        elif e.tag == "button":
+            self._submit(e.closest("form"))
+        else:
+            raise AssertionError(f"unexpected click on <{e.tag}>")
+
+    def _submit(self, form):
+        """フォームの値をクエリにして、target の iframe の src を差し替える"""
+        params = {}
+        for e in form.iter():
+            if "name" not in e.attrs:
+                continue
+            if e.tag == "select":
+                options = e.select("option")
+                params[e.attrs["name"]] = e.attrs.get("value", options[0].attrs.get("value") if options else "")
+            elif e.tag == "input":
+                params[e.attrs["name"]] = e.attrs.get("value", "")
+        url = urljoin(self.frame.url, form.attrs["action"]) + "?" + urlencode(params)
+        doc = form
+        while doc.parent is not None:
+            doc = doc.parent
+        [target] = doc.select(f'iframe[name="{form.attrs["target"]}"]')
+        target.attrs["src"] = url
+
+
+class FakeFrame:
+    """ページ本体、または iframe の中身。iframe の src が変わっていれば読み直す"""
+
+    def __init__(self, page, url=None, iframe=None):
+        self.page = page
+        self.url = url
+        self.iframe = iframe
+        self._doc = None
+        self._loaded = None
+
+    async def document(self):
+        if self.iframe is None:
+            key = self.url
+        else:
+            element = await self.iframe._one()
+            self.url = urljoin(self.iframe.frame.url, element.attrs["src"])
+            key = (element, self.url)
+        if self._doc is None or key != self._loaded:
+            self._doc = await asyncio.to_thread(_load, self.url)
+            self._loaded = key
+            self.page.pool.loaded.append(urlsplit(self.url).path)
+        return self._doc
+
+    def locator(self, selector, has_text=None):
+        return FakeLocator(
+            self, lambda doc: [e for e in doc.select(selector) if has_text is None or has_text in e.text()]
+        )
+
+
+class FakeDownload:
+    def __init__(self, url, path):
+        self.suggested_filename = PurePosixPath(urlsplit(url).path).name
+        self._path = path
+
+    async def path(self):
+        return self._path
+
+
+class _ExpectDownload:
+    def __init__(self, page):
+        self.page = page
+
+    async def __aenter__(self):
+        self.page.download = asyncio.get_running_loop().create_future()
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    @property
+    def value(self):
+        return self.page.download
+
+
+class FakePage:
+    def __init__(self, pool, download_dir):
+        self.pool = pool
+        self.download_dir = download_dir
+        self.main_frame = None
+        self.download = None
+
+    async def goto(self, url, wait_until=None):
+        self.pool.requests.append(asyncio.get_running_loop().time())
+        self.main_frame = FakeFrame(self, url)
+        await self.main_frame.document()
+
+    def locator(self, selector):
+        return self.main_frame.locator(selector)
+
+    def expect_download(self, timeout=None):
+        return _ExpectDownload(self)
+
+    async def start_download(self, url):
+        # ブラウザと同じく、いったん一時ファイルに保存する
+        def fetch():
+            path = self.download_dir / f"{len(list(self.download_dir.iterdir()))}.tmp"
+            with urlopen(url) as res:
+                path.write_bytes(res.read())
+            return path
+
+        path = await asyncio.to_thread(fetch)
+        self.download.set_result(FakeDownload(url, path))
+
+
+class FakeContext:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def new_page(self):
+        return FakePage(self.pool, self.pool.download_dir)
+
+    async def close(self):
+        self.pool.open_contexts -= 1
+
+
+class FakeBrowser:
+    def __init__(self, pool):
+        self.pool = pool
+        self.closed = False
+
+    async def new_context(self, **kwargs):
+        self.pool.contexts += 1
+        self.pool.open_contexts += 1
+        self.pool.max_open_contexts = max(self.pool.max_open_contexts, self.pool.open_contexts)
+        return FakeContext(self.pool)
+
+    async def close(self):
+        self.closed = True
+
+
+class FakePlaywright:
+    """async_playwright() の代わり。HTTP でページを読み、フォームの送信と iframe の遷移を真似る"""
+
+    def __init__(self, download_dir):
+        self.download_dir = download_dir
+        self.requests = []  # ページ表示・クリックの時刻
+        self.loaded = []  # 読み込んだドキュメントのパス
+        self.contexts = 0
+        self.open_contexts = 0
+        self.max_open_contexts = 0
+        self.browser = FakeBrowser(self)
+        self.chromium = self
+
+    async def launch(self, headless=True):
+        return self.browser
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+@pytest.fixture
+def fake_playwright(tmp_path, monkeypatch):
+    download_dir = tmp_path / "browser-downloads"
+    download_dir.mkdir()
+    fake = FakePlaywright(download_dir)
+    monkeypatch.setattr(td, "async_playwright", lambda: fake)
+    return fake
+
+
+def test_pool_runs_contexts_in_parallel_within_rate_limit(tdnet_server, fake_playwright):
+    fake = fake_playwright
+    tickers = ["7203", "6758", "9984", "8306", "4063", "1111"]
+    links = asyncio.run(
+        collect_latest_xbrl_links_async(
+            tickers,
+            date_from="20260101",
+            concurrency=3,
+            rate_limit_ms=RATE_LIMIT_MS,
+            url=_index_url(tdnet_server),
+        )
+    )
+
+    # 入力順で返り、期間内に決算短信のない銘柄・見つからない銘柄は None
+    base = _index_url(tdnet_server)
+    assert list(links) == tickers
+    assert links == {
+        "7203": urljoin(base, "/xbrl/081220260114533459.zip"),
+        "6758": urljoin(base, "/xbrl/081220260115500002.zip"),
+        "9984": urljoin(base, "/xbrl/081220260116500003.zip"),
+        "8306": urljoin(base, "/xbrl/081220260117500004.zip"),
+        "4063": None,
+        "1111": None,
+    }
+
+    # 検索はトップ → 検索フォームの iframe → mainlist の iframe をたどり、開始日と ticker を送っている
+    searches = sorted(p for p in tdnet_server.paths if p.startswith("/mainlist.html?"))
+    assert searches == sorted(f"/mainlist.html?{urlencode({'t0': '20260101', 'q': t})}" for t in tickers)
+    # ワーカーごとにトップと検索フォームを1回だけ開き、以降は同じ iframe で検索し続ける
+    assert fake.loaded.count("/index.html") == 3
+    assert fake.loaded.count("/search.html") == 3
+
+    # ワーカーごとに独立したコンテキストを concurrency 個だけ使い、すべて閉じる
+    assert fake.contexts == 3
+    assert fake.max_open_contexts == 3
+    assert fake.open_contexts == 0
+    assert fake.browser.closed
+    # 検索結果待ちの間に他のワーカーが進んでいる
+    assert tdnet_server.max_searching == 3
+
+    # ページ表示 3 回 + 検索 6 回。全ワーカー合わせても rate_limit_ms 以上の間隔があく
+    assert len(fake.requests) == 9
+    gaps = [b - a for a, b in zip(fake.requests, fake.requests[1:])]
+    assert min(gaps) >= RATE_LIMIT_MS / 1000 - 0.005
+
+
+def test_pool_downloads_off_the_event_loop(tmp_path, tdnet_server, fake_playwright):
+    out = tmp_path / "out"
+    got = []
+
+    def on_downloaded(ticker, save_path, digest, data):
+        got.append((ticker, save_path.name, digest, data, threading.current_thread()))
+
+    results = asyncio.run(
+        download_latest_kessan_tanshin_xbrl_for_tickers_async(
+            ["7203", "4063"],
+            date_from="20260101",
+            out_dir=str(out),
+            concurrency=2,
+            rate_limit_ms=RATE_LIMIT_MS,
+            url=_index_url(tdnet_server),
+            on_downloaded=on_downloaded,
+        )
+    )
+
+    save_path = out / "7203_081220260114533459.zip"
+    assert results == {"7203": save_path, "4063": None}
+    assert save_path.read_bytes() == ZIP_BODY
+    assert "/xbrl/081220260114533459.zip" in tdnet_server.paths
+
+    # ハッシュ計算とコールバックはイベントループのスレッドの外で動く
+    digest = hashlib.sha256(ZIP_BODY).hexdigest()
+    [(ticker, name, got_digest, data, thread)] = got
+    assert (ticker, name, got_digest, data) == ("7203", save_path.name, digest, ZIP_BODY)
+    assert thread is not threading.main_thread()
+    assert DownloadManifest(out / MANIFEST_NAME).entries["081220260114533459"]["sha256"] == digest
@@ -0,0 +1,159 @@
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import src.tdnet_downloader as td
+from src.tdnet_downloader import MANIFEST_NAME, DownloadManifest, download_xbrl_links
+
+DISCLOSURE_ID = "081220260114533459"
+ZIP_BODY = bytes(range(256)) * 4096  # 1MB（HTTP_CHUNK_SIZE より大きい）
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """files のパスを返す。cut_once のパスは初回だけ途中で接続を切る。Range に対応"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append((self.path, self.headers.get("Range")))
+        body = server.files.get(self.path)
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        start = 0
+        range_header = self.headers.get("Range")
+        if range_header:
+            start = int(range_header.removeprefix("bytes=").rstrip("-"))
+            # range_shift のパスは要求と違う位置から返す（壊れたキャッシュなど）
+            start = max(0, start - server.range_shift.get(self.path, 0))
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+        else:
+            self.send_response(200)
+        rest = body[start:]
+        self.send_header("Content-Length", str(len(rest)))
+        self.end_headers()
+
+        if self.path in server.cut_once:
+            server.cut_once.discard(self.path)
+            self.wfile.write(rest[: len(rest) // 3])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(rest)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server(monkeypatch):
+    monkeypatch.setattr(td, "HTTP_RETRY_WAIT", 0)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    server.files = {}
+    server.cut_once = set()
+    server.range_shift = {}
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _url(server, path):
+    host, port = server.server_address
+    return f"http://{host}:{port}{path}"
+
+
+def test_cut_response_resumes_with_range(tmp_path, stub_server):
+    path = f"/data/{DISCLOSURE_ID}.zip"
+    stub_server.files[path] = ZIP_BODY
+    stub_server.cut_once.add(path)
+
+    got = []
+    results = download_xbrl_links(
+        {"7203": _url(stub_server, path)},
+        out_dir=str(tmp_path),
+        retries=2,
+        on_downloaded=lambda ticker, save_path, digest, data: got.append((digest, data)),
+    )
+
+    save_path = tmp_path / f"7203_{DISCLOSURE_ID}.zip"
+    assert results == {"7203": save_path}
+    assert save_path.read_bytes() == ZIP_BODY
+    assert not save_path.with_name(save_path.name + ".part").exists()
+
+    # 2回目は .part の続きから Range で取得している
+    assert len(stub_server.requests) == 2
+    assert stub_server.requests[0][1] is None
+    assert stub_server.requests[1][1] == f"bytes={len(ZIP_BODY) // 3}-"
+
+    expected = hashlib.sha256(ZIP_BODY).hexdigest()
+    # 取り込み側へは保存先を読み直さずにメモリ上の内容を渡す
+    assert got == [(expected, ZIP_BODY)]
+    assert DownloadManifest(tmp_path / MANIFEST_NAME).entries[DISCLOSURE_ID]["sha256"] == expected
+
+
+def test_mismatched_content_range_restarts_from_zero(tmp_path, stub_server, capsys):
+    path = f"/data/{DISCLOSURE_ID}.zip"
+    stub_server.files[path] = ZIP_BODY
+    stub_server.cut_once.add(path)
+    stub_server.range_shift[path] = 100
+
+    got = []
+    results = download_xbrl_links(
+        {"7203": _url(stub_server, path)},
+        out_dir=str(tmp_path),
+        retries=2,
+        on_downloaded=lambda ticker, save_path, digest, data: got.append(digest),
+    )
+
+    save_path = tmp_path / f"7203_{DISCLOSURE_ID}.zip"
+    assert results == {"7203": save_path}
+    assert save_path.read_bytes() == ZIP_BODY
+    assert got == [hashlib.sha256(ZIP_BODY).hexdigest()]
+
+    # 続きと違う位置からの 206 は継ぎ足さず、Range なしで最初から取り直す
+    assert [r[1] for r in stub_server.requests] == [None, f"bytes={len(ZIP_BODY) // 3}-", None]
+    assert "Content-Range" in capsys.readouterr().out
+
+
+def test_not_found_is_reported(tmp_path, stub_server, capsys):
+    results = download_xbrl_links(
+        {"9999": _url(stub_server, f"/data/{DISCLOSURE_ID}.zip")},
+        out_dir=str(tmp_path),
+        retries=2,
+    )
+
+    assert results == {"9999": None}
+    # 404 は再試行しない
+    assert len(stub_server.requests) == 1
+    assert "HTTP 404" in capsys.readouterr().out
+    assert list(tmp_path.glob("*.zip")) == []
+    assert DownloadManifest(tmp_path / MANIFEST_NAME).entries == {}
+
+
+def test_manifest_entry_is_skipped(tmp_path, stub_server, capsys):
+    path = f"/data/{DISCLOSURE_ID}.zip"
+    stub_server.files[path] = ZIP_BODY
+    cached = tmp_path / f"7203_{DISCLOSURE_ID}.zip"
+    cached.write_bytes(b"already downloaded")
+    DownloadManifest(tmp_path / MANIFEST_NAME).record(
+        "7203", DISCLOSURE_ID, cached, hashlib.sha256(b"already downloaded").hexdigest()
+    )
+
+    results = download_xbrl_links({"7203": _url(stub_server, path)}, out_dir=str(tmp_path))
+
+    assert results == {"7203": cached}
+    assert stub_server.requests == []
+    assert cached.read_bytes() == b"already downloaded"
+    assert "skip" in capsys.readouterr().out